@@ -0,0 +1,296 @@
+"""End-to-end benchmark of claude-manager's own orchestration overhead.
+
+Runs the real CLI against a throwaway repository whose ``origin`` is a local bare
+repository, with stub ``claude`` and ``gh`` executables first on PATH. The stub
+claude prints a configurable volume of stream-json (number of events, payload size
+per line, total delay) and makes one file change; the stub gh answers the capability
+probe and ``pr create``. Everything measured is therefore the manager, git and the
+stubs, never a model.
+
+For the sequential mode and for ``--worktree-parallel`` at each worker count it
+records items/minute, per-item orchestration latency (an item's wall time minus
+its claude runs, from ``--trace``), and the CPU time and peak RSS of the manager
+process itself (children excluded). Results are written as JSON; ``--compare``
+prints the change against an earlier results file.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_overhead [--items 32] [--workers 1,2,4,8,16,32]
+        [--events 200] [--line-kb 4] [--delay 0] [--output bench-overhead.json]
+        [--compare old.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STUB_CLAUDE = textwrap.dedent(
+    """\
+    #!{python}
+    import json, os, sys, time, uuid
+
+    events = int(os.environ.get("BENCH_CLAUDE_EVENTS", "200"))
+    payload = "x" * (int(os.environ.get("BENCH_CLAUDE_LINE_KB", "4")) * 1024)
+    pause = float(os.environ.get("BENCH_CLAUDE_DELAY", "0")) / max(1, events)
+    sid = str(uuid.uuid4())
+    out = sys.stdout
+    out.write(json.dumps({{"type": "system", "subtype": "init", "session_id": sid}}) + "\\n")
+    for i in range(events):
+        if i % 2:
+            content = [{{"type": "tool_result", "content": payload}}]
+            msg = {{"type": "user", "message": {{"role": "user", "content": content}}}}
+        else:
+            content = [{{"type": "text", "text": "step " + str(i)}}]
+            msg = {{"type": "assistant", "message": {{"role": "assistant", "content": content}}}}
+        out.write(json.dumps(msg) + "\\n")
+        if pause:
+            out.flush()
+            time.sleep(pause)
+    with open("bench-" + uuid.uuid4().hex[:8] + ".txt", "w") as f:
+        f.write("change\\n")
+    done = {{"role": "assistant", "content": [{{"type": "text", "text": "CLAUDE_MANAGER_DONE"}}]}}
+    out.write(json.dumps({{"type": "assistant", "message": done}}) + "\\n")
+    result = {{"type": "result", "subtype": "success", "session_id": sid, "total_cost_usd": 0,
+              "usage": {{"input_tokens": 1, "output_tokens": 1}}}}
+    out.write(json.dumps(result) + "\\n")
+    out.flush()
+    """
+)
+
+STUB_GH = textwrap.dedent(
+    """\
+    #!{python}
+    import sys, uuid
+
+    args = sys.argv[1:]
+    if "--help" in args:
+        print("Flags:\\n  --json fields\\n  -q, --jq expression")
+    elif args[:1] == ["--version"]:
+        print("gh version 9.9.9 (bench stub)")
+    elif args[:2] == ["pr", "create"]:
+        print("https://github.com/o/r/pull/" + str(uuid.uuid4().int % 100000))
+    else:
+        sys.exit(1)
+    """
+)
+
+# Runs the CLI and, at exit, records the manager process's own resource usage
+RUNNER = textwrap.dedent(
+    """\
+    import atexit, json, os, resource, sys
+
+    def _dump():
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        with open(os.environ["BENCH_RUSAGE"], "w") as f:
+            json.dump({"user": ru.ru_utime, "sys": ru.ru_stime, "maxrss": ru.ru_maxrss * scale}, f)
+
+    atexit.register(_dump)
+    sys.argv = ["claude-manager", *sys.argv[1:]]
+    from claude_code_manager.cli import main
+
+    main()
+    """
+)
+
+
+def _git(*args: str, cwd: Path) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def make_stubs(bin_dir: Path) -> None:
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for name, src in (("claude", STUB_CLAUDE), ("gh", STUB_GH)):
+        exe = bin_dir / name
+        exe.write_text(src.format(python=sys.executable), encoding="utf-8")
+        exe.chmod(0o755)
+
+
+def make_workspace(base: Path, items: int) -> Path:
+    """A repository with ``items`` open TODO items and a local bare ``origin``."""
+    remote = base / "remote.git"
+    repo = base / "repo"
+    repo.mkdir(parents=True)
+    _git("init", "-q", "--bare", "-b", "main", str(remote), cwd=base)
+    _git("init", "-q", "-b", "main", cwd=repo)
+    for k, v in (("user.name", "bench"), ("user.email", "bench@example.com")):
+        _git("config", k, v, cwd=repo)
+    (repo / ".gitignore").write_text("TODO.md\n.worktrees/\n.claude-manager/\n", encoding="utf-8")
+    (repo / "README.md").write_text("bench\n", encoding="utf-8")
+    _git("add", "-A", cwd=repo)
+    _git("commit", "-q", "-m", "init", cwd=repo)
+    _git("remote", "add", "origin", str(remote), cwd=repo)
+    _git("push", "-q", "-u", "origin", "main", cwd=repo)
+    todo = "".join(f"- [ ] Benchmark item {i}\n" for i in range(1, items + 1))
+    (repo / "TODO.md").write_text(todo, encoding="utf-8")
+    return repo
+
+
+def orchestration_latencies(trace: dict) -> list[float]:
+    """Seconds per item spent outside claude: the item span minus its claude spans."""
+    spans = [e for e in trace.get("traceEvents", []) if e.get("ph") == "X"]
+    items = [e for e in spans if e["name"] == "item"]
+    claude = [e for e in spans if e["name"] == "claude"]
+    out: list[float] = []
+    for it in items:
+        start, end = it["ts"], it["ts"] + it["dur"]
+        inside = sum(
+            c["dur"]
+            for c in claude
+            if c["tid"] == it["tid"] and start <= c["ts"] and c["ts"] + c["dur"] <= end
+        )
+        out.append((it["dur"] - inside) / 1e6)
+    return out
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def run_once(base: Path, bin_dir: Path, ns: argparse.Namespace, workers: int | None) -> dict:
+    """One run of ``claude-manager run``; ``workers`` None means sequential mode."""
+    repo = make_workspace(base, ns.items)
+    trace_path = base / "trace.json"
+    rusage_path = base / "rusage.json"
+    cmd = [sys.executable, "-c", RUNNER, "run", "--trace", str(trace_path), "--no-journal"]
+    if workers is not None:
+        cmd += ["--worktree-parallel", "--worktree-parallel-max-semaphore", str(workers)]
+    env = {
+        **os.environ,
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        "XDG_CACHE_HOME": str(base / "cache"),
+        "BENCH_RUSAGE": str(rusage_path),
+        "BENCH_CLAUDE_EVENTS": str(ns.events),
+        "BENCH_CLAUDE_LINE_KB": str(ns.line_kb),
+        "BENCH_CLAUDE_DELAY": str(ns.delay),
+    }
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=repo, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"claude-manager failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    done = (repo / "TODO.md").read_text(encoding="utf-8").count("- [x] ")
+    if done != ns.items:
+        raise RuntimeError(f"only {done} of {ns.items} items completed")
+    ru = json.loads(rusage_path.read_text(encoding="utf-8"))
+    latencies = orchestration_latencies(json.loads(trace_path.read_text(encoding="utf-8")))
+    return {
+        "mode": "sequential" if workers is None else "parallel",
+        "workers": 1 if workers is None else workers,
+        "items": ns.items,
+        "wall_s": round(wall, 3),
+        "items_per_min": round(ns.items / wall * 60, 2),
+        "cpu_user_s": round(ru["user"], 3),
+        "cpu_sys_s": round(ru["sys"], 3),
+        "cpu_s_per_item": round((ru["user"] + ru["sys"]) / ns.items, 4),
+        "peak_rss_mb": round(ru["maxrss"] / (1024 * 1024), 1),
+        "latency_s": {
+            "mean": round(statistics.fmean(latencies), 4),
+            "p50": round(_percentile(latencies, 0.5), 4),
+            "p95": round(_percentile(latencies, 0.95), 4),
+            "max": round(max(latencies), 4),
+        },
+    }
+
+
+def _key(run: dict) -> tuple[str, int]:
+    return (run["mode"], run["workers"])
+
+
+def compare(old: dict, new: dict) -> None:
+    before = {_key(r): r for r in old.get("runs", [])}
+    print(f"\nchange vs. {old.get('meta', {}).get('commit', 'previous run')}:")
+    for run in new["runs"]:
+        prev = before.get(_key(run))
+        if prev is None:
+            continue
+
+        def pct(a: float, b: float) -> str:
+            return f"{(b - a) / a * 100:+6.1f}%" if a else "   n/a"
+
+        print(
+            f"  {run['mode']:>10} x{run['workers']:<3}"
+            f" items/min {pct(prev['items_per_min'], run['items_per_min'])}"
+            f"  latency p50 {pct(prev['latency_s']['p50'], run['latency_s']['p50'])}"
+            f"  cpu/item {pct(prev['cpu_s_per_item'], run['cpu_s_per_item'])}"
+            f"  rss {pct(prev['peak_rss_mb'], run['peak_rss_mb'])}"
+        )
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument("--items", type=int, default=32)
+    ap.add_argument("--workers", default="1,2,4,8,16,32", help="worktree-parallel worker counts")
+    ap.add_argument("--no-sequential", action="store_true", help="skip the sequential mode")
+    ap.add_argument("--events", type=int, default=200, help="stream-json lines per claude run")
+    ap.add_argument("--line-kb", type=int, default=4, help="payload KiB of every other line")
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds each claude run takes")
+    ap.add_argument("--output", default="bench-overhead.json")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    ns = ap.parse_args()
+
+    worker_counts = [int(w) for w in ns.workers.split(",") if w.strip()]
+    modes: list[int | None] = ([] if ns.no_sequential else [None]) + worker_counts
+    results = {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "items": ns.items,
+            "events": ns.events,
+            "line_kb": ns.line_kb,
+            "delay_s": ns.delay,
+        },
+        "runs": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="claude-manager-bench-") as tmp:
+        bin_dir = Path(tmp) / "bin"
+        make_stubs(bin_dir)
+        print(
+            f"{'mode':>10} {'workers':>7} {'items/min':>10} {'lat p50':>8} {'lat p95':>8}"
+            f" {'cpu/item':>9} {'rss MB':>7}"
+        )
+        for n, workers in enumerate(modes):
+            run = run_once(Path(tmp) / f"run-{n}", bin_dir, ns, workers)
+            results["runs"].append(run)
+            print(
+                f"{run['mode']:>10} {run['workers']:>7} {run['items_per_min']:>10.1f}"
+                f" {run['latency_s']['p50']:>7.3f}s {run['latency_s']['p95']:>7.3f}s"
+                f" {run['cpu_s_per_item']:>8.3f}s {run['peak_rss_mb']:>7.1f}"
+            )
+    Path(ns.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"results written to {ns.output}")
+    if ns.compare:
+        compare(json.loads(Path(ns.compare).read_text(encoding="utf-8")), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Start-up time of the claude-manager command line, with a budget.
+
+Times fresh interpreters (median of ``--repeat`` runs) for:
+
+* ``python -c pass``: the interpreter's own start-up, subtracted from the others
+* ``claude-manager --version``: the console entry point's fast path
+* ``import claude_code_manager.cli``: the typer CLI surface (``--help``, ``--doctor``)
+* ``import claude_code_manager.engine``: everything a run loads
+
+Byte-code is cached under a temporary ``PYTHONPYCACHEPREFIX`` (and written even if
+``PYTHONDONTWRITEBYTECODE`` is set), and one untimed warm-up run fills it, so the
+numbers match an installed package. Exits with status 1 when ``--version`` takes
+more than ``--budget-ms`` above the interpreter; ``--importtime`` lists the slowest
+modules it imports.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--repeat 20] [--budget-ms 15] [--importtime]
+        [--output startup.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CASES = {
+    "python": ["-c", "pass"],
+    "version": ["-m", "claude_code_manager", "--version"],
+    "cli import": ["-c", "import claude_code_manager.cli"],
+    "engine import": ["-c", "import claude_code_manager.engine"],
+}
+
+
+def _env(pycache: str) -> dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPYCACHEPREFIX"] = pycache
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_case(args: list[str], env: dict[str, str], repeat: int) -> float:
+    """Median wall seconds of a fresh ``python <args>``."""
+    subprocess.run([sys.executable, *args], env=env, capture_output=True, check=True)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, capture_output=True, check=True)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def slowest_imports(args: list[str], env: dict[str, str], top: int = 15) -> list[tuple[int, str]]:
+    """(cumulative microseconds, module) of the slowest imports, from ``-X importtime``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument(
+        "--budget-ms", type=float, default=15.0, help="max --version time above bare python"
+    )
+    ap.add_argument("--importtime", action="store_true", help="show the slowest imports")
+    ap.add_argument("--output", help="write the results as JSON")
+    ns = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="claude-manager-pycache-") as pycache:
+        env = _env(pycache)
+        results = {name: time_case(args, env, ns.repeat) for name, args in CASES.items()}
+        floor = results["python"]
+        for name, seconds in results.items():
+            extra = "" if name == "python" else f"  (+{(seconds - floor) * 1e3:6.1f} ms)"
+            print(f"{name:>14}: {seconds * 1e3:7.1f} ms{extra}")
+        if ns.importtime:
+            print("\nslowest imports for --version (cumulative):")
+            for us, module in slowest_imports(CASES["version"], env):
+                print(f"  {us / 1e3:7.1f} ms {module}")
+
+    over = (results["version"] - floor) * 1e3
+    if ns.output:
+        data = {
+            "median_ms": {k: round(v * 1e3, 2) for k, v in results.items()},
+            "version_over_python_ms": round(over, 2),
+            "budget_ms": ns.budget_ms,
+            "repeat": ns.repeat,
+        }
+        Path(ns.output).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    if over > ns.budget_ms:
+        print(f"\n--version is {over:.1f} ms over bare python; budget is {ns.budget_ms:g} ms")
+        sys.exit(1)
+    print(f"\n--version within budget ({over:.1f} <= {ns.budget_ms:g} ms)")
+
+
+if __name__ == "__main__":
+    main()
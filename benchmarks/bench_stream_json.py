@@ -0,0 +1,85 @@
+"""Microbenchmark: stream-json top-level decoder vs. json.loads per line.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_stream_json [--lines N] [--payload-kb K]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from claude_code_manager.stream_json import StreamDecoder
+
+
+def make_lines(n: int, payload_kb: int) -> list[str]:
+    unit = 'lorem ipsum "quoted" {braces} [brackets]\n'
+    blob = (unit * (payload_kb * 1024 // len(unit) + 1))[: payload_kb * 1024]
+    lines = [json.dumps({"type": "system", "subtype": "init", "session_id": "s"})]
+    for i in range(n):
+        if i % 2:
+            msg = {"role": "user", "content": [{"type": "tool_result", "content": blob}]}
+            lines.append(json.dumps({"type": "user", "message": msg, "session_id": "s"}))
+        else:
+            msg = {"role": "assistant", "content": [{"type": "text", "text": f"step {i}"}]}
+            lines.append(json.dumps({"type": "assistant", "message": msg, "session_id": "s"}))
+    lines.append(json.dumps({"type": "result", "usage": {"input_tokens": 1}, "session_id": "s"}))
+    return [x + "\n" for x in lines]
+
+
+def baseline(lines: list[str], done_token: str) -> tuple[dict[str, int], bool]:
+    """The loop previously used by run_claude_and_detect."""
+    counts = {"system": 0, "assistant": 0, "user": 0}
+    done_seen = False
+    for line in lines:
+        if not done_seen and done_token and (done_token in line):
+            done_seen = True
+        try:
+            typ = str(json.loads(line).get("type", "")).strip()
+            if typ in counts:
+                counts[typ] += 1
+        except Exception:
+            pass
+    return counts, done_seen
+
+
+def decoder(lines: list[str], done_token: str) -> tuple[dict[str, int], bool]:
+    counts = {"system": 0, "assistant": 0, "user": 0}
+    dec = StreamDecoder(done_token)
+    for line in lines:
+        ev = dec.decode_line(line)
+        if ev.type in counts:
+            counts[ev.type] += 1
+    return counts, dec.done_seen
+
+
+def bench(fn, lines: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(lines, "CLAUDE_MANAGER_DONE")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--lines", type=int, default=400)
+    ap.add_argument("--payload-kb", type=int, default=256)
+    ap.add_argument("--repeat", type=int, default=5)
+    ns = ap.parse_args()
+
+    lines = make_lines(ns.lines, ns.payload_kb)
+    assert baseline(lines, "CLAUDE_MANAGER_DONE") == decoder(lines, "CLAUDE_MANAGER_DONE")
+    total_mb = sum(len(x) for x in lines) / 1e6
+    t_base = bench(baseline, lines, ns.repeat)
+    t_dec = bench(decoder, lines, ns.repeat)
+    print(f"{len(lines)} lines, {total_mb:.1f} MB")
+    print(f"json.loads loop : {t_base * 1e3:8.1f} ms ({total_mb / t_base:7.1f} MB/s)")
+    print(f"StreamDecoder   : {t_dec * 1e3:8.1f} ms ({total_mb / t_dec:7.1f} MB/s)")
+    print(f"speedup         : {t_base / t_dec:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
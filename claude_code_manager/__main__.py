@@ -0,0 +1,24 @@
+"""Console entry point (``claude-manager``, ``python -m claude_code_manager``).
+
+``--version`` is answered here without importing the CLI, so scripts and hooks that
+only check the version do not pay for typer.
+"""
+
+from __future__ import annotations
+
+import sys
+
+
+def main() -> None:
+    if sys.argv[1:] in (["--version"], ["-v"]):
+        from . import __version__
+
+        print(__version__)
+        return
+    from .cli import main as cli_main
+
+    cli_main()
+
+
+if __name__ == "__main__":
+    main()
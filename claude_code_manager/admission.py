@@ -0,0 +1,146 @@
+"""Process-wide admission control for claude launches.
+
+Every claude run (first attempts and bounces, in every worker) passes through one
+:class:`AdmissionController` before it starts. The controller enforces a steady
+launch budget with a token bucket and, when a run reports a rate limit or overload,
+pauses all new launches with jittered exponential backoff. Runs already in flight
+are never interrupted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import time
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING
+
+from . import signals
+from .core import debug_log
+
+if TYPE_CHECKING:
+    from .core import Config
+
+# Signals that pause new launches
+BACKOFF_SIGNALS = frozenset({signals.RATE_LIMIT, signals.OVERLOADED})
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        launches_per_minute: float = 0,
+        burst: int = 1,
+        backoff_base: float = 10.0,
+        backoff_max: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ):
+        # Tokens per second; 0 disables the launch budget
+        self.rate = max(0.0, float(launches_per_minute)) / 60.0
+        self.burst = max(1, int(burst))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._tokens = float(self.burst)
+        self._refilled = clock()
+        self._paused_until = 0.0
+        # Consecutive backoffs without a clean run in between
+        self.failures = 0
+        self.launches = 0
+        self._lock: asyncio.Lock | None = None
+
+    @classmethod
+    def from_config(cls, cfg: Config) -> AdmissionController:
+        """Budget from ``launches_per_minute``; ``cooldown`` caps it at one per N seconds."""
+        rate = float(cfg.launches_per_minute or 0)
+        if cfg.cooldown > 0:
+            rate = min(rate, 60.0 / cfg.cooldown) if rate > 0 else 60.0 / cfg.cooldown
+        return cls(
+            launches_per_minute=rate,
+            burst=cfg.launch_burst,
+            backoff_base=cfg.backoff_base,
+            backoff_max=cfg.backoff_max,
+        )
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def delay(self) -> float:
+        """Seconds until the next launch may start (0: now)."""
+        now = self.clock()
+        wait = max(0.0, self._paused_until - now)
+        if self.rate > 0:
+            self._refill(now)
+            wait = max(wait, (1.0 - self._tokens) / self.rate)
+        return wait
+
+    def _take(self) -> None:
+        self._refill(self.clock())
+        if self.rate > 0:
+            self._tokens -= 1.0
+        self.launches += 1
+
+    async def admit(self) -> None:
+        """Wait for a launch slot; callers are admitted in arrival order."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while (wait := self.delay()) > 0:
+                await asyncio.sleep(wait)
+            self._take()
+
+    def backoff(self, reason: str) -> float:
+        """Pause new launches; returns the pause length.
+
+        Signals that arrive while already paused (e.g. every worker hitting the same
+        limit at once) do not escalate the backoff further.
+        """
+        now = self.clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        ceiling = min(self.backoff_max, self.backoff_base * 2**self.failures)
+        # "Equal jitter": half fixed, half random, so workers do not retry in lockstep
+        pause = ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+        self.failures += 1
+        self._paused_until = now + pause
+        debug_log(f"admission: {reason}, pausing claude launches for {pause:.1f}s")
+        return pause
+
+    def note_signal(self, kind: str) -> None:
+        if kind in BACKOFF_SIGNALS:
+            self.backoff(kind)
+
+    def note_success(self) -> None:
+        """A run finished without rate-limit signals; reset the backoff exponent."""
+        self.failures = 0
+
+
+_CONTROLLER: AdmissionController | None = None
+
+
+def current() -> AdmissionController | None:
+    return _CONTROLLER
+
+
+@contextlib.contextmanager
+def shared(controller: AdmissionController) -> Iterator[AdmissionController]:
+    """Install ``controller`` for the process unless one is already installed.
+
+    Nested runs (e.g. one per repository) keep sharing the outermost controller.
+    """
+    global _CONTROLLER
+    if _CONTROLLER is not None:
+        yield _CONTROLLER
+        return
+    _CONTROLLER = controller
+    unsubscribe = signals.subscribe(controller.note_signal)
+    try:
+        yield controller
+    finally:
+        unsubscribe()
+        _CONTROLLER = None
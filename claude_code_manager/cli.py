@@ -1,60 +1,35 @@
 from __future__ import annotations
 
-import json
 import os
-import random
-import re
+import queue
 import shutil
-import string
 import subprocess
 import sys
 import threading
 import time
 from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
 from pathlib import Path
 
 import typer
 
-from . import __version__
-
-# i18n loader and translator
-I18N_CACHE: dict[str, dict[str, str]] = {}
-
-
-def load_i18n_toml(path: Path) -> dict[str, dict[str, str]]:
-    try:
-        import tomllib
-
-        if not path.exists():
-            return {}
-        data = tomllib.loads(path.read_text(encoding="utf-8"))
-        blocks = data.get("i18n") if isinstance(data.get("i18n"), dict) else data
-        result: dict[str, dict[str, str]] = {}
-        for lang, mapping in (blocks or {}).items():
-            if isinstance(mapping, dict):
-                # Ensure values are strings
-                result[lang] = {str(k): str(v) for k, v in mapping.items()}
-        return result
-    except Exception:
-        return {}
-
-
-def set_i18n(path: Path) -> None:
-    global I18N_CACHE
-    I18N_CACHE = load_i18n_toml(path)
-
-
-def tr(key: str, lang: str, **kwargs) -> str:
-    # Lookup order: selected lang -> en -> key
-    base = I18N_CACHE.get(lang) or {}
-    s = base.get(key) or (I18N_CACHE.get("en") or {}).get(key) or key
-    try:
-        return s.format(**kwargs)
-    except Exception:
-        return s
-
+from . import __version__, core, tracing
+from .core import (
+    CREATED_WORKTREES,
+    CREATED_WORKTREES_LOCK,
+    Config,
+    TodoItem,
+    color_header,
+    color_info,
+    color_success,
+    color_warn,
+    echo,
+    load_config_toml,
+    parse_todo_markdown,
+    set_i18n,
+    split_paths,
+    tr,
+)
+from .usage import run_total
 
 APP = typer.Typer(
     add_completion=False,
@@ -64,111 +39,107 @@ APP = typer.Typer(
 )
 
 
-def echo(msg: str, err: bool = False):
-    stream = sys.stderr if err else sys.stdout
-    # Colorize errors in red when enabled
-    if err:
-        try:
-            if COLOR_ENABLED:
-                msg = f"\x1b[31m{msg}\x1b[0m"
-        except NameError:
-            # COLOR_ENABLED not initialized yet
-            pass
-    print(msg, file=stream, flush=True)
-
-
-# --- simple color helpers ---
-COLOR_ENABLED = True  # will be set based on CLI option and TTY
-DEBUG_ENABLED = False  # set from CLI
-
-
-def _ansi(code: str, s: str) -> str:
-    return f"\x1b[{code}m{s}\x1b[0m" if COLOR_ENABLED else s
-
-
-def color_info(s: str) -> str:
-    return _ansi("36", s)  # cyan
-
-
-def color_success(s: str) -> str:
-    return _ansi("32", s)  # green
-
-
-def color_warn(s: str) -> str:
-    return _ansi("33", s)  # yellow
-
-
-def color_header(s: str) -> str:
-    return _ansi("1;36", s)  # bold cyan
-
-
-def color_debug(s: str) -> str:
-    return _ansi("35", s)  # magenta
-
-
-def debug_log(msg: str) -> None:
-    if DEBUG_ENABLED:
-        try:
-            sys.stderr.write(color_debug(f"[debug] {msg}\n"))
-            sys.stderr.flush()
-        except Exception:
-            pass
-
-
 class LiveRows:
-    """Simple multi-row live renderer for TTY. Each row can have 1 or 2 lines."""
+    """Multi-row live renderer for TTY. Each row can have 1 or 2 lines.
+
+    ``update`` only enqueues; a dedicated render thread drains the queue at most
+    ``fps`` times per second, keeps the latest state per row and rewrites only the
+    rows that changed since the previous frame. A slow terminal therefore never
+    blocks the callers.
+    """
 
-    def __init__(self, rows: int, lines_per_row: int = 2):
+    def __init__(self, rows: int, lines_per_row: int = 2, *, fps: float = 20.0, stream=None):
         self.rows = int(rows)
         self.lines_per_row = 1 if int(lines_per_row) == 1 else 2
         self.lines: list[tuple[str, str, bool]] = [("", "", False) for _ in range(self.rows)]
+        self.frame_interval = 1.0 / max(1.0, float(fps))
+        self._stream = stream
+        self._queue: queue.SimpleQueue[tuple[int, str, str, bool] | None] = queue.SimpleQueue()
         self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._drawn: list[tuple[str, str] | None] = [None] * self.rows
         self._initialized = False
 
-    def _draw(self):
+    @property
+    def stream(self):
+        return self._stream or sys.stderr
+
+    def _render_frame(self) -> str:
+        """Return escape sequences redrawing changed rows; cursor stays below the block."""
         total_lines = self.rows * self.lines_per_row
+        parts: list[str] = []
+        if not self._initialized:
+            # Allocate lines once; the cursor then sits just below the block
+            parts.append("\n" * total_lines)
+            self._initialized = True
+        for i in range(self.rows):
+            l1, l2, _ = self.lines[i]
+            if self._drawn[i] == (l1, l2):
+                continue
+            self._drawn[i] = (l1, l2)
+            top = i * self.lines_per_row
+            parts.append(f"\x1b[{total_lines - top}A")
+            parts.append("\r\x1b[2K" + (l1 or "") + "\n")
+            if self.lines_per_row == 2:
+                parts.append("\r\x1b[2K" + (l2 or "") + "\n")
+            below = total_lines - top - self.lines_per_row
+            if below:
+                parts.append(f"\x1b[{below}B")
+        return "".join(parts)
+
+    def _draw(self) -> None:
         try:
-            if not self._initialized:
-                # Allocate lines once
-                for _ in range(total_lines):
-                    sys.stderr.write("\n")
-                # Move back to top of block
-                if total_lines:
-                    sys.stderr.write(f"\x1b[{total_lines}A")
-                self._initialized = True
-            else:
-                # Move back to top of block to redraw
-                if total_lines:
-                    sys.stderr.write(f"\x1b[{total_lines}A")
-
-            # Redraw all rows
-            for i in range(self.rows):
-                l1, l2, _ = self.lines[i]
-                sys.stderr.write("\r\x1b[2K" + (l1 or ""))
-                if self.lines_per_row == 2:
-                    sys.stderr.write("\n\x1b[2K" + (l2 or ""))
-                else:
-                    sys.stderr.write("\n")
-
-            # Leave cursor at bottom of block
-            sys.stderr.flush()
+            frame = self._render_frame()
+            if frame:
+                self.stream.write(frame)
+                self.stream.flush()
         except Exception:
             pass
 
+    def _drain(self, first: tuple[int, str, str, bool] | None) -> bool:
+        """Apply ``first`` plus everything queued behind it. Returns False on shutdown."""
+        item = first
+        while True:
+            if item is None:
+                return False
+            index, line1, line2, final = item
+            self.lines[index] = (line1, line2, final)
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return True
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            running = self._drain(self._queue.get())
+            with self._lock:
+                self._draw()
+            if running:
+                time.sleep(self.frame_interval)
+
     def update(self, index: int, line1: str, line2: str, final: bool = False) -> None:
         if index < 0 or index >= self.rows:
             return
-        with self._lock:
-            self.lines[index] = (line1, line2, final)
-            self._draw()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="claude-manager-render", daemon=True
+                    )
+                    self._thread.start()
+        self._queue.put((index, line1, line2, final))
 
     def finish(self) -> None:
-        # Ensure cursor is just after the block
+        # Flush pending updates, stop the render thread and leave the cursor after the block
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout=5)
         try:
-            if not self._initialized:
-                return
-            sys.stderr.write("\n")
-            sys.stderr.flush()
+            self.stream.write("\n")
+            self.stream.flush()
         except Exception:
             pass
 
@@ -184,94 +155,9 @@ def _version_callback(
         raise typer.Exit()
 
 
-@dataclass
-class Config:
-    cooldown: int = 0
-    git_branch_prefix: str = "todo/"
-    git_commit_message_prefix: str = "feat: "
-    git_base_branch: str = "main"
-    github_pr_title_prefix: str = "feat: "
-    github_pr_body_template: str = "Implementing TODO item: {todo_item}"
-    config_path: str = ".claude-manager.toml"
-    input_path: str = "TODO.md"
-    claude_args: str = ""
-    max_keep_asking: int = 3
-    task_done_message: str = "CLAUDE_MANAGER_DONE"
-    show_claude_output: bool = False
-    doctor: bool = False
-    worktree_parallel: bool = False
-    worktree_parallel_max_semaphore: int = 1
-    lang: str = "en"
-    i18n_path: str = ".claude-manager.i18n.toml"
-    # Headless mode (always used)
-    headless_prompt_template: str = (
-        "Implement the following TODO item in this repository.\n\n"
-        "Title: {title}\n"
-        "Subtasks:\n{children_bullets}\n\n"
-        "Please apply necessary changes. When finished, output the token: {done_token}\n"
-    )
-    headless_output_format: str = "stream-json"
-    # Reporting
-    pr_urls: list[str] | None = None  # filled during run
-    color: bool = True
-
-
-TODO_TOP_PATTERN = re.compile(r"^- \[ \] (?P<title>.+)$")
-TODO_DONE_PATTERN = re.compile(r"^- \[x\] .+")
-TODO_CHILD_PATTERN = re.compile(r"^\s{2,}- \[ \] (?P<title>.+)$")
-
-
-@dataclass
-class TodoItem:
-    title: str
-    children: list[str]
-
-
-def parse_todo_markdown(md: str) -> list[TodoItem]:
-    """Parse top-level unchecked items and attach child unchecked titles.
-    Expects GitHub Flavored Markdown checklist structure.
-    """
-    items: list[TodoItem] = []
-    current: TodoItem | None = None
-    for line in md.splitlines():
-        if TODO_DONE_PATTERN.match(line):
-            continue
-        m = TODO_TOP_PATTERN.match(line)
-        if m:
-            if current:
-                items.append(current)
-            current = TodoItem(title=m.group("title").strip(), children=[])
-            continue
-        m2 = TODO_CHILD_PATTERN.match(line)
-        if m2 and current is not None:
-            current.children.append(m2.group("title").strip())
-    if current:
-        items.append(current)
-    return items
-
-
 # --- helpers restored after hook removal ---
 
 
-def _args_list(args: str) -> list[str]:
-    return [x for x in args.split() if x]
-
-
-def _args_has_flag(args_list: list[str], flag: str) -> bool:
-    return any(a == flag or a.startswith(flag + "=") for a in args_list) or any(
-        args_list[i] == flag and i + 1 < len(args_list) for i in range(len(args_list))
-    )
-
-
-def _get_flag_value(args_list: list[str], flag: str) -> str | None:
-    for i, a in enumerate(args_list):
-        if a == flag and i + 1 < len(args_list):
-            return args_list[i + 1]
-        if a.startswith(flag + "="):
-            return a.split("=", 1)[1]
-    return None
-
-
 def run_claude_and_detect(
     args: str,
     show_output: bool,
@@ -285,231 +171,48 @@ def run_claude_and_detect(
     row_updater: Callable[[int, str, str, bool], None] | None = None,
 ) -> tuple[int, bool]:
     """Run Claude once and detect if done_token appears in the streamed output.
-    Returns (return_code, done_seen).
+    Returns (return_code, done_seen). Blocking wrapper around the asyncio engine.
     """
-    extra = _args_list(args)
-    cmd: list[str] = ["claude", "-p", prompt]
-
-    provided_fmt = _get_flag_value(extra, "--output-format")
-    effective_fmt = provided_fmt or output_format
-
-    if not provided_fmt:
-        cmd += ["--output-format", output_format]
-
-    if effective_fmt == "stream-json" and not _args_has_flag(extra, "--verbose"):
-        cmd += ["--verbose"]
-
-    cmd += extra
-
-    debug_log(f"running: {' '.join(cmd)}")
-    debug_log(f"cwd={cwd or Path.cwd()}")
-    debug_log(f"show_output={show_output}, output_format={effective_fmt}")
-
-    done_seen = False
-
-    if show_output:
-        p = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            env={**os.environ, **(env or {})},
-            cwd=str(cwd) if cwd else None,
-        )
-        assert p.stdout is not None
-        try:
-            for line in p.stdout:
-                if not done_seen and done_token and (done_token in line):
-                    done_seen = True
-                try:
-                    sys.stdout.write(line)
-                except Exception:
-                    pass
-            p.wait()
-            return int(p.returncode or 0), done_seen
-        finally:
-            try:
-                p.stdout.close()
-            except Exception:
-                pass
-    else:
-        counts: dict[str, int] = {"system": 0, "assistant": 0, "user": 0}
-        allowed = set(counts.keys())
-
-        spinner = "|/-\\"
-        spin_idx = 0
-        last_len = 0
-        aborted = False
-        errored = False
-
-        def _counts_text() -> str:
-            return ", ".join(
-                [
-                    f"assistant: {counts['assistant']}",
-                    f"user: {counts['user']}",
-                    f"system: {counts['system']}",
-                ]
-            )
-
-        def _print_status(prefix_char: str | None = None, *, final: bool = False):
-            nonlocal last_len
-            ch = prefix_char if prefix_char is not None else spinner[spin_idx % len(spinner)]
-
-            def _colorize_line_from_plain(line_plain: str) -> str:
-                line_colored = line_plain
-                try:
-                    if line_colored.startswith(ch):
-                        if ch == "✓":
-                            spin_col = color_success(ch)
-                        elif ch == "❌":
-                            spin_col = color_warn(ch)
-                        else:
-                            spin_col = color_info(ch)
-                        line_colored = spin_col + line_colored[len(ch) :]
-
-                    a_tok = f"assistant: {counts['assistant']}"
-                    u_tok = f"user: {counts['user']}"
-                    s_tok = f"system: {counts['system']}"
-                    if a_tok in line_colored:
-                        line_colored = line_colored.replace(a_tok, color_success(a_tok))
-                    if u_tok in line_colored:
-                        line_colored = line_colored.replace(u_tok, color_info(u_tok))
-                    if s_tok in line_colored:
-                        line_colored = line_colored.replace(s_tok, color_warn(s_tok))
-                except Exception:
-                    pass
-                return line_colored
-
-            if row_updater is not None and sys.stderr.isatty():
-                line_plain = f"{ch} worktree {row_index + 1} | {_counts_text()}"
-                line_out = _colorize_line_from_plain(line_plain) if COLOR_ENABLED else line_plain
-                row_updater(row_index, line_out, "", final)
-                return
-
-            counts_part_plain = _counts_text()
-            line1_plain = f"{ch} todo {row_index + 1}: {counts_part_plain}"
-            try:
-                import shutil as _shutil
-
-                width = max(20, int(_shutil.get_terminal_size((80, 24)).columns))
-            except Exception:
-                width = 80
-            if len(line1_plain) > width:
-                line1_plain = line1_plain[: width - 1]
-
-            if sys.stderr.isatty():
-                try:
-                    line1_out = (
-                        _colorize_line_from_plain(line1_plain) if COLOR_ENABLED else line1_plain
-                    )
-                except Exception:
-                    line1_out = line1_plain
-                try:
-                    sys.stderr.write("\r\x1b[2K" + line1_out)
-                    sys.stderr.flush()
-                except Exception:
-                    pass
-            else:
-                pad = max(0, last_len - len(line1_plain))
-                try:
-                    sys.stderr.write("\r" + line1_plain + (" " * pad))
-                    sys.stderr.flush()
-                except Exception:
-                    pass
-                last_len = len(line1_plain)
-
-        _print_status()
-
-        p_head = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            env={**os.environ, **(env or {})},
-            cwd=str(cwd) if cwd else None,
+    import asyncio
+
+    from . import engine
+
+    return asyncio.run(
+        engine.run_claude_and_detect(
+            args,
+            show_output,
+            env,
+            cwd,
+            prompt=prompt,
+            done_token=done_token,
+            row_index=row_index,
+            output_format=output_format,
+            row_updater=row_updater,
         )
-        assert p_head.stdout is not None
-        rc = 1
-        try:
-            for line in p_head.stdout:
-                if not done_seen and done_token and (done_token in line):
-                    done_seen = True
-                debug_log(f"line: {line.rstrip()}")
-                dirty = False
-                try:
-                    obj = json.loads(line)
-                    typ = str(obj.get("type", "")).strip()
-                    debug_log(f"parsed type={typ}")
-                    if typ in allowed:
-                        counts[typ] = counts.get(typ, 0) + 1
-                        dirty = True
-                    if dirty:
-                        spin_idx = (spin_idx + 1) % len(spinner)
-                        _print_status()
-                except Exception as e:
-                    debug_log(f"non-json or parse error: {e}")
-                    pass
-            p_head.wait()
-            rc = int(p_head.returncode or 0)
-        except KeyboardInterrupt:
-            aborted = True
-            try:
-                p_head.terminate()
-            except Exception:
-                pass
-            try:
-                p_head.wait(timeout=2)
-            except Exception:
-                pass
-        except Exception:
-            errored = True
-        finally:
-            try:
-                p_head.stdout.close()
-            except Exception:
-                pass
-        try:
-            marker = "✓" if (not aborted and not errored and rc == 0) else "❌"
-            _print_status(prefix_char=marker, final=True)
-        except Exception:
-            pass
-        return rc, done_seen
-
-
-def pr_number_from_url(url: str) -> int | None:
-    m = re.search(r"/pull/(\d+)", url)
-    return int(m.group(1)) if m else None
+    )
 
 
 def update_todo_with_pr(todo_path: Path, item: TodoItem, pr_url: str | None) -> bool:
-    if not todo_path.exists():
+    """Tick ``item`` in ``todo_path`` (with a link to ``pr_url``) and write it atomically."""
+    from .todo_doc import TodoDocument
+
+    doc = TodoDocument(todo_path)
+    if not doc.complete(item, pr_url):
         return False
-    text = todo_path.read_text(encoding="utf-8")
-    replacement_suffix = ""
-    if pr_url:
-        num = pr_number_from_url(pr_url)
-        if num is not None:
-            replacement_suffix = f" [#{num}]({pr_url})"
-        else:
-            replacement_suffix = f" ({pr_url})"
-    pattern = re.compile(rf"^- \[ \] {re.escape(item.title)}\s*$", re.MULTILINE)
-    new_text, n = pattern.subn(f"- [x] {item.title}{replacement_suffix}", text, count=1)
-    if n:
-        todo_path.write_text(new_text, encoding="utf-8")
-        return True
-    return False
+    doc.flush()
+    return True
 
 
 def git(*args: str, cwd: Path | None = None) -> str:
     kwargs: dict = {"text": True, "cwd": str(cwd) if cwd else None}
-    if not DEBUG_ENABLED:
+    if not core.DEBUG_ENABLED:
         kwargs["stderr"] = subprocess.DEVNULL
     return subprocess.check_output(["git", *args], **kwargs).strip()
 
 
 def git_call(args: list[str], cwd: Path | None = None) -> None:
     kwargs: dict = {"cwd": str(cwd) if cwd else None}
-    if not DEBUG_ENABLED:
+    if not core.DEBUG_ENABLED:
         kwargs["stdout"] = subprocess.DEVNULL
         kwargs["stderr"] = subprocess.DEVNULL
     subprocess.check_call(["git", *args], **kwargs)
@@ -550,27 +253,6 @@ def _warn_if_worktrees_not_ignored(root: Path, *, lang: str) -> None:
         pass
 
 
-def _list_tracked_changes(cwd: Path | None = None) -> set[str]:
-    changed: set[str] = set()
-    try:
-        out_wt = git("diff", "--name-only", cwd=cwd)
-        if out_wt:
-            for line in out_wt.splitlines():
-                if line.strip():
-                    changed.add(line.strip())
-    except Exception:
-        pass
-    try:
-        out_index = git("diff", "--cached", "--name-only", cwd=cwd)
-        if out_index:
-            for line in out_index.splitlines():
-                if line.strip():
-                    changed.add(line.strip())
-    except Exception:
-        pass
-    return changed
-
-
 def ensure_branch(
     base: str,
     name: str,
@@ -580,24 +262,11 @@ def ensure_branch(
     *,
     lang: str = "en",
 ) -> None:
-    git("fetch", "--all", cwd=cwd)
-
-    # Check for any local tracked changes before switching branches
-    changed = _list_tracked_changes(cwd=cwd)
-    if changed:
-        echo(tr("uncommitted_changes", lang), err=True)
-        for p in sorted(changed):
-            echo(f"  - {p}", err=True)
-        echo(tr("uncommitted_hint", lang), err=True)
-        echo(tr("uncommitted_hint2", lang), err=True)
-        raise typer.Exit(code=1)
+    import asyncio
 
-    git("checkout", base, cwd=cwd)
-    try:
-        git("checkout", "-b", name, cwd=cwd)
-    except subprocess.CalledProcessError:
-        git("checkout", name, cwd=cwd)
-        git("rebase", base, cwd=cwd)
+    from . import engine
+
+    asyncio.run(engine.ensure_branch(base, name, cwd=cwd, lang=lang))
 
 
 def _commit_and_push_filtered(
@@ -607,37 +276,13 @@ def _commit_and_push_filtered(
     include_paths: list[str] | None = None,  # kept for compatibility; ignored
     exclude_paths: list[str] | None = None,
 ) -> None:
-    # Stage everything, then unstage excluded paths if any
-    git_call(["add", "-A"], cwd=cwd)
-    if exclude_paths:
-        for p in exclude_paths:
-            try:
-                git_call(["reset", "HEAD", "--", p], cwd=cwd)
-            except Exception:
-                pass
+    import asyncio
 
-    # If nothing staged, we may still need to ensure the branch has an upstream
-    def _ensure_upstream() -> None:
-        try:
-            # Check if upstream exists
-            git("rev-parse", "--abbrev-ref", "@{u}", cwd=cwd)
-        except Exception:
-            # No upstream; push branch even without new commits
-            try:
-                git_call(["push", "-u", "origin", branch], cwd=cwd)
-            except Exception:
-                pass
-
-    try:
-        staged = git("diff", "--cached", "--name-only", cwd=cwd)
-    except Exception:
-        staged = ""
-    if not staged.strip():
-        _ensure_upstream()
-        return
+    from . import engine
 
-    git_call(["commit", "-m", message], cwd=cwd)
-    git_call(["push", "-u", "origin", branch], cwd=cwd)
+    asyncio.run(
+        engine.commit_and_push_filtered(message, branch, cwd=cwd, exclude_paths=exclude_paths)
+    )
 
 
 def commit_and_push(message: str, branch: str, cwd: Path | None = None):
@@ -646,131 +291,12 @@ def commit_and_push(message: str, branch: str, cwd: Path | None = None):
 
 
 def create_pr(title: str, body: str, base: str, head: str, cwd: Path | None = None) -> str | None:
-    """Create a PR using GitHub CLI and return the PR URL.
-    - Prefer JSON output if supported by the installed gh.
-    - Fall back to classic stdout parsing when --json is unavailable.
-    """
+    """Create a PR using GitHub CLI and return the PR URL (see ``engine.create_pr``)."""
+    import asyncio
 
-    def _kwargs_capture():
-        k: dict = {"text": True, "cwd": str(cwd) if cwd else None}
-        if not DEBUG_ENABLED:
-            k["stderr"] = subprocess.DEVNULL
-        return k
+    from . import engine
 
-    # Detect feature support
-    supports_json = False
-    try:
-        help_txt = subprocess.check_output(
-            ["gh", "pr", "create", "--help"], text=True, stderr=subprocess.DEVNULL
-        )
-        if "--json" in help_txt and "-q" in help_txt:
-            supports_json = True
-    except Exception:
-        pass
-
-    if supports_json:
-        try:
-            out = subprocess.check_output(
-                [
-                    "gh",
-                    "pr",
-                    "create",
-                    "--title",
-                    title,
-                    "--body",
-                    body,
-                    "--base",
-                    base,
-                    "--head",
-                    head,
-                    "--json",
-                    "url",
-                    "-q",
-                    ".url",
-                ],
-                **_kwargs_capture(),
-            ).strip()
-            if out:
-                return out
-        except Exception as e:
-            debug_log(f"gh pr create (json) failed: {e}")
-    else:
-        try:
-            # Classic mode: capture stdout and parse PR URL
-            out2 = subprocess.check_output(
-                [
-                    "gh",
-                    "pr",
-                    "create",
-                    "--title",
-                    title,
-                    "--body",
-                    body,
-                    "--base",
-                    base,
-                    "--head",
-                    head,
-                ],
-                **_kwargs_capture(),
-            )
-            # Try to find URL like https://github.com/.../pull/123
-            m = re.search(r"https?://[^\s]+/pull/\d+", out2)
-            if m:
-                return m.group(0)
-        except Exception as e2:
-            debug_log(f"gh pr create (classic) failed: {e2}")
-
-    # Fallback: try to get existing PR for this branch
-    try:
-        # Detect json support for `pr view`
-        supports_json_view = False
-        help_view = subprocess.check_output(
-            ["gh", "pr", "view", "--help"], text=True, stderr=subprocess.DEVNULL
-        )
-        if "--json" in help_view and "-q" in help_view:
-            supports_json_view = True
-        if supports_json_view:
-            outv = subprocess.check_output(
-                ["gh", "pr", "view", head, "--json", "url", "-q", ".url"],
-                **_kwargs_capture(),
-            ).strip()
-            if outv:
-                return outv
-        else:
-            outv2 = subprocess.check_output(["gh", "pr", "view", head], **_kwargs_capture())
-            m2 = re.search(r"https?://[^\s]+/pull/\d+", outv2)
-            if m2:
-                return m2.group(0)
-    except Exception as e3:
-        debug_log(f"gh pr view fallback failed: {e3}")
-        return None
-
-    # No URL could be determined
-    return None
-
-
-def slugify(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9-_]+", "-", text)
-    slug = re.sub(r"-+", "-", text).strip("-")
-    # Add 6 random alphanumeric chars for uniqueness
-    rand = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
-    return f"{slug}-{rand}"
-
-
-def load_config_toml(path: Path) -> dict:
-    if not path.exists():
-        return {}
-    try:
-        import tomllib  # Python 3.11+
-
-        return tomllib.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-
-# Serialize concurrent updates to the root TODO file
-TODO_UPDATE_LOCK = threading.Lock()
+    return asyncio.run(engine.create_pr(title, body, base, head, cwd=cwd))
 
 
 def process_one_todo(
@@ -783,82 +309,21 @@ def process_one_todo(
     row_index: int,
     row_updater: Callable[[int, str, str, bool], None] | None = None,
 ) -> str | None:
-    branch = branch_name or f"{cfg.git_branch_prefix}{slugify(item.title)}"
-    if not skip_branch_ensure:
-        ensure_branch(
-            cfg.git_base_branch,
-            branch,
-            cwd=cwd,
-            prefer_local_todo=True,
-            todo_relpath=cfg.input_path,
-            lang=cfg.lang,
-        )
+    import asyncio
 
-    children_bullets = "\n".join([f"- {c}" for c in item.children]) if item.children else "- (none)"
-    base_prompt = cfg.headless_prompt_template.format(
-        title=item.title,
-        children_bullets=children_bullets,
-        done_token=cfg.task_done_message,
-    )
+    from . import engine
 
-    # Run Claude and bounce up to max_keep_asking times if DONE token not seen
-    attempts = 0
-    done_seen = False
-    prompt_current = base_prompt
-    while True:
-        try:
-            rc, seen = run_claude_and_detect(
-                cfg.claude_args,
-                cfg.show_claude_output,
-                cwd=cwd or Path.cwd(),
-                prompt=prompt_current,
-                done_token=cfg.task_done_message,
-                row_index=row_index,
-                output_format=cfg.headless_output_format,
-                row_updater=row_updater,
-            )
-        except FileNotFoundError:
-            echo(tr("claude_not_found", cfg.lang), err=True)
-            raise typer.Exit(code=1) from None
-        if rc != 0:
-            echo(tr("claude_failed", cfg.lang, code=rc), err=True)
-            raise typer.Exit(code=1)
-        done_seen = seen or done_seen
-        if done_seen:
-            break
-        if attempts >= max(0, int(cfg.max_keep_asking)):
-            break
-        # Bounce with follow-up instruction (Japanese)
-        prompt_current = f"続けて。実装が終了し終わっていたら、{cfg.task_done_message}と返して。"
-        attempts += 1
-
-    commit_msg = f"{cfg.git_commit_message_prefix}{item.title}"
-    _commit_and_push_filtered(
-        commit_msg,
-        branch,
-        cwd=cwd,
-        exclude_paths=[cfg.input_path],
+    return asyncio.run(
+        engine.process_one_todo(
+            item,
+            cfg,
+            cwd,
+            skip_branch_ensure=skip_branch_ensure,
+            branch_name=branch_name,
+            row_index=row_index,
+            row_updater=row_updater,
+        )
     )
-    pr_title = f"{cfg.github_pr_title_prefix}{item.title}"
-    pr_body = cfg.github_pr_body_template.format(todo_item=item.title)
-    pr_url = create_pr(pr_title, pr_body, cfg.git_base_branch, branch, cwd=cwd)
-    if pr_url:
-        if cfg.pr_urls is not None:
-            cfg.pr_urls.append(pr_url)
-    else:
-        if cfg.pr_urls is not None:
-            cfg.pr_urls.append("")
-
-    todo_path = (cwd or Path.cwd()) / cfg.input_path
-    if update_todo_with_pr(todo_path, item, pr_url):
-        pass
-
-    return pr_url
-
-
-# Registry to track worktrees created during this run
-CREATED_WORKTREES: list[Path] = []
-CREATED_WORKTREES_LOCK = threading.Lock()
 
 
 def _cleanup_created_worktrees(root: Path) -> None:
@@ -899,81 +364,111 @@ def process_in_worktree(
     row_updater: Callable[[int, str, str, bool], None] | None = None,
     row_index: int,
 ) -> None:
-    worktrees_dir = root / ".worktrees"
-    worktrees_dir.mkdir(exist_ok=True)
+    import asyncio
 
-    # Use a single slug for both branch and worktree path to avoid mismatch
-    slug = slugify(item.title)
-    branch = f"{cfg.git_branch_prefix}{slug}"
-    wt_path = worktrees_dir / slug
+    from . import engine
 
-    # Remove any existing directory silently if it is a registered worktree; suppress noisy errors
-    try:
-        subprocess.run(
-            ["git", "worktree", "remove", "-f", str(wt_path)],
-            cwd=root,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
-    except Exception:
-        pass
+    asyncio.run(
+        engine.process_in_worktree(root, item, cfg, row_updater=row_updater, row_index=row_index)
+    )
 
-    git("fetch", cwd=root)
-    # Create the worktree bound to branch based on base branch tip
-    git("worktree", "add", "-B", branch, str(wt_path), cfg.git_base_branch, cwd=root)
 
-    # Register created worktree for cleanup
+def _write_trace(root: Path, cfg: Config) -> None:
+    tracer = tracing.stop()
+    if tracer is None or not cfg.trace_path:
+        return
+    path = root / cfg.trace_path
     try:
-        with CREATED_WORKTREES_LOCK:
-            CREATED_WORKTREES.append(wt_path)
-    except Exception:
-        pass
+        tracer.write(path)
+        echo(color_info(tr("trace_written", cfg.lang, path=str(path))))
+    except OSError as e:
+        echo(color_warn(tr("trace_write_failed", cfg.lang, path=str(path), error=e)), err=True)
 
-    try:
-        # Do NOT switch to base/main inside the worktree; it's already on the new branch
-        pr_url = process_one_todo(
-            item,
-            cfg,
-            cwd=wt_path,
-            skip_branch_ensure=True,
-            branch_name=branch,
-            row_updater=row_updater,
-            row_index=row_index,
-        )
 
-        # After worktree completes, update the ROOT TODO.md with a check and PR URL
-        try:
-            with TODO_UPDATE_LOCK:
-                update_todo_with_pr(root / cfg.input_path, item, pr_url)
-        except Exception:
-            # Best-effort; ignore errors updating the shared TODO
-            pass
-    finally:
-        # Always attempt to remove the worktree
-        try:
-            subprocess.run(
-                ["git", "worktree", "remove", "-f", str(wt_path)],
-                cwd=root,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=False,
-            )
-        except Exception:
-            pass
-        # Unregister
-        try:
-            with CREATED_WORKTREES_LOCK:
-                if wt_path in CREATED_WORKTREES:
-                    CREATED_WORKTREES.remove(wt_path)
-        except Exception:
-            pass
+def _summary_data(cfg: Config) -> dict:
+    return {
+        "items": [u.to_dict() for u in cfg.usage or []],
+        "total": run_total(cfg.usage).to_dict(),
+        "pr_urls": [u for u in cfg.pr_urls or [] if u],
+        "push_failures": cfg.push_failures or [],
+        "timed_out": cfg.timed_out or [],
+        "budget_skipped": cfg.budget_skipped or [],
+        "blocked": cfg.blocked or [],
+    }
+
+
+def _write_summary(root: Path, cfg: Config, repos: dict[str, Config] | None = None) -> None:
+    """Write the machine-readable run summary (``--summary-json``).
+
+    With ``repos`` (``--manifest``), each repository gets its own section.
+    """
+    import json
+
+    if not cfg.summary_path:
+        return
+    if repos is None:
+        data = _summary_data(cfg)
+    else:
+        data = {
+            "repos": {name: _summary_data(repo_cfg) for name, repo_cfg in repos.items()},
+            "total": run_total(cfg.usage).to_dict(),
+        }
+    path = root / cfg.summary_path
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    except OSError as e:
+        echo(color_warn(tr("summary_write_failed", cfg.lang, path=str(path), error=e)), err=True)
 
 
 def _print_final_report(cfg: Config) -> None:
     # Summary header
     echo("")
     echo(color_header("=== Summary Report ==="))
+    _print_report_body(cfg)
+
+
+def _print_combined_report(cfg: Config, repos: dict[str, Config], failed: list[str]) -> None:
+    """Final report of a ``--manifest`` run: one section per repository, then totals."""
+    echo("")
+    echo(color_header("=== Summary Report ==="))
+    for name, repo_cfg in repos.items():
+        echo(color_header(f"--- {name} ---"))
+        if name in failed:
+            echo(color_warn("Stopped by an error (see above)."))
+        _print_report_body(repo_cfg)
+    if cfg.usage:
+        echo(color_info(f"All repositories: {run_total(cfg.usage).describe()}"))
+
+
+def _print_report_body(cfg: Config) -> None:
+    if cfg.push_failures:
+        echo(color_warn("Push failed (committed locally, no PR created):"))
+        for branch in cfg.push_failures:
+            echo(f"  - {branch}")
+
+    if cfg.timed_out:
+        echo(color_warn("Timed out (partial work committed locally, item left unchecked):"))
+        for name in cfg.timed_out:
+            echo(f"  - {name}")
+
+    if cfg.blocked:
+        echo(color_warn("Not started (prerequisite did not finish):"))
+        for name in cfg.blocked:
+            echo(f"  - {name}")
+
+    if cfg.budget_skipped:
+        echo(color_warn(f"Not started (cost cap ${cfg.max_cost_usd:g} reached):"))
+        for name in cfg.budget_skipped:
+            echo(f"  - {name}")
+
+    if cfg.usage:
+        echo(color_info("Claude usage:"))
+        for item_usage in cfg.usage:
+            n = len(item_usage.attempts)
+            echo(f"  - {item_usage.title} ({n} attempt{'s' if n != 1 else ''})")
+            echo(f"      {item_usage.total.describe()}")
+        echo(f"  Total: {run_total(cfg.usage).describe()}")
 
     if not cfg.pr_urls:
         echo(color_warn("No pull requests were created."))
@@ -988,9 +483,92 @@ def _print_final_report(cfg: Config) -> None:
     echo(color_success("Done."))
 
 
+def _run_manifest(root: Path, manifest: Path, cfg: Config) -> None:
+    """Run the open items of every repository in ``manifest`` on one worker pool."""
+    import asyncio
+
+    from . import engine
+    from .manifest import ManifestError, load_manifest, repo_config
+
+    try:
+        specs = load_manifest(manifest)
+    except ManifestError as e:
+        echo(tr("manifest_invalid", cfg.lang, error=e), err=True)
+        raise typer.Exit(code=1) from None
+
+    runs: list[tuple[Path, list[TodoItem], Config]] = []
+    for spec in specs:
+        repo_cfg = repo_config(cfg, spec)
+        todo = spec.path / repo_cfg.input_path
+        if not is_git_ignored(todo, cwd=spec.path):
+            echo(tr("todo_must_be_ignored", cfg.lang, path=str(todo)), err=True)
+            raise typer.Exit(code=1)
+        items = parse_todo_markdown(todo.read_text(encoding="utf-8")) if todo.exists() else []
+        if not items:
+            echo(tr("repo_no_todo", cfg.lang, repo=str(spec.path)))
+            continue
+        _warn_if_worktrees_not_ignored(spec.path, lang=cfg.lang)
+        runs.append((spec.path, items, repo_cfg))
+    if not runs:
+        echo(tr("no_todo", cfg.lang))
+        raise typer.Exit(code=0)
+
+    workers = max(1, int(cfg.worktree_parallel_max_semaphore))
+    echo(tr("running_repos", cfg.lang, repos=len(runs), workers=workers))
+    if cfg.trace_path:
+        tracing.start()
+    failed: list[str] = []
+    try:
+        failed = asyncio.run(engine.run_repos(runs, cfg))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for repo, _, repo_cfg in runs:
+            _cleanup_created_worktrees(repo)
+            try:
+                git("checkout", repo_cfg.git_base_branch, cwd=repo)
+            except Exception:
+                pass
+        _write_trace(root, cfg)
+    repos = {str(repo): repo_cfg for repo, _, repo_cfg in runs}
+    _write_summary(root, cfg, repos)
+    _print_combined_report(cfg, repos, failed)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+# `run` and `watch` share one signature; these options only apply to one of them.
+# watch always runs items in worktrees, so --worktree-parallel would change nothing.
+_RUN_ONLY_OPTIONS = {
+    "manifest": "--manifest",
+    "doctor": "--doctor",
+    "worktree_parallel": "--worktree-parallel",
+}
+_WATCH_ONLY_OPTIONS = {"watch_interval": "--watch-interval"}
+
+
+def _reject_foreign_options(ctx: typer.Context) -> None:
+    """Refuse options the invoked command would silently ignore (e.g. ``watch --manifest``)."""
+    foreign = _RUN_ONLY_OPTIONS if ctx.info_name == "watch" else _WATCH_ONLY_OPTIONS
+    for name, flag in foreign.items():
+        source = ctx.get_parameter_source(name)
+        # By name: newer typer vendors click, so its ParameterSource is not click's
+        if source is not None and source.name == "COMMANDLINE":
+            raise typer.BadParameter(f"not supported by {ctx.info_name}", param_hint=f"'{flag}'")
+
+
 @APP.command("run")
 def run(
-    cooldown: int = typer.Option(0, "--cooldown", "-c"),
+    ctx: typer.Context,
+    cooldown: int = typer.Option(
+        0, "--cooldown", "-c", help="Minimum seconds between claude launches (all workers)"
+    ),
+    launches_per_minute: float = typer.Option(
+        0, "--launches-per-minute", help="Steady budget of claude launches per minute (0: off)"
+    ),
+    rate_limit_retries: int = typer.Option(
+        5, "--rate-limit-retries", help="Retries of a rate-limited claude run after backoff"
+    ),
     git_branch_prefix: str = typer.Option("todo/", "--git-branch-prefix", "-b"),
     git_commit_message_prefix: str = typer.Option("feat: ", "--git-commit-message-prefix", "-m"),
     git_base_branch: str = typer.Option("main", "--git-base-branch", "-g"),
@@ -1000,8 +578,24 @@ def run(
     ),
     config_path: str = typer.Option(".claude-manager.toml", "--config", "-f"),
     input_path: str = typer.Option("TODO.md", "--input", "-i"),
+    manifest: str = typer.Option(
+        "",
+        "--manifest",
+        help="TOML list of repositories to run together on one worker pool (-s workers)",
+    ),
     claude_args: str = typer.Option("--dangerously-skip-permissions", "--claude-args"),
     max_keep_asking: int = typer.Option(3, "--max-keep-asking"),
+    claude_timeout: float = typer.Option(
+        0, "--claude-timeout", help="Max seconds of claude time per item (0: no limit)"
+    ),
+    claude_stall_timeout: float = typer.Option(
+        0, "--claude-stall-timeout", help="Stop claude after this many silent seconds (0: off)"
+    ),
+    bounce_resume: bool = typer.Option(
+        True,
+        "--bounce-resume/--no-bounce-resume",
+        help="Resume the previous claude session when asking it to continue",
+    ),
     task_done_message: str = typer.Option("CLAUDE_MANAGER_DONE", "--task-done-message"),
     show_claude_output: bool = typer.Option(False, "--show-claude-output"),
     doctor: bool = typer.Option(False, "--doctor", "-D"),
@@ -1009,6 +603,71 @@ def run(
     worktree_parallel_max_semaphore: int = typer.Option(
         1, "--worktree-parallel-max-semaphore", "-s"
     ),
+    batch_push: bool = typer.Option(
+        False, "--batch-push", help="Push all finished branches in one git push at the end"
+    ),
+    worktree_reuse: bool = typer.Option(
+        True,
+        "--worktree-reuse/--no-worktree-reuse",
+        help="Reuse one worktree per worker slot across items",
+    ),
+    adaptive_concurrency: bool = typer.Option(
+        False,
+        "--adaptive-concurrency",
+        help="Adjust workers between --min-workers and -s by load, memory, disk and claude errors",
+    ),
+    min_workers: int = typer.Option(1, "--min-workers"),
+    watch_interval: float = typer.Option(
+        1.0, "--watch-interval", help="watch: seconds between checks of the TODO file"
+    ),
+    schedule: str = typer.Option(
+        "file",
+        "--schedule",
+        help="Item order: file, longest-first or shortest-first (estimated from past runs)",
+    ),
+    stack_dependents: bool = typer.Option(
+        False,
+        "--stack-dependents",
+        help="Base items with an (after: ...) prerequisite on its branch and PR",
+    ),
+    worktree_sparse: bool = typer.Option(
+        False, "--worktree-sparse", help="Create worktrees with a sparse-checkout cone"
+    ),
+    sparse_paths: str = typer.Option(
+        "", "--sparse-paths", help="Comma-separated default sparse-checkout directories"
+    ),
+    partial_clone_filter: str = typer.Option(
+        "", "--partial-clone-filter", help="Object filter for partial clone, e.g. blob:none"
+    ),
+    partial_clone_convert: bool = typer.Option(
+        False,
+        "--partial-clone-convert",
+        help="Let --partial-clone-filter make the repo a partial clone (edits .git/config)",
+    ),
+    fetch_ttl: float = typer.Option(
+        300.0, "--fetch-ttl", help="Seconds before a run-wide git fetch is repeated (<0: never)"
+    ),
+    journal: bool = typer.Option(
+        True, "--journal/--no-journal", help="Record item phases to resume interrupted runs"
+    ),
+    journal_path: str = typer.Option(".claude-manager/state.jsonl", "--journal-path"),
+    transcripts: bool = typer.Option(
+        True,
+        "--transcripts/--no-transcripts",
+        help="Keep every claude attempt's output, compressed, under .claude-manager/transcripts",
+    ),
+    transcript_codec: str = typer.Option(
+        "gzip", "--transcript-codec", help="Transcript compression: gzip or zstd"
+    ),
+    trace_path: str = typer.Option(
+        "", "--trace", help="Write per-phase timings as Chrome trace JSON (open in Perfetto)"
+    ),
+    max_cost_usd: float = typer.Option(
+        0, "--max-cost", help="Stop starting new items once claude cost reaches this USD amount"
+    ),
+    summary_path: str = typer.Option(
+        "", "--summary-json", help="Write per-item token and cost totals as JSON"
+    ),
     lang: str = typer.Option("en", "--lang", "-L"),
     i18n_path: str = typer.Option(
         ".claude-manager.i18n.toml", "--i18n-path", help="Path to i18n TOML file"
@@ -1027,8 +686,11 @@ def run(
     # Debug
     debug: bool = typer.Option(False, "--debug", help="Enable debug logs to stderr"),
 ):
+    _reject_foreign_options(ctx)
     cfg = Config(
         cooldown=cooldown,
+        launches_per_minute=launches_per_minute,
+        rate_limit_retries=rate_limit_retries,
         git_branch_prefix=git_branch_prefix,
         git_commit_message_prefix=git_commit_message_prefix,
         git_base_branch=git_base_branch,
@@ -1038,15 +700,42 @@ def run(
         input_path=input_path,
         claude_args=claude_args,
         max_keep_asking=max_keep_asking,
+        bounce_resume=bounce_resume,
+        claude_timeout=claude_timeout,
+        claude_stall_timeout=claude_stall_timeout,
         task_done_message=task_done_message,
         show_claude_output=show_claude_output,
         doctor=doctor,
         worktree_parallel=worktree_parallel,
         worktree_parallel_max_semaphore=worktree_parallel_max_semaphore,
+        batch_push=batch_push,
+        worktree_reuse=worktree_reuse,
+        adaptive_concurrency=adaptive_concurrency,
+        min_workers=min_workers,
+        watch_interval=watch_interval,
+        schedule=schedule,
+        stack_dependents=stack_dependents,
+        worktree_sparse=worktree_sparse,
+        sparse_paths=split_paths(sparse_paths) or None,
+        partial_clone_filter=partial_clone_filter,
+        partial_clone_convert=partial_clone_convert,
+        fetch_ttl=fetch_ttl,
+        journal=journal,
+        journal_path=journal_path,
+        transcripts=transcripts,
+        transcript_codec=transcript_codec,
+        trace_path=trace_path,
+        max_cost_usd=max_cost_usd,
+        summary_path=summary_path,
         lang=lang,
         i18n_path=i18n_path,
         headless_output_format=headless_output_format,
         pr_urls=[],
+        push_failures=[],
+        timed_out=[],
+        usage=[],
+        budget_skipped=[],
+        blocked=[],
         color=not no_color,
     )
     if headless_prompt_template:
@@ -1067,9 +756,8 @@ def run(
     set_i18n(root / cfg.i18n_path)
 
     # set global color/debug flags considering TTY as well
-    global COLOR_ENABLED, DEBUG_ENABLED
-    COLOR_ENABLED = bool(cfg.color) and sys.stdout.isatty()
-    DEBUG_ENABLED = bool(debug)
+    core.COLOR_ENABLED = bool(cfg.color) and sys.stdout.isatty()
+    core.DEBUG_ENABLED = bool(debug)
 
     if doctor:
         echo(tr("doctor_validating", cfg.lang))
@@ -1122,56 +810,56 @@ def run(
             echo(tr("doctor_failed", cfg.lang), err=True)
             raise typer.Exit(code=1)
 
+    if manifest:
+        _run_manifest(root, Path(manifest), cfg)
+        return
+
     # Ensure TODO file is ignored before proceeding
     todo_abspath = root / cfg.input_path
     if not is_git_ignored(todo_abspath, cwd=root):
         echo(tr("todo_must_be_ignored", cfg.lang, path=str(todo_abspath)), err=True)
         raise typer.Exit(code=1)
 
+    # `watch` is this command under another name: it keeps going and always uses worktrees
+    watching = ctx.info_name == "watch"
     md = (
         (root / cfg.input_path).read_text(encoding="utf-8")
         if (root / cfg.input_path).exists()
         else ""
     )
     items = parse_todo_markdown(md)
-    if not items:
+    if not items and not watching:
         echo(tr("no_todo", cfg.lang))
         raise typer.Exit(code=0)
 
-    if cfg.worktree_parallel:
+    import asyncio
+
+    from . import engine
+
+    if cfg.trace_path:
+        tracing.start()
+
+    if cfg.worktree_parallel or watching:
         max_workers = max(1, int(cfg.worktree_parallel_max_semaphore))
-        echo(tr("running_parallel", cfg.lang, workers=max_workers))
+        live = None
+        if watching:
+            from .watch import run_watch
+
+            echo(tr("watch_started", cfg.lang, path=str(todo_abspath), workers=max_workers))
+            coro = run_watch(root, cfg)
+        else:
+            echo(tr("running_parallel", cfg.lang, workers=max_workers))
+            live = LiveRows(len(items), lines_per_row=1) if sys.stderr.isatty() else None
+            coro = engine.run_worktree_parallel(
+                root, items, cfg, row_updater=(live.update if live else None)
+            )
         _warn_if_worktrees_not_ignored(root, lang=cfg.lang)
-        live = LiveRows(len(items), lines_per_row=1) if sys.stderr.isatty() else None
-        ex = ThreadPoolExecutor(max_workers=max_workers)
         try:
-            futures = [
-                ex.submit(
-                    process_in_worktree,
-                    root,
-                    item,
-                    cfg,
-                    row_updater=(live.update if live else None),
-                    row_index=i,
-                )
-                for i, item in enumerate(items)
-            ]
-            for fut in as_completed(futures):
-                exc = fut.exception()
-                if exc:
-                    raise exc
+            asyncio.run(coro)
         except KeyboardInterrupt:
-            # Cancel remaining futures and cleanup worktrees
-            try:
-                for fut in futures:
-                    fut.cancel()
-            except Exception:
-                pass
+            # Running items were cancelled by the engine; fall through to cleanup
+            pass
         finally:
-            try:
-                ex.shutdown(wait=False, cancel_futures=True)
-            except Exception:
-                pass
             if live:
                 live.finish()
             # Best-effort cleanup of any remaining worktrees
@@ -1180,14 +868,15 @@ def run(
                 git("checkout", cfg.git_base_branch, cwd=root)
             except Exception:
                 pass
+            _write_trace(root, cfg)
+        _write_summary(root, cfg)
         _print_final_report(cfg)
         return
 
-    for idx, item in enumerate(items):
-        echo(color_info(tr("processing", cfg.lang, title=item.title)))
-        _ = process_one_todo(item, cfg, cwd=root, row_index=idx)
-        if idx < len(items) - 1 and cfg.cooldown > 0:
-            time.sleep(cfg.cooldown)
+    try:
+        asyncio.run(engine.run_sequential(root, items, cfg))
+    finally:
+        _write_trace(root, cfg)
 
     # After sequential run, return to base branch (best-effort)
     try:
@@ -1196,8 +885,14 @@ def run(
         pass
 
     # After sequential run, print final report
+    _write_summary(root, cfg)
     _print_final_report(cfg)
 
 
+APP.command(
+    "watch", help="Like run, but keep watching the TODO file and start new items as they appear"
+)(run)
+
+
 def main():  # entry point
     APP()
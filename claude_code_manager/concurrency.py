@@ -0,0 +1,179 @@
+"""Adaptive worker count for worktree-parallel mode.
+
+:class:`ConcurrencyController` samples load average, available memory and free disk
+every few seconds and listens for error/overload signals from claude runs. It
+resizes an :class:`AdjustableSemaphore` between ``min_workers`` and ``max_workers``:
+overload and rate-limit signals halve the limit, resource pressure or errors lower it
+by one, and a healthy system with queued items raises it by one. Lowering the limit
+never interrupts running items; it only delays new ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import signals
+from .core import debug_log
+
+
+class AdjustableSemaphore:
+    """``asyncio.Semaphore`` whose limit can change while it is in use."""
+
+    def __init__(self, limit: int):
+        self._limit = max(1, int(limit))
+        self._active = 0
+        self._waiting = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def set_limit(self, limit: int) -> None:
+        async with self._cond:
+            self._limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            self._waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self._active < self._limit)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    async def __aenter__(self) -> AdjustableSemaphore:
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.release()
+
+
+@dataclass
+class SystemSample:
+    load_per_cpu: float | None = None
+    free_memory_mb: float | None = None
+    free_disk_mb: float | None = None
+
+
+def _available_memory_mb() -> float | None:
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def sample_system(root: Path) -> SystemSample:
+    """Current 1-minute load per CPU, available memory and free disk under ``root``.
+
+    Values the platform cannot report are None and are ignored by the controller.
+    """
+    sample = SystemSample()
+    try:
+        sample.load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        pass
+    sample.free_memory_mb = _available_memory_mb()
+    try:
+        sample.free_disk_mb = shutil.disk_usage(root).free / (1024 * 1024)
+    except OSError:
+        pass
+    return sample
+
+
+class ConcurrencyController:
+    def __init__(
+        self,
+        sem: AdjustableSemaphore,
+        *,
+        min_workers: int,
+        max_workers: int,
+        max_load_per_cpu: float = 1.5,
+        min_free_memory_mb: float = 1024,
+        min_free_disk_mb: float = 2048,
+        interval: float = 5.0,
+        probe: Callable[[], SystemSample] | None = None,
+    ):
+        self.sem = sem
+        self.min_workers = max(1, int(min_workers))
+        self.max_workers = max(self.min_workers, int(max_workers))
+        self.max_load_per_cpu = max_load_per_cpu
+        self.min_free_memory_mb = min_free_memory_mb
+        self.min_free_disk_mb = min_free_disk_mb
+        self.interval = interval
+        self.probe = probe or (lambda: sample_system(Path.cwd()))
+        # Signals received since the last step, by kind
+        self.pending_signals: dict[str, int] = {}
+        # (monotonic time, new limit, reason) for every change
+        self.history: list[tuple[float, int, str]] = []
+
+    def note_signal(self, kind: str) -> None:
+        self.pending_signals[kind] = self.pending_signals.get(kind, 0) + 1
+
+    def pressure(self, sample: SystemSample) -> str | None:
+        """Name of the resource that is short, if any."""
+        if sample.load_per_cpu is not None and sample.load_per_cpu > self.max_load_per_cpu:
+            return f"load {sample.load_per_cpu:.2f}/cpu"
+        if sample.free_memory_mb is not None and sample.free_memory_mb < self.min_free_memory_mb:
+            return f"memory {sample.free_memory_mb:.0f} MB free"
+        if sample.free_disk_mb is not None and sample.free_disk_mb < self.min_free_disk_mb:
+            return f"disk {sample.free_disk_mb:.0f} MB free"
+        return None
+
+    def decide(self, sample: SystemSample) -> tuple[int, str]:
+        """New limit (and why) for the current limit, ``sample`` and pending signals."""
+        limit = self.sem.limit
+        sigs, self.pending_signals = self.pending_signals, {}
+        if sigs.get(signals.OVERLOADED) or sigs.get(signals.RATE_LIMIT):
+            return max(self.min_workers, limit // 2), "claude overloaded/rate limited"
+        short = self.pressure(sample)
+        if short is not None:
+            return max(self.min_workers, limit - 1), short
+        if sigs.get(signals.ERROR):
+            return max(self.min_workers, limit - 1), "claude errors"
+        if self.sem.waiting and self.sem.active >= limit:
+            return min(self.max_workers, limit + 1), "healthy with queued items"
+        return limit, "steady"
+
+    async def step(self) -> None:
+        sample = await asyncio.to_thread(self.probe)
+        limit, reason = self.decide(sample)
+        if limit != self.sem.limit:
+            debug_log(f"concurrency {self.sem.limit} -> {limit}: {reason}")
+            self.history.append((time.monotonic(), limit, reason))
+            await self.sem.set_limit(limit)
+
+    async def run(self) -> None:
+        """Adjust the limit every ``interval`` seconds until cancelled."""
+        unsubscribe = signals.subscribe(self.note_signal)
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.step()
+        finally:
+            unsubscribe()
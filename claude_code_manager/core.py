@@ -0,0 +1,351 @@
+"""Configuration, TODO items, i18n and console output shared by the CLI and the engine.
+
+Kept free of typer and asyncio (and of anything slow to import) so that the command
+line starts quickly; :mod:`.cli` re-exports these names.
+"""
+
+from __future__ import annotations
+
+import re
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .todo_tree import TodoTree
+    from .usage import ItemUsage
+
+# i18n loader and translator
+I18N_CACHE: dict[str, dict[str, str]] = {}
+
+
+def load_i18n_toml(path: Path) -> dict[str, dict[str, str]]:
+    try:
+        import tomllib
+
+        if not path.exists():
+            return {}
+        data = tomllib.loads(path.read_text(encoding="utf-8"))
+        blocks = data.get("i18n") if isinstance(data.get("i18n"), dict) else data
+        result: dict[str, dict[str, str]] = {}
+        for lang, mapping in (blocks or {}).items():
+            if isinstance(mapping, dict):
+                # Ensure values are strings
+                result[lang] = {str(k): str(v) for k, v in mapping.items()}
+        return result
+    except Exception:
+        return {}
+
+
+def set_i18n(path: Path) -> None:
+    global I18N_CACHE
+    I18N_CACHE = load_i18n_toml(path)
+
+
+def tr(key: str, lang: str, **kwargs) -> str:
+    # Lookup order: selected lang -> en -> key
+    base = I18N_CACHE.get(lang) or {}
+    s = base.get(key) or (I18N_CACHE.get("en") or {}).get(key) or key
+    try:
+        return s.format(**kwargs)
+    except Exception:
+        return s
+
+
+def echo(msg: str, err: bool = False):
+    stream = sys.stderr if err else sys.stdout
+    # Colorize errors in red when enabled
+    if err:
+        try:
+            if COLOR_ENABLED:
+                msg = f"\x1b[31m{msg}\x1b[0m"
+        except NameError:
+            # COLOR_ENABLED not initialized yet
+            pass
+    print(msg, file=stream, flush=True)
+
+
+# --- simple color helpers ---
+COLOR_ENABLED = True  # will be set based on CLI option and TTY
+DEBUG_ENABLED = False  # set from CLI
+
+
+def _ansi(code: str, s: str) -> str:
+    return f"\x1b[{code}m{s}\x1b[0m" if COLOR_ENABLED else s
+
+
+def color_info(s: str) -> str:
+    return _ansi("36", s)  # cyan
+
+
+def color_success(s: str) -> str:
+    return _ansi("32", s)  # green
+
+
+def color_warn(s: str) -> str:
+    return _ansi("33", s)  # yellow
+
+
+def color_header(s: str) -> str:
+    return _ansi("1;36", s)  # bold cyan
+
+
+def color_debug(s: str) -> str:
+    return _ansi("35", s)  # magenta
+
+
+def debug_log(msg: str) -> None:
+    if DEBUG_ENABLED:
+        try:
+            sys.stderr.write(color_debug(f"[debug] {msg}\n"))
+            sys.stderr.flush()
+        except Exception:
+            pass
+
+
+_TERMINAL_WIDTH: tuple[float, int] | None = None
+
+
+def terminal_width(max_age: float = 1.0) -> int:
+    """Terminal column count, re-queried at most once per ``max_age`` seconds."""
+    global _TERMINAL_WIDTH
+    now = time.monotonic()
+    if _TERMINAL_WIDTH is None or now - _TERMINAL_WIDTH[0] > max_age:
+        try:
+            width = max(20, int(shutil.get_terminal_size((80, 24)).columns))
+        except Exception:
+            width = 80
+        _TERMINAL_WIDTH = (now, width)
+    return _TERMINAL_WIDTH[1]
+
+
+@dataclass
+class Config:
+    # Minimum seconds between claude launches, across all workers
+    cooldown: int = 0
+    # Steady claude launch budget shared by all workers (0: unlimited)
+    launches_per_minute: float = 0
+    launch_burst: int = 1  # launches allowed back to back before the budget applies
+    # Rate-limit/overload backoff: pause all launches base*2^n seconds (jittered, capped)
+    backoff_base: float = 10.0
+    backoff_max: float = 300.0
+    rate_limit_retries: int = 5  # retries of a rate-limited claude run before failing
+    git_branch_prefix: str = "todo/"
+    git_commit_message_prefix: str = "feat: "
+    git_base_branch: str = "main"
+    github_pr_title_prefix: str = "feat: "
+    github_pr_body_template: str = "Implementing TODO item: {todo_item}"
+    config_path: str = ".claude-manager.toml"
+    input_path: str = "TODO.md"
+    claude_args: str = ""
+    max_keep_asking: int = 3
+    # Seconds per item across all attempts / without any claude output (0: no limit)
+    claude_timeout: float = 0
+    claude_stall_timeout: float = 0
+    # Send follow-up prompts with --resume <session_id> of the previous attempt
+    bounce_resume: bool = True
+    task_done_message: str = "CLAUDE_MANAGER_DONE"
+    show_claude_output: bool = False
+    doctor: bool = False
+    worktree_parallel: bool = False
+    worktree_parallel_max_semaphore: int = 1
+    # Seconds a run-wide `git fetch --all` stays fresh (<0: fetch once per run)
+    fetch_ttl: float = 300.0
+    # Sparse worktrees: create with --no-checkout and apply a cone per item
+    worktree_sparse: bool = False
+    sparse_paths: list[str] | None = None  # default cone; "(sparse: ...)" overrides it
+    # e.g. "blob:none": turn the repo into a partial clone so blobs load on demand
+    partial_clone_filter: str = ""
+    # Allow that conversion; it rewrites .git/config (see `partial_clone_revert`)
+    partial_clone_convert: bool = False
+    # Commit per item, then push all branches in one `git push` before opening PRs
+    batch_push: bool = False
+    # Reuse one worktree per worker slot instead of adding/removing one per item
+    worktree_reuse: bool = True
+    # Resize the worker pool at runtime between min_workers and the semaphore size
+    adaptive_concurrency: bool = False
+    min_workers: int = 1
+    max_load_per_cpu: float = 1.5  # 1-minute load average divided by CPU count
+    min_free_memory_mb: float = 1024
+    min_free_disk_mb: float = 2048
+    adapt_interval: float = 5.0  # seconds between adjustments
+    # `watch`: seconds between checks of the TODO file for new items
+    watch_interval: float = 1.0
+    # Item order: "file", "longest-first" or "shortest-first" (by estimated duration)
+    schedule: str = "file"
+    # Finished items' durations, used to estimate similar items (empty: not recorded)
+    history_path: str = ".claude-manager/durations.jsonl"
+    # Base an item with one "(after: ...)" prerequisite on that item's branch (stacked PRs)
+    stack_dependents: bool = False
+    # Append-only phase log; a rerun after a crash skips phases already completed
+    journal: bool = True
+    journal_path: str = ".claude-manager/state.jsonl"
+    # Keep each claude attempt's raw output, compressed, under transcript_dir/<run>/
+    transcripts: bool = True
+    transcript_dir: str = ".claude-manager/transcripts"
+    transcript_codec: str = "gzip"  # or "zstd" (Python 3.14+ or the zstandard package)
+    # Output waiting to be compressed; lines beyond this are dropped and counted
+    transcript_buffer_mb: float = 8.0
+    transcript_keep: int = 20  # runs kept; older ones are deleted (0: keep all)
+    # Write a Chrome trace-event JSON of per-phase spans here (empty: no tracing)
+    trace_path: str = ""
+    # Stop starting new items once reported claude cost reaches this (0: no cap)
+    max_cost_usd: float = 0
+    # Write per-item token/cost totals as JSON here (empty: report only)
+    summary_path: str = ""
+    lang: str = "en"
+    i18n_path: str = ".claude-manager.i18n.toml"
+    # Headless mode (always used)
+    headless_prompt_template: str = (
+        "Implement the following TODO item in this repository.\n\n"
+        "Title: {title}\n"
+        "Subtasks:\n{children_bullets}\n\n"
+        "Please apply necessary changes. When finished, output the token: {done_token}\n"
+    )
+    headless_output_format: str = "stream-json"
+    # Reporting
+    pr_urls: list[str] | None = None  # filled during run
+    push_failures: list[str] | None = None  # branches whose batched push failed
+    timed_out: list[str] | None = None  # items stopped by claude_timeout/stall timeout
+    usage: list[ItemUsage] | None = None  # claude usage per item, from result events
+    # Usage counted against max_cost_usd when it spans several runs (None: usage)
+    budget_usage: list[ItemUsage] | None = None
+    budget_skipped: list[str] | None = None  # items not started because of max_cost_usd
+    blocked: list[str] | None = None  # items whose "(after: ...)" prerequisite did not finish
+    color: bool = True
+
+
+# Trailing "(key: value)" markers on an item title, e.g. "(sparse: packages/api)"
+TODO_OPTION_PATTERN = re.compile(r"\s*\((?P<key>[A-Za-z_-]+):\s*(?P<value>[^()]*)\)\s*$")
+TODO_OPTION_KEYS = frozenset({"sparse", "id", "after"})
+
+
+def split_todo_options(title: str) -> tuple[str, dict[str, str]]:
+    """Split known trailing ``(key: value)`` markers off a TODO title."""
+    name = title
+    options: dict[str, str] = {}
+    while True:
+        m = TODO_OPTION_PATTERN.search(name)
+        if not m or m.group("key").lower() not in TODO_OPTION_KEYS:
+            break
+        options.setdefault(m.group("key").lower(), m.group("value").strip())
+        name = name[: m.start()]
+    return (name.strip() or title), options
+
+
+@dataclass
+class TodoItem:
+    title: str  # as written in the TODO file, including option markers
+    children: list[str]
+    # Stable id of the item's node in the TODO tree (empty: match by title)
+    node_id: str = field(default="", compare=False)
+
+    @property
+    def name(self) -> str:
+        """Title without option markers; used for prompts, branches and PRs."""
+        return split_todo_options(self.title)[0]
+
+    @property
+    def options(self) -> dict[str, str]:
+        return split_todo_options(self.title)[1]
+
+    @property
+    def sparse_paths(self) -> list[str] | None:
+        raw = self.options.get("sparse")
+        return None if raw is None else split_paths(raw)
+
+    @property
+    def item_id(self) -> str | None:
+        """Short name other items can refer to with ``(after: <id>)``."""
+        return self.options.get("id") or None
+
+    @property
+    def after(self) -> str | None:
+        """Raw ``(after: ...)`` value: prerequisite titles or ids."""
+        return self.options.get("after") or None
+
+
+def split_paths(value: str | list[str] | None) -> list[str]:
+    """Normalize a comma/space separated string (or a TOML list) into paths."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,\s]+", value)
+    return [str(p).strip() for p in value if str(p).strip()]
+
+
+def parse_todo_markdown(md: str) -> list[TodoItem]:
+    """Unchecked top-level items, each with the titles of its unchecked subtasks.
+
+    Subtasks at any depth are listed in document order; see :mod:`.todo_tree`.
+    """
+    from .todo_tree import TodoTree
+
+    return todo_items(TodoTree.parse(md))
+
+
+def todo_items(tree: TodoTree) -> list[TodoItem]:
+    """Unchecked top-level items of an already parsed TODO tree."""
+    items: list[TodoItem] = []
+    for root in tree.roots:
+        if root.checked:
+            continue
+        children = [n.title for n in root.walk() if n is not root and not n.checked]
+        items.append(TodoItem(title=root.title, children=children, node_id=root.id))
+    return items
+
+
+def _args_list(args: str) -> list[str]:
+    return [x for x in args.split() if x]
+
+
+def _args_has_flag(args_list: list[str], flag: str) -> bool:
+    return any(a == flag or a.startswith(flag + "=") for a in args_list) or any(
+        args_list[i] == flag and i + 1 < len(args_list) for i in range(len(args_list))
+    )
+
+
+def _get_flag_value(args_list: list[str], flag: str) -> str | None:
+    for i, a in enumerate(args_list):
+        if a == flag and i + 1 < len(args_list):
+            return args_list[i + 1]
+        if a.startswith(flag + "="):
+            return a.split("=", 1)[1]
+    return None
+
+
+def pr_number_from_url(url: str) -> int | None:
+    m = re.search(r"/pull/(\d+)", url)
+    return int(m.group(1)) if m else None
+
+
+def slugify(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9-_]+", "-", text)
+    slug = re.sub(r"-+", "-", text).strip("-")
+    import random
+    import string
+
+    # Add 6 random alphanumeric chars for uniqueness
+    rand = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
+    return f"{slug}-{rand}"
+
+
+def load_config_toml(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        import tomllib  # Python 3.11+
+
+        return tomllib.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+# Registry to track worktrees created during this run
+CREATED_WORKTREES: list[Path] = []
+CREATED_WORKTREES_LOCK = threading.Lock()
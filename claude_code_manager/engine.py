@@ -0,0 +1,1928 @@
+"""Asyncio execution engine.
+
+Runs claude, git and gh as non-blocking subprocesses on a single event loop.
+Item concurrency in worktree-parallel mode is capped by an ``asyncio.Semaphore``
+sized from ``worktree_parallel_max_semaphore``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import contextlib
+import heapq
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import weakref
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import typer
+
+from . import admission, core, signals
+from .admission import AdmissionController
+from .concurrency import AdjustableSemaphore, ConcurrencyController, sample_system
+from .core import (
+    Config,
+    TodoItem,
+    _args_has_flag,
+    _args_list,
+    _get_flag_value,
+    color_info,
+    color_success,
+    color_warn,
+    debug_log,
+    echo,
+    slugify,
+    split_paths,
+    tr,
+)
+from .framing import LineFramer
+from .history import DurationHistory
+from .journal import ItemState, RunJournal
+from .schedule import SCHEDULE_POLICIES, DependencyCycle, resolve_dependencies, schedule_order
+from .stream_json import StreamDecoder, StreamEvent, bulk_type
+from .todo_doc import TodoDocument, TodoWriter
+from .tracing import set_lane, span
+from .transcript import Transcript, TranscriptStore, open_run_store
+from .usage import ItemUsage, Usage, run_total
+
+# Bytes read from claude's output pipe at a time (also the pipe reader's buffer limit)
+READ_CHUNK = 1 << 20
+# Longest output line kept in memory; longer lines are only scanned for the done token
+MAX_LINE_BYTES = 8 << 20
+# Minimum seconds between single-line status redraws (final states always draw)
+STATUS_MIN_INTERVAL = 0.05
+
+
+def _kill(proc: asyncio.subprocess.Process) -> None:
+    try:
+        if proc.returncode is None:
+            proc.kill()
+    except Exception:
+        pass
+
+
+async def _terminate(proc: asyncio.subprocess.Process, timeout: float = 2.0) -> None:
+    """Terminate a child gracefully, then kill it if it does not exit in time."""
+    try:
+        if proc.returncode is None:
+            proc.terminate()
+    except Exception:
+        pass
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=timeout)
+    except Exception:
+        _kill(proc)
+
+
+async def _communicate(proc: asyncio.subprocess.Process) -> bytes:
+    try:
+        out, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        _kill(proc)
+        raise
+    return out or b""
+
+
+async def check_output(cmd: list[str], cwd: Path | None = None, *, quiet: bool = False) -> str:
+    """Async equivalent of ``subprocess.check_output(cmd, text=True)``.
+
+    stderr is discarded unless debug logging is enabled (always when ``quiet``).
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=str(cwd) if cwd else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=None if (core.DEBUG_ENABLED and not quiet) else asyncio.subprocess.DEVNULL,
+    )
+    out = (await _communicate(proc)).decode("utf-8", errors="replace")
+    if proc.returncode:
+        raise subprocess.CalledProcessError(int(proc.returncode), cmd, output=out)
+    return out
+
+
+async def check_call(cmd: list[str], cwd: Path | None = None) -> None:
+    """Async equivalent of ``subprocess.check_call`` with output silenced unless debugging."""
+    sink = None if core.DEBUG_ENABLED else asyncio.subprocess.DEVNULL
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=str(cwd) if cwd else None, stdout=sink, stderr=sink
+    )
+    await _communicate(proc)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(int(proc.returncode), cmd)
+
+
+async def git(*args: str, cwd: Path | None = None) -> str:
+    return (await check_output(["git", *args], cwd=cwd)).strip()
+
+
+async def git_call(args: list[str], cwd: Path | None = None) -> None:
+    await check_call(["git", *args], cwd=cwd)
+
+
+async def git_quiet(args: list[str], cwd: Path | None = None) -> int:
+    """Run git with all output discarded and return its exit code (never raises)."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=str(cwd) if cwd else None,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        await _communicate(proc)
+        return int(proc.returncode or 0)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return 1
+
+
+def build_claude_cmd(
+    args: str, prompt: str, output_format: str, *, resume: str | None = None
+) -> tuple[list[str], str]:
+    """Return the claude command line and the effective output format."""
+    extra = _args_list(args)
+    cmd: list[str] = ["claude", "-p", prompt]
+
+    if resume and not (_args_has_flag(extra, "--resume") or _args_has_flag(extra, "--continue")):
+        cmd += ["--resume", resume]
+
+    provided_fmt = _get_flag_value(extra, "--output-format")
+    effective_fmt = provided_fmt or output_format
+
+    if not provided_fmt:
+        cmd += ["--output-format", output_format]
+
+    if effective_fmt == "stream-json" and not _args_has_flag(extra, "--verbose"):
+        cmd += ["--verbose"]
+
+    cmd += extra
+    return cmd, effective_fmt
+
+
+@dataclass
+class ClaudeRunResult:
+    returncode: int
+    done_seen: bool
+    # From the stream-json init event; lets a follow-up attempt --resume the session
+    session_id: str | None = None
+    # "total" or "stall" when the run was stopped by a timeout
+    timed_out: str | None = None
+    # From the stream-json result event (None if claude did not emit one)
+    usage: Usage | None = None
+    # signals.RATE_LIMIT / OVERLOADED if the stream reported one
+    pressure: str | None = None
+    # Signals the stream already emitted for this launch (each kind once)
+    signaled: frozenset[str] = frozenset()
+
+
+class ClaudeTimeout(Exception):
+    def __init__(self, kind: str):
+        super().__init__(kind)
+        self.kind = kind
+
+
+class ItemTimedOut(Exception):
+    """Raised by process_one_todo when claude hit the item's total or stall timeout."""
+
+
+def _wait_limit(stall_timeout: float, deadline: float | None) -> tuple[float | None, str]:
+    """Seconds claude may stay silent now, and which timeout that is ("stall" or "total")."""
+    timeout: float | None = stall_timeout if stall_timeout > 0 else None
+    kind = "stall"
+    if deadline is not None:
+        left = max(0.0, deadline - time.monotonic())
+        if timeout is None or left < timeout:
+            timeout, kind = left, "total"
+    return timeout, kind
+
+
+async def _read_chunk(
+    stream: asyncio.StreamReader, *, stall_timeout: float, deadline: float | None
+) -> bytes:
+    """Up to ``READ_CHUNK`` bytes, bounded by the stall timeout and the item deadline."""
+    timeout, kind = _wait_limit(stall_timeout, deadline)
+    if timeout is None:
+        return await stream.read(READ_CHUNK)
+    try:
+        return await asyncio.wait_for(stream.read(READ_CHUNK), timeout)
+    except TimeoutError:
+        raise ClaudeTimeout(kind) from None
+
+
+async def _wait_exit(
+    proc: asyncio.subprocess.Process,
+    *,
+    stall_timeout: float,
+    deadline: float | None,
+    kill_grace: float,
+) -> None:
+    """Wait for claude to exit after closing its output, within the same timeouts.
+
+    Without timeouts, a child still running ``kill_grace`` seconds later is terminated.
+    """
+    timeout, kind = _wait_limit(stall_timeout, deadline)
+    try:
+        await asyncio.wait_for(proc.wait(), timeout if timeout is not None else kill_grace)
+    except TimeoutError:
+        if timeout is not None:
+            raise ClaudeTimeout(kind) from None
+        await _terminate(proc, timeout=kill_grace)
+
+
+def _wanted_lines() -> Callable[[bytes], bool] | None:
+    """Which long lines the decoder needs in full, judged from their first bytes.
+
+    Bulk events are classified from their head; assistant text is only needed to
+    spot API errors for pressure signals, and tool output (``user``) never is.
+    """
+    if core.DEBUG_ENABLED:
+        return None
+    if signals.active():
+        return lambda head: bulk_type(head) != "user"
+    return lambda head: bulk_type(head) is None
+
+
+async def _pump_output(
+    stream: asyncio.StreamReader,
+    decoder: StreamDecoder,
+    on_event: Callable[[StreamEvent], None],
+    *,
+    stall_timeout: float,
+    deadline: float | None,
+    transcript: Transcript | None = None,
+    on_chunk: Callable[[bytes], None] | None = None,
+) -> None:
+    """Read claude's output to EOF in chunks and decode it line by line.
+
+    Lines are framed from the raw bytes; only those the decoder needs are
+    materialized, and none is held past ``MAX_LINE_BYTES``.
+    """
+    framer = LineFramer([decoder.done_pattern], max_line_bytes=MAX_LINE_BYTES, want=_wanted_lines())
+    while True:
+        chunk = await _read_chunk(stream, stall_timeout=stall_timeout, deadline=deadline)
+        if not chunk:
+            break
+        if transcript is not None:
+            transcript.write(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        for frame in framer.feed(chunk):
+            on_event(decoder.decode_frame(frame))
+    for frame in framer.close():
+        on_event(decoder.decode_frame(frame))
+    if framer.oversized:
+        debug_log(f"{framer.oversized} output line(s) over {MAX_LINE_BYTES} bytes not buffered")
+
+
+async def run_claude_and_detect(
+    args: str,
+    show_output: bool,
+    env: dict | None = None,
+    cwd: Path | None = None,
+    *,
+    prompt: str,
+    done_token: str,
+    row_index: int,
+    output_format: str = "stream-json",
+    row_updater: Callable[[int, str, str, bool], None] | None = None,
+) -> tuple[int, bool]:
+    """Run Claude once and detect if done_token appears in the streamed output.
+    Returns (return_code, done_seen).
+    """
+    res = await run_claude(
+        args,
+        show_output,
+        env,
+        cwd,
+        prompt=prompt,
+        done_token=done_token,
+        row_index=row_index,
+        output_format=output_format,
+        row_updater=row_updater,
+    )
+    return res.returncode, res.done_seen
+
+
+async def run_claude(
+    args: str,
+    show_output: bool,
+    env: dict | None = None,
+    cwd: Path | None = None,
+    *,
+    prompt: str,
+    done_token: str,
+    row_index: int,
+    output_format: str = "stream-json",
+    row_updater: Callable[[int, str, str, bool], None] | None = None,
+    resume: str | None = None,
+    deadline: float | None = None,
+    stall_timeout: float = 0.0,
+    kill_grace: float = 5.0,
+    transcript: Transcript | None = None,
+) -> ClaudeRunResult:
+    """Run Claude once (optionally resuming ``resume`` session) and summarize the stream.
+
+    ``deadline`` (a ``time.monotonic()`` value) bounds the whole run and
+    ``stall_timeout`` the wait for each output line. On expiry the child is
+    terminated, killed after ``kill_grace`` seconds, and ``timed_out`` is set.
+    The raw output is also handed to ``transcript``.
+    """
+    cmd, effective_fmt = build_claude_cmd(args, prompt, output_format, resume=resume)
+
+    debug_log(f"running: {' '.join(cmd)}")
+    debug_log(f"cwd={cwd or Path.cwd()}")
+    debug_log(f"show_output={show_output}, output_format={effective_fmt}")
+
+    decoder = StreamDecoder(done_token)
+    pressure: str | None = None
+    signaled: set[str] = set()
+
+    if show_output:
+        p = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env={**os.environ, **(env or {})},
+            cwd=str(cwd) if cwd else None,
+            limit=READ_CHUNK,
+        )
+        assert p.stdout is not None
+        # Chunks may end mid-character
+        utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        def _on_event(ev: StreamEvent) -> None:
+            nonlocal pressure
+            if signals.active():
+                pressure = _emit_signal(ev, signaled) or pressure
+
+        def _echo(chunk: bytes) -> None:
+            try:
+                sys.stdout.write(utf8.decode(chunk))
+            except Exception:
+                pass
+
+        try:
+            await _pump_output(
+                p.stdout,
+                decoder,
+                _on_event,
+                stall_timeout=stall_timeout,
+                deadline=deadline,
+                transcript=transcript,
+                on_chunk=_echo,
+            )
+            await _wait_exit(
+                p, stall_timeout=stall_timeout, deadline=deadline, kill_grace=kill_grace
+            )
+            return _run_result(
+                int(p.returncode or 0), decoder, pressure=pressure, signaled=signaled
+            )
+        except ClaudeTimeout as t:
+            await _terminate(p, timeout=kill_grace)
+            return _run_result(
+                int(p.returncode or -1),
+                decoder,
+                timed_out=t.kind,
+                pressure=pressure,
+                signaled=signaled,
+            )
+        except asyncio.CancelledError:
+            await _terminate(p)
+            raise
+
+    counts: dict[str, int] = {"system": 0, "assistant": 0, "user": 0}
+    allowed = set(counts.keys())
+
+    spinner = "|/-\\"
+    spin_idx = 0
+    last_len = 0
+    last_draw = 0.0
+    is_tty = sys.stderr.isatty()
+    width = core.terminal_width()
+    aborted = False
+    errored = False
+
+    def _counts_text() -> str:
+        return ", ".join(
+            [
+                f"assistant: {counts['assistant']}",
+                f"user: {counts['user']}",
+                f"system: {counts['system']}",
+            ]
+        )
+
+    def _print_status(prefix_char: str | None = None, *, final: bool = False):
+        nonlocal last_len, last_draw
+        ch = prefix_char if prefix_char is not None else spinner[spin_idx % len(spinner)]
+
+        def _colorize_line_from_plain(line_plain: str) -> str:
+            line_colored = line_plain
+            try:
+                if line_colored.startswith(ch):
+                    if ch == "✓":
+                        spin_col = color_success(ch)
+                    elif ch == "❌":
+                        spin_col = color_warn(ch)
+                    else:
+                        spin_col = color_info(ch)
+                    line_colored = spin_col + line_colored[len(ch) :]
+
+                a_tok = f"assistant: {counts['assistant']}"
+                u_tok = f"user: {counts['user']}"
+                s_tok = f"system: {counts['system']}"
+                if a_tok in line_colored:
+                    line_colored = line_colored.replace(a_tok, color_success(a_tok))
+                if u_tok in line_colored:
+                    line_colored = line_colored.replace(u_tok, color_info(u_tok))
+                if s_tok in line_colored:
+                    line_colored = line_colored.replace(s_tok, color_warn(s_tok))
+            except Exception:
+                pass
+            return line_colored
+
+        if row_updater is not None and is_tty:
+            line_plain = f"{ch} worktree {row_index + 1} | {_counts_text()}"
+            line_out = _colorize_line_from_plain(line_plain) if core.COLOR_ENABLED else line_plain
+            row_updater(row_index, line_out, "", final)
+            return
+
+        # Coalesce status redraws on the shared stderr line
+        now = time.monotonic()
+        if not final and now - last_draw < STATUS_MIN_INTERVAL:
+            return
+        last_draw = now
+
+        counts_part_plain = _counts_text()
+        line1_plain = f"{ch} todo {row_index + 1}: {counts_part_plain}"
+        if len(line1_plain) > width:
+            line1_plain = line1_plain[: width - 1]
+
+        if is_tty:
+            try:
+                line1_out = (
+                    _colorize_line_from_plain(line1_plain) if core.COLOR_ENABLED else line1_plain
+                )
+            except Exception:
+                line1_out = line1_plain
+            try:
+                sys.stderr.write("\r\x1b[2K" + line1_out)
+                sys.stderr.flush()
+            except Exception:
+                pass
+        else:
+            pad = max(0, last_len - len(line1_plain))
+            try:
+                sys.stderr.write("\r" + line1_plain + (" " * pad))
+                sys.stderr.flush()
+            except Exception:
+                pass
+            last_len = len(line1_plain)
+
+    _print_status()
+
+    p_head = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env={**os.environ, **(env or {})},
+        cwd=str(cwd) if cwd else None,
+        limit=READ_CHUNK,
+    )
+    assert p_head.stdout is not None
+    rc = 1
+    timed_out: str | None = None
+
+    def _on_event(ev: StreamEvent) -> None:
+        nonlocal pressure, spin_idx
+        if signals.active():
+            pressure = _emit_signal(ev, signaled) or pressure
+        if core.DEBUG_ENABLED:
+            debug_log(f"line: {ev.line.rstrip()}")
+            debug_log(f"parsed type={ev.type}" if ev.is_json else "non-json line")
+        if ev.type in allowed:
+            counts[ev.type] += 1
+            spin_idx = (spin_idx + 1) % len(spinner)
+            _print_status()
+
+    try:
+        await _pump_output(
+            p_head.stdout,
+            decoder,
+            _on_event,
+            stall_timeout=stall_timeout,
+            deadline=deadline,
+            transcript=transcript,
+        )
+        await _wait_exit(
+            p_head, stall_timeout=stall_timeout, deadline=deadline, kill_grace=kill_grace
+        )
+        rc = int(p_head.returncode or 0)
+    except ClaudeTimeout as t:
+        timed_out = t.kind
+        await _terminate(p_head, timeout=kill_grace)
+        rc = int(p_head.returncode or -1)
+    except asyncio.CancelledError:
+        aborted = True
+        await _terminate(p_head)
+        try:
+            _print_status(prefix_char="❌", final=True)
+        except Exception:
+            pass
+        raise
+    except Exception:
+        errored = True
+        await _terminate(p_head)
+    try:
+        marker = "✓" if (not aborted and not errored and not timed_out and rc == 0) else "❌"
+        _print_status(prefix_char=marker, final=True)
+    except Exception:
+        pass
+    return _run_result(rc, decoder, timed_out=timed_out, pressure=pressure, signaled=signaled)
+
+
+def _emit_signal(ev: StreamEvent, signaled: set[str]) -> str | None:
+    """Emit the signal carried by ``ev``; returns it if it is a rate limit or overload.
+
+    ``signaled`` holds the kinds this launch already emitted; each is emitted once,
+    so one failed run is not counted as several by the concurrency controller.
+    """
+    kind = signals.classify(ev)
+    if kind is None:
+        return None
+    debug_log(f"claude stream signal: {kind}")
+    if kind not in signaled:
+        signaled.add(kind)
+        signals.emit(kind)
+    return kind if kind in (signals.RATE_LIMIT, signals.OVERLOADED) else None
+
+
+def _run_result(
+    rc: int,
+    decoder: StreamDecoder,
+    *,
+    timed_out: str | None = None,
+    pressure: str | None = None,
+    signaled: set[str] | None = None,
+) -> ClaudeRunResult:
+    usage = Usage.from_event(decoder.result) if decoder.result is not None else None
+    return ClaudeRunResult(
+        rc,
+        decoder.done_seen,
+        decoder.session_id,
+        timed_out=timed_out,
+        usage=usage,
+        pressure=pressure,
+        signaled=frozenset(signaled or ()),
+    )
+
+
+class FetchCoordinator:
+    """Run-wide ``git fetch --all`` for one repository.
+
+    Concurrent callers share a single in-flight fetch, and a completed fetch is
+    reused until ``ttl`` seconds have passed (``ttl < 0`` never refetches).
+    """
+
+    def __init__(self, root: Path, ttl: float = 300.0):
+        self.root = root
+        self.ttl = float(ttl)
+        self.fetch_count = 0
+        self._last: float | None = None
+        self._inflight: asyncio.Task | None = None
+
+    def is_fresh(self) -> bool:
+        if self._last is None:
+            return False
+        return self.ttl < 0 or (time.monotonic() - self._last) < self.ttl
+
+    async def _fetch(self) -> None:
+        started = time.monotonic()
+        self.fetch_count += 1
+        debug_log(f"fetching in {self.root}")
+        with span("git fetch"):
+            await git("fetch", "--all", cwd=self.root)
+        self._last = started
+
+    async def ensure_fresh(self, *, force: bool = False) -> None:
+        task = self._inflight
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            if not force and self.is_fresh():
+                return
+            task = self._inflight = asyncio.create_task(self._fetch())
+        await asyncio.shield(task)
+
+
+_FETCHERS: dict[Path, FetchCoordinator] = {}
+
+
+def fetch_coordinator(root: Path | None, ttl: float = 300.0) -> FetchCoordinator:
+    """Return the shared coordinator for ``root`` (created on first use)."""
+    key = (root or Path.cwd()).resolve()
+    fc = _FETCHERS.get(key)
+    if fc is None:
+        fc = _FETCHERS[key] = FetchCoordinator(key, ttl)
+    fc.ttl = float(ttl)
+    return fc
+
+
+def reset_fetch_coordinators() -> None:
+    _FETCHERS.clear()
+
+
+_TODO_WRITERS: dict[Path, TodoWriter] = {}
+
+
+def todo_writer(path: Path) -> TodoWriter:
+    """Return the shared writer for the TODO file at ``path`` (parsed on first use)."""
+    key = path.resolve()
+    w = _TODO_WRITERS.get(key)
+    if w is None:
+        w = _TODO_WRITERS[key] = TodoWriter(TodoDocument(key))
+    return w
+
+
+def reset_todo_writers() -> None:
+    _TODO_WRITERS.clear()
+
+
+async def close_todo_writers(root: Path | None = None) -> None:
+    """Write pending TODO updates and forget the parsed documents (only under ``root``)."""
+    under = root.resolve() if root is not None else None
+    keys = [k for k in _TODO_WRITERS if under is None or k.is_relative_to(under)]
+    for k in keys:
+        await _TODO_WRITERS.pop(k).close()
+
+
+async def _list_tracked_changes(cwd: Path | None = None) -> set[str]:
+    changed: set[str] = set()
+    for args in (("diff", "--name-only"), ("diff", "--cached", "--name-only")):
+        try:
+            out = await git(*args, cwd=cwd)
+        except Exception:
+            continue
+        for line in out.splitlines():
+            if line.strip():
+                changed.add(line.strip())
+    return changed
+
+
+async def ensure_branch(
+    base: str,
+    name: str,
+    cwd: Path | None = None,
+    *,
+    lang: str = "en",
+    fetch_ttl: float = 300.0,
+) -> None:
+    with span("ensure_branch", branch=name):
+        await fetch_coordinator(cwd, fetch_ttl).ensure_fresh()
+
+        # Check for any local tracked changes before switching branches
+        changed = await _list_tracked_changes(cwd=cwd)
+        if changed:
+            echo(tr("uncommitted_changes", lang), err=True)
+            for p in sorted(changed):
+                echo(f"  - {p}", err=True)
+            echo(tr("uncommitted_hint", lang), err=True)
+            echo(tr("uncommitted_hint2", lang), err=True)
+            raise typer.Exit(code=1)
+
+        await git("checkout", base, cwd=cwd)
+        try:
+            await git("checkout", "-b", name, cwd=cwd)
+        except subprocess.CalledProcessError:
+            await git("checkout", name, cwd=cwd)
+            await git("rebase", base, cwd=cwd)
+
+
+async def commit_filtered(
+    message: str, cwd: Path | None = None, exclude_paths: list[str] | None = None
+) -> bool:
+    """Stage everything except ``exclude_paths`` and commit. Returns False if nothing staged."""
+    # Stage everything, then unstage excluded paths if any
+    with span("git add"):
+        await git_call(["add", "-A"], cwd=cwd)
+        for p in exclude_paths or []:
+            try:
+                await git_call(["reset", "HEAD", "--", p], cwd=cwd)
+            except Exception:
+                pass
+
+        try:
+            staged = await git("diff", "--cached", "--name-only", cwd=cwd)
+        except Exception:
+            staged = ""
+    if not staged.strip():
+        return False
+    with span("git commit"):
+        await git_call(["commit", "-m", message], cwd=cwd)
+    return True
+
+
+async def push_branch(branch: str, cwd: Path | None = None, *, changed: bool = True) -> None:
+    """Push ``branch`` to origin; without new commits only make sure it has an upstream."""
+    with span("git push", branch=branch):
+        if changed:
+            await git_call(["push", "-u", "origin", branch], cwd=cwd)
+            return
+        # Nothing staged; still make sure the branch has an upstream
+        try:
+            await git("rev-parse", "--abbrev-ref", "@{u}", cwd=cwd)
+        except Exception:
+            try:
+                await git_call(["push", "-u", "origin", branch], cwd=cwd)
+            except Exception:
+                pass
+
+
+async def commit_and_push_filtered(
+    message: str,
+    branch: str,
+    cwd: Path | None = None,
+    exclude_paths: list[str] | None = None,
+) -> None:
+    with span("commit_and_push", branch=branch):
+        changed = await commit_filtered(message, cwd=cwd, exclude_paths=exclude_paths)
+        await push_branch(branch, cwd=cwd, changed=changed)
+
+
+def parse_push_porcelain(output: str) -> dict[str, bool]:
+    """Map local branch names to success from ``git push --porcelain`` output."""
+    results: dict[str, bool] = {}
+    for line in output.splitlines():
+        parts = line.split("\t")
+        if len(parts) < 2 or len(parts[0]) != 1:
+            continue
+        src = parts[1].split(":", 1)[0]
+        if src.startswith("refs/heads/"):
+            results[src[len("refs/heads/") :]] = parts[0] != "!"
+    return results
+
+
+async def push_branches(root: Path, branches: list[str], remote: str = "origin") -> dict[str, bool]:
+    """Push all ``branches`` in one ``git push`` and report success per branch.
+
+    A partial failure makes git exit non-zero, but the porcelain output still
+    describes every ref, so only the rejected branches are reported as failed.
+    """
+    if not branches:
+        return {}
+    refspecs = [f"refs/heads/{b}:refs/heads/{b}" for b in branches]
+    cmd = ["git", "push", "--porcelain", "-u", remote, *refspecs]
+    with span("git push (batched)", branches=len(branches)):
+        try:
+            out = await check_output(cmd, cwd=root)
+        except subprocess.CalledProcessError as e:
+            debug_log(f"batched push exited with {e.returncode}")
+            out = e.output or ""
+    results = parse_push_porcelain(out)
+    return {b: results.get(b, False) for b in branches}
+
+
+@dataclass
+class GhCapabilities:
+    pr_create_json: bool = False
+    pr_view_json: bool = False
+
+
+# Probed once per process; concurrent callers share the in-flight probe
+_GH_CAPS: GhCapabilities | None = None
+_GH_CAPS_TASK: asyncio.Task | None = None
+
+
+def gh_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "claude-code-manager" / "gh-capabilities.json"
+
+
+def reset_gh_capabilities() -> None:
+    """Forget the in-process probe result (the on-disk cache is kept)."""
+    global _GH_CAPS, _GH_CAPS_TASK
+    _GH_CAPS = None
+    _GH_CAPS_TASK = None
+
+
+async def _gh_help_supports_json(subcommand: str) -> bool:
+    try:
+        help_txt = await check_output(["gh", "pr", subcommand, "--help"], quiet=True)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return False
+    return "--json" in help_txt and "-q" in help_txt
+
+
+async def _probe_gh_capabilities() -> GhCapabilities:
+    try:
+        version = (await check_output(["gh", "--version"], quiet=True)).strip()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        # gh missing or broken: nothing to cache
+        return GhCapabilities()
+
+    cache = gh_cache_path()
+    try:
+        data = json.loads(cache.read_text(encoding="utf-8"))
+        if data.get("gh_version") == version:
+            debug_log(f"gh capabilities from cache: {cache}")
+            return GhCapabilities(
+                pr_create_json=bool(data.get("pr_create_json")),
+                pr_view_json=bool(data.get("pr_view_json")),
+            )
+    except Exception:
+        pass
+
+    create_json, view_json = await asyncio.gather(
+        _gh_help_supports_json("create"), _gh_help_supports_json("view")
+    )
+    caps = GhCapabilities(pr_create_json=create_json, pr_view_json=view_json)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text(json.dumps({"gh_version": version, **asdict(caps)}), encoding="utf-8")
+    except Exception as e:
+        debug_log(f"could not write gh capability cache: {e}")
+    return caps
+
+
+async def gh_capabilities() -> GhCapabilities:
+    """Return gh feature support, probing at most once per process.
+
+    Results are also cached on disk keyed by ``gh --version`` output, so a cache hit
+    costs a single ``gh --version`` call per run.
+    """
+    global _GH_CAPS, _GH_CAPS_TASK
+    if _GH_CAPS is not None:
+        return _GH_CAPS
+    loop = asyncio.get_running_loop()
+    if _GH_CAPS_TASK is None or _GH_CAPS_TASK.get_loop() is not loop:
+        _GH_CAPS_TASK = loop.create_task(_probe_gh_capabilities())
+    caps = await asyncio.shield(_GH_CAPS_TASK)
+    _GH_CAPS = caps
+    return caps
+
+
+async def create_pr(
+    title: str, body: str, base: str, head: str, cwd: Path | None = None
+) -> str | None:
+    """Create a PR using GitHub CLI and return the PR URL.
+    - Prefer JSON output if supported by the installed gh.
+    - Fall back to classic stdout parsing when --json is unavailable.
+    """
+    with span("create_pr", head=head) as sp:
+        sp["url"] = url = await _create_pr(title, body, base, head, cwd)
+    return url
+
+
+async def _create_pr(title: str, body: str, base: str, head: str, cwd: Path | None) -> str | None:
+    create_cmd = ["gh", "pr", "create", "--title", title, "--body", body]
+    create_cmd += ["--base", base, "--head", head]
+    caps = await gh_capabilities()
+
+    if caps.pr_create_json:
+        try:
+            out = (
+                await check_output([*create_cmd, "--json", "url", "-q", ".url"], cwd=cwd)
+            ).strip()
+            if out:
+                return out
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            debug_log(f"gh pr create (json) failed: {e}")
+    else:
+        try:
+            # Classic mode: capture stdout and parse PR URL
+            out2 = await check_output(create_cmd, cwd=cwd)
+            m = re.search(r"https?://[^\s]+/pull/\d+", out2)
+            if m:
+                return m.group(0)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e2:
+            debug_log(f"gh pr create (classic) failed: {e2}")
+
+    # Fallback: try to get existing PR for this branch
+    try:
+        if caps.pr_view_json:
+            outv = (
+                await check_output(
+                    ["gh", "pr", "view", head, "--json", "url", "-q", ".url"], cwd=cwd
+                )
+            ).strip()
+            if outv:
+                return outv
+        else:
+            outv2 = await check_output(["gh", "pr", "view", head], cwd=cwd)
+            m2 = re.search(r"https?://[^\s]+/pull/\d+", outv2)
+            if m2:
+                return m2.group(0)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e3:
+        debug_log(f"gh pr view fallback failed: {e3}")
+    return None
+
+
+def budget_exhausted(cfg: Config) -> bool:
+    """True once the claude cost reported so far reaches ``max_cost_usd``."""
+    usage = cfg.usage if cfg.budget_usage is None else cfg.budget_usage
+    return cfg.max_cost_usd > 0 and run_total(usage).cost_usd >= cfg.max_cost_usd
+
+
+def _skip_for_budget(item: TodoItem, cfg: Config) -> bool:
+    if not budget_exhausted(cfg):
+        return False
+    echo(color_warn(tr("budget_reached", cfg.lang, title=item.name, limit=cfg.max_cost_usd)))
+    if cfg.budget_skipped is not None:
+        cfg.budget_skipped.append(item.name)
+    return True
+
+
+def _resolve_dependencies(items: list[TodoItem], cfg: Config) -> list[list[int]]:
+    try:
+        deps, unknown = resolve_dependencies(items)
+    except DependencyCycle as e:
+        echo(tr("dependency_cycle", cfg.lang, cycle=str(e)), err=True)
+        raise typer.Exit(code=1) from None
+    for ref in unknown:
+        debug_log(f"(after: {ref}) matches no open item; treating it as done")
+    return deps
+
+
+def open_history(root: Path, cfg: Config) -> DurationHistory:
+    return DurationHistory(root / cfg.history_path if cfg.history_path else None)
+
+
+def _dispatch_order(
+    items: list[TodoItem], deps: list[list[int]], cfg: Config, history: DurationHistory
+) -> list[int]:
+    """Item indices in the order ``cfg.schedule`` starts them."""
+    if cfg.schedule not in SCHEDULE_POLICIES:
+        echo(tr("unknown_schedule", cfg.lang, policy=cfg.schedule), err=True)
+        raise typer.Exit(code=1)
+    if cfg.schedule == "file":
+        return schedule_order(items, deps, "file", [])
+    estimates = [
+        history.estimate(item.name, len(item.children), len(item_prompt(item, cfg)))
+        for item in items
+    ]
+    order = schedule_order(items, deps, cfg.schedule, estimates)
+    for i in order:
+        debug_log(f"schedule {cfg.schedule}: {items[i].name!r} ~{estimates[i]:.0f}s")
+    return order
+
+
+def _record_duration(history: DurationHistory, item: TodoItem, cfg: Config, seconds: float) -> None:
+    history.record(item.name, len(item.children), len(item_prompt(item, cfg)), seconds)
+
+
+def _base_after_prereqs(item: TodoItem, branches: list[str | None], cfg: Config) -> str | None:
+    """Base branch for ``item`` given its prerequisites' branches (None: not finished).
+
+    Returns None, after reporting it, when the item is blocked by a prerequisite.
+    """
+    if any(b is None for b in branches):
+        echo(color_warn(tr("dependency_blocked", cfg.lang, title=item.name)))
+        if cfg.blocked is not None:
+            cfg.blocked.append(item.name)
+        return None
+    if cfg.stack_dependents and len(branches) == 1:
+        return branches[0]
+    return cfg.git_base_branch
+
+
+def journal_key(item: TodoItem) -> str:
+    """Journal key of ``item``: its TODO tree id, so items with the same title stay apart."""
+    return item.node_id or item.title
+
+
+async def record_phase(journal: RunJournal | None, item: TodoItem, phase: str, **data) -> None:
+    """Journal ``phase`` for ``item`` on a worker thread, so its fsync never blocks the loop."""
+    if journal is not None:
+        await asyncio.to_thread(journal.record, journal_key(item), phase, **data)
+
+
+def open_journal(root: Path, cfg: Config, items: list[TodoItem]) -> RunJournal | None:
+    """Load the run journal and drop entries for items no longer open in the TODO."""
+    if not cfg.journal:
+        return None
+    journal = RunJournal(root / cfg.journal_path)
+    journal.compact({journal_key(item) for item in items})
+    return journal
+
+
+def open_transcripts(root: Path, cfg: Config) -> TranscriptStore | None:
+    """Start this run's transcript directory under ``transcript_dir``."""
+    if not cfg.transcripts:
+        return None
+    try:
+        store = open_run_store(
+            root / cfg.transcript_dir,
+            codec=cfg.transcript_codec,
+            max_buffer_bytes=int(float(cfg.transcript_buffer_mb) * (1 << 20)),
+            keep=int(cfg.transcript_keep),
+            root=root,
+        )
+    except (OSError, ValueError) as e:
+        echo(color_warn(tr("transcripts_disabled", cfg.lang, error=e)), err=True)
+        return None
+    if store.codec != cfg.transcript_codec:
+        debug_log(f"transcript codec {cfg.transcript_codec} unavailable; using {store.codec}")
+    return store
+
+
+async def close_transcripts(store: TranscriptStore | None, cfg: Config) -> None:
+    """Write the transcripts still buffered and report where they are."""
+    if store is None:
+        return
+    await asyncio.to_thread(store.close)
+    if store.directory.exists():
+        echo(color_info(tr("transcripts_written", cfg.lang, path=str(store.directory))))
+
+
+def _excluded_paths(cfg: Config) -> list[str]:
+    """Paths claude-manager writes itself, never committed with an item.
+
+    Relative to the repository root; paths outside it are left to git to ignore.
+    """
+    paths = [
+        cfg.input_path,
+        cfg.journal_path,
+        cfg.transcript_dir,
+        cfg.history_path,
+        cfg.trace_path,
+        cfg.summary_path,
+    ]
+    return [p for p in paths if p and not Path(p).is_absolute()]
+
+
+def item_branch(item: TodoItem, cfg: Config, state: ItemState | None = None) -> str:
+    """Branch for ``item``: the journal's from an interrupted run, else a new slug."""
+    if state is not None and state.branch:
+        return state.branch
+    return f"{cfg.git_branch_prefix}{slugify(item.name)}"
+
+
+async def resume_state(
+    journal: RunJournal | None, item: TodoItem, cwd: Path | None = None
+) -> ItemState | None:
+    """Journal state for ``item`` if its recorded branch still exists locally."""
+    state = journal.state(journal_key(item)) if journal is not None else None
+    if state is None or not state.branch:
+        return None
+    if await git_quiet(["rev-parse", "--verify", "--quiet", f"refs/heads/{state.branch}"], cwd=cwd):
+        debug_log(f"journal branch {state.branch} is gone; starting {item.title!r} over")
+        return None
+    return state
+
+
+async def process_one_todo(
+    item: TodoItem,
+    cfg: Config,
+    cwd: Path | None = None,
+    *,
+    skip_branch_ensure: bool = False,
+    branch_name: str | None = None,
+    row_index: int,
+    row_updater: Callable[[int, str, str, bool], None] | None = None,
+    pending: list[PendingPublish] | None = None,
+    journal: RunJournal | None = None,
+    base: str | None = None,
+    transcripts: TranscriptStore | None = None,
+    history: DurationHistory | None = None,
+    started: float | None = None,
+) -> str | None:
+    """Run one item on its branch (from ``base``, default ``git_base_branch``) and open its PR.
+
+    Once the item is committed, its time since ``started`` goes to ``history``, but only
+    if claude ran for it here: resumed items would add near-zero samples.
+    """
+    started = time.monotonic() if started is None else started
+    base = base or cfg.git_base_branch
+    state = await resume_state(journal, item, cwd)
+    branch = branch_name or item_branch(item, cfg, state)
+    ran_claude = False
+    if state is None or not state.reached("claude_done"):
+        if not skip_branch_ensure:
+            await ensure_branch(base, branch, cwd=cwd, lang=cfg.lang, fetch_ttl=cfg.fetch_ttl)
+            await record_phase(journal, item, "branch", branch=branch)
+        await _run_claude_for_item(
+            item,
+            cfg,
+            cwd,
+            row_index=row_index,
+            row_updater=row_updater,
+            branch=branch,
+            transcripts=transcripts,
+        )
+        ran_claude = True
+        await record_phase(journal, item, "claude_done")
+    elif not skip_branch_ensure:
+        # Resuming after claude finished: carry any uncommitted work onto the branch
+        await git("checkout", branch, cwd=cwd)
+
+    if state is None or not state.reached("committed"):
+        commit_msg = f"{cfg.git_commit_message_prefix}{item.name}"
+        await commit_filtered(commit_msg, cwd=cwd, exclude_paths=_excluded_paths(cfg))
+        await record_phase(journal, item, "committed")
+    if ran_claude and history is not None:
+        _record_duration(history, item, cfg, time.monotonic() - started)
+    if pending is not None:
+        # Batched mode: commit locally; push and PR happen in publish_pending
+        pending.append(PendingPublish(item=item, branch=branch, base=base))
+        return None
+    if state is None or not state.reached("pushed"):
+        await push_branch(branch, cwd=cwd)
+        await record_phase(journal, item, "pushed")
+    return await open_pr_and_record(
+        item,
+        cfg,
+        branch,
+        cwd=cwd or Path.cwd(),
+        journal=journal,
+        base=base,
+        transcripts=transcripts,
+    )
+
+
+def item_prompt(item: TodoItem, cfg: Config) -> str:
+    """First prompt sent to claude for ``item``."""
+    children_bullets = "\n".join([f"- {c}" for c in item.children]) if item.children else "- (none)"
+    return cfg.headless_prompt_template.format(
+        title=item.name,
+        children_bullets=children_bullets,
+        done_token=cfg.task_done_message,
+    )
+
+
+async def _run_claude_for_item(
+    item: TodoItem,
+    cfg: Config,
+    cwd: Path | None,
+    *,
+    row_index: int,
+    row_updater: Callable[[int, str, str, bool], None] | None,
+    branch: str = "",
+    transcripts: TranscriptStore | None = None,
+) -> None:
+    """Run claude for ``item``, bouncing until the done token or ``max_keep_asking``.
+
+    Each launch (bounces and rate-limit retries included) is one transcript attempt.
+    """
+    base_prompt = item_prompt(item, cfg)
+
+    item_usage = ItemUsage(item.name)
+    if cfg.usage is not None:
+        cfg.usage.append(item_usage)
+    if cfg.budget_usage is not None:
+        cfg.budget_usage.append(item_usage)
+
+    # Run Claude and bounce up to max_keep_asking times if DONE token not seen
+    attempts = 0
+    done_seen = False
+    prompt_current = base_prompt
+    session_id: str | None = None
+    # The total timeout is claude's run time over every attempt; admission waits don't count
+    budget: float | None = float(cfg.claude_timeout) if cfg.claude_timeout > 0 else None
+    gate = admission.current()
+    retries = 0
+    launches = 0
+    while True:
+        if gate is not None:
+            with span("admission"):
+                await gate.admit()
+        launches += 1
+        transcript = (
+            transcripts.open(item.name, branch or slugify(item.name), launches)
+            if transcripts is not None
+            else None
+        )
+        res: ClaudeRunResult | None = None
+        started = time.monotonic()
+        deadline = started + budget if budget is not None else None
+        try:
+            with span("claude", attempt=attempts + 1) as sp:
+                res = await run_claude(
+                    cfg.claude_args,
+                    cfg.show_claude_output,
+                    cwd=cwd or Path.cwd(),
+                    prompt=prompt_current,
+                    done_token=cfg.task_done_message,
+                    row_index=row_index,
+                    output_format=cfg.headless_output_format,
+                    row_updater=row_updater,
+                    # Bounces continue the same conversation instead of starting cold
+                    resume=session_id if (attempts and cfg.bounce_resume) else None,
+                    deadline=deadline,
+                    stall_timeout=cfg.claude_stall_timeout,
+                    transcript=transcript,
+                )
+                sp.update(returncode=res.returncode, done=res.done_seen)
+            item_usage.attempts.append(res.usage or Usage())
+        except FileNotFoundError:
+            echo(tr("claude_not_found", cfg.lang), err=True)
+            raise typer.Exit(code=1) from None
+        finally:
+            if budget is not None:
+                budget = max(0.0, budget - (time.monotonic() - started))
+            if transcript is not None:
+                transcript.close(**_attempt_meta(res))
+        if res.timed_out:
+            echo(tr("claude_timed_out", cfg.lang, title=item.name, kind=res.timed_out), err=True)
+            if cfg.timed_out is not None:
+                cfg.timed_out.append(item.name)
+            # Keep partial work on the local branch (unpushed) so the checkout is clean
+            msg = f"wip: {item.name} (claude {res.timed_out} timeout)"
+            await commit_filtered(msg, cwd=cwd, exclude_paths=_excluded_paths(cfg))
+            raise ItemTimedOut(item.name)
+        if res.returncode != 0 and res.pressure and retries < cfg.rate_limit_retries:
+            # The admission controller already paused launches; retry the same attempt
+            retries += 1
+            echo(
+                tr(
+                    "claude_rate_limited",
+                    cfg.lang,
+                    title=item.name,
+                    kind=res.pressure,
+                    n=retries,
+                    max=cfg.rate_limit_retries,
+                ),
+                err=True,
+            )
+            continue
+        if res.returncode != 0:
+            if signals.ERROR not in res.signaled:
+                signals.emit(signals.ERROR)
+            echo(tr("claude_failed", cfg.lang, code=res.returncode), err=True)
+            raise typer.Exit(code=1)
+        if gate is not None and not res.pressure:
+            gate.note_success()
+        session_id = res.session_id or session_id
+        done_seen = res.done_seen or done_seen
+        if done_seen:
+            break
+        if attempts >= max(0, int(cfg.max_keep_asking)):
+            break
+        # Bounce with follow-up instruction (Japanese)
+        prompt_current = f"続けて。実装が終了し終わっていたら、{cfg.task_done_message}と返して。"
+        attempts += 1
+
+
+def _attempt_meta(res: ClaudeRunResult | None) -> dict:
+    """Index fields of a transcript attempt."""
+    if res is None:
+        # Cancelled, or claude could not be started
+        return {"aborted": True}
+    return {
+        "returncode": res.returncode,
+        "done": res.done_seen,
+        "timed_out": res.timed_out,
+        "pressure": res.pressure,
+        "session_id": res.session_id,
+    }
+
+
+@dataclass
+class PendingPublish:
+    """An item committed locally whose branch still needs pushing and a PR."""
+
+    item: TodoItem
+    branch: str
+    base: str | None = None
+
+
+async def open_pr_and_record(
+    item: TodoItem,
+    cfg: Config,
+    branch: str,
+    *,
+    cwd: Path,
+    journal: RunJournal | None = None,
+    base: str | None = None,
+    coalesce: bool = False,
+    transcripts: TranscriptStore | None = None,
+) -> str | None:
+    """Create the PR for ``branch``, record its URL and tick the item in ``cwd``'s TODO.
+
+    With ``coalesce`` the TODO write may be batched with other completions. The body
+    template's ``{transcript}`` is a summary of the item's claude transcripts.
+    """
+    state = journal.state(journal_key(item)) if journal is not None else None
+    if state is not None and state.reached("pr"):
+        # Opened by an interrupted run that did not get to tick the item
+        pr_url = state.pr_url
+    else:
+        pr_title = f"{cfg.github_pr_title_prefix}{item.name}"
+        transcript = transcripts.summary(branch) if transcripts is not None else ""
+        pr_body = cfg.github_pr_body_template.format(todo_item=item.name, transcript=transcript)
+        pr_base = base or cfg.git_base_branch
+        pr_url = await create_pr(pr_title, pr_body, pr_base, branch, cwd=cwd)
+        if pr_url:
+            await record_phase(journal, item, "pr", pr_url=pr_url)
+    if cfg.pr_urls is not None:
+        cfg.pr_urls.append(pr_url or "")
+
+    with span("todo update"):
+        await todo_writer(cwd / cfg.input_path).complete(item, pr_url, flush=not coalesce)
+
+    return pr_url
+
+
+async def publish_pending(
+    root: Path,
+    pending: list[PendingPublish],
+    cfg: Config,
+    journal: RunJournal | None = None,
+    transcripts: TranscriptStore | None = None,
+) -> None:
+    """Push every pending branch in one batch, then open PRs for those that made it."""
+    results = await push_branches(root, [p.branch for p in pending])
+    for p in pending:
+        if not results.get(p.branch):
+            echo(tr("push_failed", cfg.lang, branch=p.branch), err=True)
+            if cfg.push_failures is not None:
+                cfg.push_failures.append(p.branch)
+            continue
+        await record_phase(journal, p.item, "pushed")
+        await open_pr_and_record(
+            p.item,
+            cfg,
+            p.branch,
+            cwd=root,
+            journal=journal,
+            base=p.base,
+            coalesce=True,
+            transcripts=transcripts,
+        )
+
+
+def partial_clone_changes(filter_spec: str, remote: str = "origin") -> list[str]:
+    """The ``.git/config`` entries ``git fetch --filter`` writes to make ``remote`` a promisor."""
+    return [
+        "core.repositoryformatversion=1",
+        f"remote.{remote}.promisor=true",
+        f"remote.{remote}.partialclonefilter={filter_spec}",
+    ]
+
+
+def partial_clone_revert(changes: list[str], remote: str = "origin") -> list[str]:
+    """Commands that undo ``changes``: fetch the omitted objects, then drop the settings.
+
+    ``core.repositoryformatversion=1`` is left as is; it is valid without extensions.
+    """
+    keys = [c.split("=", 1)[0] for c in changes]
+    return [f"git fetch --refetch --no-filter {remote}"] + [
+        f"git config --unset {k}" for k in keys if k != "core.repositoryformatversion"
+    ]
+
+
+async def _local_config(root: Path) -> list[str]:
+    try:
+        return (await git("config", "--local", "--list", cwd=root)).splitlines()
+    except Exception:
+        return []
+
+
+async def enable_partial_clone(root: Path, cfg: Config, remote: str = "origin") -> None:
+    """Make ``remote`` a promisor so fetches omit objects matching the filter.
+
+    Missing blobs are then downloaded lazily, e.g. only for sparse-checkout paths.
+    This permanently changes the repository config, so it is only done with
+    ``partial_clone_convert``; otherwise the changes are printed and nothing happens.
+    A repository that already has a promisor remote is left alone.
+    """
+    filter_spec = cfg.partial_clone_filter
+    before = await _local_config(root)
+    if f"remote.{remote}.promisor=true" in before:
+        return
+    if not cfg.partial_clone_convert:
+        echo(color_warn(tr("partial_clone_opt_in", cfg.lang, filter=filter_spec, remote=remote)))
+        for change in partial_clone_changes(filter_spec, remote):
+            echo(f"  {change}")
+        return
+    # git registers the promisor remote itself, as `git clone --filter` would
+    await git("fetch", f"--filter={filter_spec}", remote, cwd=root)
+    changes = [c for c in await _local_config(root) if c not in before]
+    echo(color_info(tr("partial_clone_done", cfg.lang, filter=filter_spec, remote=remote)))
+    for change in changes:
+        echo(f"  {change}")
+    echo(tr("partial_clone_revert", cfg.lang))
+    for cmd in partial_clone_revert(changes, remote):
+        echo(f"  {cmd}")
+
+
+async def add_worktree(
+    root: Path,
+    path: Path,
+    branch: str,
+    base: str,
+    *,
+    sparse: list[str] | None = None,
+    fresh: bool = True,
+) -> None:
+    """``git worktree add -B``; with ``sparse`` only that cone is materialized.
+
+    With ``fresh=False`` the existing ``branch`` is checked out as-is instead.
+    """
+    target = ["-B", branch, str(path), base] if fresh else ["-f", str(path), branch]
+    async with _worktree_admin_lock():
+        await git("worktree", "add", "--no-checkout", *target, cwd=root)
+    # The checkout itself only touches the new worktree and can run concurrently
+    if sparse is None:
+        await git("reset", "-q", "--hard", cwd=path)
+        return
+    await switch_worktree(path, branch, base, sparse=sparse, sparse_mode=True, fresh=fresh)
+
+
+async def remove_worktree(root: Path, path: Path) -> None:
+    """``git worktree remove -f``, ignoring paths that are not worktrees."""
+    async with _worktree_admin_lock():
+        await git_quiet(["worktree", "remove", "-f", str(path)], cwd=root)
+
+
+# git reads every entry under .git/worktrees while adding or removing one and fails
+# on an entry another add has only half written ("failed to read .git/worktrees/<x>/
+# commondir"), so worktree administration is serialized per event loop.
+_WORKTREE_LOCKS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _worktree_admin_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _WORKTREE_LOCKS.get(loop)
+    if lock is None:
+        lock = _WORKTREE_LOCKS[loop] = asyncio.Lock()
+    return lock
+
+
+async def switch_worktree(
+    path: Path,
+    branch: str,
+    base: str,
+    *,
+    sparse: list[str] | None = None,
+    sparse_mode: bool = False,
+    fresh: bool = True,
+) -> None:
+    """Force ``path`` onto a new ``branch`` at ``base`` and drop untracked files.
+
+    In ``sparse_mode`` the cone is replaced first (``sparse=None`` disables it).
+    With ``fresh=False`` the existing ``branch`` is checked out without resetting it.
+    """
+    if sparse_mode:
+        if sparse:
+            await git("sparse-checkout", "set", "--cone", *sparse, cwd=path)
+        else:
+            await git("sparse-checkout", "disable", cwd=path)
+    if fresh:
+        await git("checkout", "-f", "-B", branch, base, cwd=path)
+    else:
+        # The branch may still be checked out in a worktree left by an interrupted run
+        await git("checkout", "-f", "--ignore-other-worktrees", branch, cwd=path)
+    await git("clean", "-ffd", cwd=path)
+
+
+async def _worktree_on_branch(path: Path, branch: str) -> bool:
+    """True if ``path`` is a worktree (not just a directory) checked out on ``branch``."""
+    if not (path / ".git").exists():
+        return False
+    try:
+        return await git("rev-parse", "--abbrev-ref", "HEAD", cwd=path) == branch
+    except Exception:
+        return False
+
+
+def _item_sparse_paths(item: TodoItem, cfg: Config) -> list[str] | None:
+    if not cfg.worktree_sparse:
+        return None
+    paths = item.sparse_paths
+    if paths is None:
+        paths = split_paths(cfg.sparse_paths)
+    # An empty cone means a full checkout
+    return paths or None
+
+
+class WorktreePool:
+    """Long-lived worktrees (``.worktrees/slot-N``), one per concurrently running item.
+
+    Between items a slot is force-switched to a fresh branch at the base tip and
+    cleaned of untracked files. Ignored files (build caches, dependencies) are kept
+    to avoid re-materializing them. Slots are registered in ``CREATED_WORKTREES``
+    and removed once at the end by ``_cleanup_created_worktrees``.
+    """
+
+    def __init__(self, root: Path, *, sparse_mode: bool = False):
+        self.root = root
+        self.sparse_mode = sparse_mode
+        self._free: list[Path] = []
+        self._count = 0
+        # Slots left by an interrupted run that hold a resumable item's work
+        self._reserved: set[Path] = set()
+
+    def reserve(self, path: Path) -> None:
+        """Keep ``path`` from being recreated as a new slot until it is adopted."""
+        self._reserved.add(path)
+
+    def adopt(self, path: Path) -> Path:
+        """Take over an existing worktree as-is; it joins the pool on release."""
+        self._reserved.discard(path)
+        with core.CREATED_WORKTREES_LOCK:
+            if path not in core.CREATED_WORKTREES:
+                core.CREATED_WORKTREES.append(path)
+        return path
+
+    async def _create(
+        self, branch: str, base: str, sparse: list[str] | None, *, fresh: bool = True
+    ) -> Path:
+        worktrees_dir = self.root / ".worktrees"
+        worktrees_dir.mkdir(exist_ok=True)
+        self._count += 1
+        path = worktrees_dir / f"slot-{self._count}"
+        while path in self._reserved:
+            self._count += 1
+            path = worktrees_dir / f"slot-{self._count}"
+        await remove_worktree(self.root, path)
+        # Sparse slots are always created without checkout so the cone can change later
+        await add_worktree(
+            self.root,
+            path,
+            branch,
+            base,
+            sparse=(sparse or []) if self.sparse_mode else None,
+            fresh=fresh,
+        )
+        with core.CREATED_WORKTREES_LOCK:
+            core.CREATED_WORKTREES.append(path)
+        return path
+
+    async def acquire(
+        self, branch: str, base: str, sparse: list[str] | None = None, *, fresh: bool = True
+    ) -> Path:
+        """Return a worktree checked out on a new ``branch`` at ``base``.
+
+        With ``fresh=False`` the existing ``branch`` is checked out unchanged.
+        """
+        while self._free:
+            path = self._free.pop()
+            try:
+                await switch_worktree(
+                    path, branch, base, sparse=sparse, sparse_mode=self.sparse_mode, fresh=fresh
+                )
+                return path
+            except subprocess.CalledProcessError as e:
+                # Broken slot: drop it and try the next one (or create a new one)
+                debug_log(f"discarding worktree slot {path}: {e}")
+                await self.discard(path)
+        return await self._create(branch, base, sparse, fresh=fresh)
+
+    def release(self, path: Path) -> None:
+        self._free.append(path)
+
+    async def discard(self, path: Path) -> None:
+        await remove_worktree(self.root, path)
+        with core.CREATED_WORKTREES_LOCK:
+            if path in core.CREATED_WORKTREES:
+                core.CREATED_WORKTREES.remove(path)
+
+
+async def process_in_worktree(
+    root: Path,
+    item: TodoItem,
+    cfg: Config,
+    *,
+    row_updater: Callable[[int, str, str, bool], None] | None = None,
+    row_index: int,
+    pool: WorktreePool | None = None,
+    pending: list[PendingPublish] | None = None,
+    journal: RunJournal | None = None,
+    base: str | None = None,
+    transcripts: TranscriptStore | None = None,
+    history: DurationHistory | None = None,
+) -> str | None:
+    """Run ``item`` in a worktree branched from ``base`` (default ``git_base_branch``).
+
+    Returns the item's branch once it is committed, or None if claude timed out.
+    ``history`` gets the item's duration if claude ran for it (see process_one_todo).
+    """
+    started = time.monotonic()
+    base = base or cfg.git_base_branch
+    state = await resume_state(journal, item, root)
+    if state is not None and state.reached("committed"):
+        # Only push/PR remain; they work on refs, so no worktree is needed
+        await process_one_todo(
+            item,
+            cfg,
+            cwd=root,
+            skip_branch_ensure=True,
+            branch_name=state.branch,
+            row_updater=row_updater,
+            row_index=row_index,
+            pending=pending,
+            journal=journal,
+            base=base,
+            transcripts=transcripts,
+        )
+        return state.branch
+
+    # An interrupted run's branch is resumed with its commits; otherwise a new one is
+    # made. A single slug names both the branch and the worktree path.
+    branch = item_branch(item, cfg, state)
+    slug = branch.removeprefix(cfg.git_branch_prefix)
+    fresh = state is None
+    old_path = Path(state.worktree) if state is not None and state.worktree else None
+
+    sparse = _item_sparse_paths(item, cfg)
+    await fetch_coordinator(root, cfg.fetch_ttl).ensure_fresh()
+    with span("worktree", pooled=pool is not None):
+        adopted = old_path is not None and await _worktree_on_branch(old_path, branch)
+        if old_path is not None and adopted:
+            # Still holds the interrupted run's (possibly uncommitted) work; use it as-is
+            if pool is not None:
+                wt_path = pool.adopt(old_path)
+            else:
+                wt_path = old_path
+                with core.CREATED_WORKTREES_LOCK:
+                    core.CREATED_WORKTREES.append(wt_path)
+        elif pool is not None:
+            wt_path = await pool.acquire(branch, base, sparse, fresh=fresh)
+        else:
+            worktrees_dir = root / ".worktrees"
+            worktrees_dir.mkdir(exist_ok=True)
+            wt_path = worktrees_dir / slug
+            # Remove any existing directory silently if it is a registered worktree
+            await remove_worktree(root, wt_path)
+            # Create the worktree bound to branch based on base branch tip
+            await add_worktree(root, wt_path, branch, base, sparse=sparse, fresh=fresh)
+            # Register created worktree for cleanup
+            with core.CREATED_WORKTREES_LOCK:
+                core.CREATED_WORKTREES.append(wt_path)
+    if state is None or not (adopted and state.reached("claude_done")):
+        # Without the old worktree, claude's uncommitted output is lost; redo from claude
+        await record_phase(journal, item, "branch", branch=branch, worktree=str(wt_path))
+
+    try:
+        # Do NOT switch to base/main inside the worktree; it's already on the new branch
+        try:
+            pr_url = await process_one_todo(
+                item,
+                cfg,
+                cwd=wt_path,
+                skip_branch_ensure=True,
+                branch_name=branch,
+                row_updater=row_updater,
+                row_index=row_index,
+                pending=pending,
+                journal=journal,
+                base=base,
+                transcripts=transcripts,
+                history=history,
+                started=started,
+            )
+        except ItemTimedOut:
+            # Already reported; free the slot so the rest of the queue keeps moving
+            return None
+
+        # After worktree completes, update the ROOT TODO.md with a check and PR URL
+        # (batched items are ticked by publish_pending instead)
+        if pending is None:
+            try:
+                with span("todo update (root)"):
+                    # Completions from all workers are coalesced into few writes
+                    await todo_writer(root / cfg.input_path).complete(item, pr_url)
+            except Exception:
+                # Best-effort; ignore errors updating the shared TODO
+                pass
+        return branch
+    finally:
+        if pool is not None:
+            # Keep the slot for the next item; it is reset on acquire
+            pool.release(wt_path)
+        else:
+            # Always attempt to remove the worktree (shielded so cancellation still cleans up)
+            try:
+                with span("worktree remove"):
+                    await asyncio.shield(remove_worktree(root, wt_path))
+            except asyncio.CancelledError:
+                pass
+            with core.CREATED_WORKTREES_LOCK:
+                if wt_path in core.CREATED_WORKTREES:
+                    core.CREATED_WORKTREES.remove(wt_path)
+
+
+def worker_semaphore(
+    root: Path, cfg: Config
+) -> tuple[asyncio.Semaphore | AdjustableSemaphore, asyncio.Task | None]:
+    """Semaphore capping running items, plus its resizing task with adaptive concurrency.
+
+    The caller cancels the task when the run ends.
+    """
+    workers = max(1, int(cfg.worktree_parallel_max_semaphore))
+    if not cfg.adaptive_concurrency:
+        return asyncio.Semaphore(workers), None
+    # Start small and let the controller grow the pool while the machine keeps up
+    sem = AdjustableSemaphore(min(workers, max(1, int(cfg.min_workers))))
+    controller = asyncio.create_task(
+        ConcurrencyController(
+            sem,
+            min_workers=cfg.min_workers,
+            max_workers=workers,
+            max_load_per_cpu=cfg.max_load_per_cpu,
+            min_free_memory_mb=cfg.min_free_memory_mb,
+            min_free_disk_mb=cfg.min_free_disk_mb,
+            interval=cfg.adapt_interval,
+            probe=lambda: sample_system(root),
+        ).run()
+    )
+    return sem, controller
+
+
+async def run_worktree_parallel(
+    root: Path,
+    items: list[TodoItem],
+    cfg: Config,
+    *,
+    row_updater: Callable[[int, str, str, bool], None] | None = None,
+    shared_sem: asyncio.Semaphore | AdjustableSemaphore | None = None,
+    lanes: list[int] | None = None,
+) -> None:
+    """Process all items in worktrees, at most ``worktree_parallel_max_semaphore`` at a time.
+
+    Items wait for their ``(after: ...)`` prerequisites before taking a worker slot.
+    The first failing item cancels the remaining ones and its exception is re-raised.
+    With ``shared_sem`` (and its trace ``lanes``), items also need a slot of that
+    pool, which other runs draw from too.
+    """
+    deps = _resolve_dependencies(items, cfg)
+    history = open_history(root, cfg)
+    order = _dispatch_order(items, deps, cfg, history)
+    workers = max(1, int(cfg.worktree_parallel_max_semaphore))
+    sem: asyncio.Semaphore | AdjustableSemaphore
+    controller: asyncio.Task | None = None
+    if shared_sem is None:
+        sem, controller = worker_semaphore(root, cfg)
+    else:
+        # The shared pool adapts (if asked to); this run's cap is fixed
+        sem = asyncio.Semaphore(workers)
+    outer = shared_sem if shared_sem is not None else contextlib.nullcontext()
+    if cfg.partial_clone_filter:
+        await enable_partial_clone(root, cfg)
+    # Fetch once up front; items only refetch after fetch_ttl expires
+    await fetch_coordinator(root, cfg.fetch_ttl).ensure_fresh()
+    pool = WorktreePool(root, sparse_mode=cfg.worktree_sparse) if cfg.worktree_reuse else None
+    pending: list[PendingPublish] | None = [] if cfg.batch_push else None
+    journal = open_journal(root, cfg, items)
+    transcripts = open_transcripts(root, cfg)
+    if pool is not None and journal is not None:
+        for item in items:
+            state = journal.state(journal_key(item))
+            if state is not None and state.worktree:
+                pool.reserve(Path(state.worktree))
+    # Trace tracks: each running item takes the lowest free worker number
+    free_lanes = lanes if lanes is not None else list(range(1, workers + 1))
+    # Resolved with an item's branch once it is committed, or None if it did not finish
+    loop = asyncio.get_running_loop()
+    finished: list[asyncio.Future[str | None]] = [loop.create_future() for _ in items]
+
+    async def _worker(index: int, item: TodoItem) -> None:
+        branch: str | None = None
+        try:
+            base = _base_after_prereqs(item, [await finished[j] for j in deps[index]], cfg)
+            if base is None:
+                return
+            # This run's cap first, so a capped run does not hold shared slots
+            async with sem, outer:
+                # Items already running finish, but no new one starts past the budget
+                if _skip_for_budget(item, cfg):
+                    return
+                lane = heapq.heappop(free_lanes)
+                set_lane(lane, f"worker {lane}")
+                try:
+                    with span("item", title=item.name):
+                        branch = await process_in_worktree(
+                            root,
+                            item,
+                            cfg,
+                            row_updater=row_updater,
+                            row_index=index,
+                            pool=pool,
+                            pending=pending,
+                            journal=journal,
+                            base=base,
+                            transcripts=transcripts,
+                            history=history,
+                        )
+                finally:
+                    heapq.heappush(free_lanes, lane)
+        finally:
+            if not finished[index].done():
+                finished[index].set_result(branch)
+
+    try:
+        with admission.shared(AdmissionController.from_config(cfg)):
+            # Workers queue for the semaphore in creation order, i.e. the schedule's order
+            tasks = [asyncio.create_task(_worker(i, items[i])) for i in order]
+            try:
+                for fut in asyncio.as_completed(tasks):
+                    await fut
+            finally:
+                if controller is not None:
+                    tasks.append(controller)
+                for t in tasks:
+                    t.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        if pending:
+            await publish_pending(root, pending, cfg, journal, transcripts)
+    finally:
+        await close_todo_writers(root)
+        await close_transcripts(transcripts, cfg)
+
+
+async def run_repos(runs: list[tuple[Path, list[TodoItem], Config]], cfg: Config) -> list[str]:
+    """Run several repositories' items on one pool of ``cfg``'s worker count.
+
+    Each repository keeps its own cap (its config's ``worktree_parallel_max_semaphore``),
+    worktrees, journal and report lists. Claude launches share one admission gate and
+    gh is probed once. A failing repository does not stop the others; returns the
+    roots of those that failed.
+    """
+    sem, controller = worker_semaphore(runs[0][0], cfg)
+    lanes = list(range(1, max(1, int(cfg.worktree_parallel_max_semaphore)) + 1))
+    failed: list[str] = []
+    try:
+        with admission.shared(AdmissionController.from_config(cfg)):
+            results = await asyncio.gather(
+                *(
+                    run_worktree_parallel(root, items, repo_cfg, shared_sem=sem, lanes=lanes)
+                    for root, items, repo_cfg in runs
+                ),
+                return_exceptions=True,
+            )
+    finally:
+        if controller is not None:
+            controller.cancel()
+            await asyncio.gather(controller, return_exceptions=True)
+    for (root, _, repo_cfg), res in zip(runs, results, strict=True):
+        if isinstance(res, asyncio.CancelledError):
+            raise res
+        if isinstance(res, BaseException):
+            error = res.__class__.__name__ if isinstance(res, typer.Exit) else res
+            echo(tr("repo_failed", repo_cfg.lang, repo=str(root), error=error), err=True)
+            failed.append(str(root))
+    return failed
+
+
+async def run_sequential(root: Path, items: list[TodoItem], cfg: Config) -> None:
+    """Process items one by one on branches of the root checkout.
+
+    Items run in ``cfg.schedule`` order, except that ``(after: ...)`` prerequisites go first.
+    """
+    deps = _resolve_dependencies(items, cfg)
+    history = open_history(root, cfg)
+    order = _dispatch_order(items, deps, cfg, history)
+    pending: list[PendingPublish] | None = [] if cfg.batch_push else None
+    journal = open_journal(root, cfg, items)
+    transcripts = open_transcripts(root, cfg)
+    finished: dict[int, str | None] = {}
+    try:
+        # --cooldown spaces out claude launches through the shared admission controller
+        with admission.shared(AdmissionController.from_config(cfg)):
+            for idx in order:
+                item = items[idx]
+                finished[idx] = None
+                base = _base_after_prereqs(item, [finished[j] for j in deps[idx]], cfg)
+                if base is None or _skip_for_budget(item, cfg):
+                    continue
+                echo(color_info(tr("processing", cfg.lang, title=item.name)))
+                branch = item_branch(item, cfg, await resume_state(journal, item, root))
+                try:
+                    with span("item", title=item.name):
+                        await process_one_todo(
+                            item,
+                            cfg,
+                            cwd=root,
+                            branch_name=branch,
+                            row_index=idx,
+                            pending=pending,
+                            journal=journal,
+                            base=base,
+                            transcripts=transcripts,
+                            history=history,
+                        )
+                    finished[idx] = branch
+                except ItemTimedOut:
+                    pass
+        if pending:
+            await publish_pending(root, pending, cfg, journal, transcripts)
+    finally:
+        await close_todo_writers()
+        await close_transcripts(transcripts, cfg)
@@ -0,0 +1,134 @@
+"""Line framing for claude's output pipe, on raw byte chunks.
+
+The engine reads the pipe in large chunks instead of line by line. :class:`LineFramer`
+splits them at newlines with ``bytes.find`` and runs a :class:`TokenMatcher` over
+every piece. The done token and the other patterns are therefore found even when a
+chunk boundary cuts them in two. A line is only buffered while the consumer wants it
+(decided from its first :data:`HEAD_BYTES`) and while it fits in ``max_line_bytes``.
+Huge tool output is counted and searched, but never held in memory.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+# Bytes kept from the start of every line, enough to classify a stream-json event
+HEAD_BYTES = 256
+
+
+class TokenMatcher:
+    """Streaming search for several byte patterns across chunk boundaries.
+
+    Each pattern is looked for with ``bytes.__contains__`` in every chunk, and in the
+    seam between the previous chunk's tail and the new chunk's start. The patterns
+    are few, so this is faster than a pure-Python multi-pattern automaton.
+    """
+
+    def __init__(self, patterns: Iterable[bytes]):
+        self.patterns = tuple(dict.fromkeys(p for p in patterns if p))
+        self._keep = max((len(p) for p in self.patterns), default=1) - 1
+        self._tail = b""
+        self.found: set[bytes] = set()
+
+    def feed(self, data: bytes) -> None:
+        if not self.patterns or not data:
+            return
+        seam = self._tail + data[: self._keep] if self._tail else b""
+        for p in self.patterns:
+            if p not in self.found and (p in data or p in seam):
+                self.found.add(p)
+        keep = self._keep
+        if keep:
+            self._tail = data[-keep:] if len(data) >= keep else (self._tail + data)[-keep:]
+
+    def reset(self) -> None:
+        self._tail = b""
+        self.found = set()
+
+
+@dataclass
+class Frame:
+    """One output line."""
+
+    head: bytes  # the first HEAD_BYTES bytes
+    size: int  # length in bytes, without the newline
+    # The whole line, or None if it was not wanted or longer than max_line_bytes
+    data: bytes | None
+    matches: frozenset[bytes] = field(default_factory=frozenset)
+
+
+class LineFramer:
+    """Split byte chunks into :class:`Frame` objects with bounded memory per line.
+
+    ``want(head)`` tells whether a line whose first :data:`HEAD_BYTES` are ``head``
+    should be kept in full (short lines are always kept; they cost nothing extra).
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[bytes] = (),
+        *,
+        max_line_bytes: int = 8 << 20,
+        want: Callable[[bytes], bool] | None = None,
+    ):
+        self.max_line_bytes = max(HEAD_BYTES, int(max_line_bytes))
+        self.want = want
+        self._matcher = TokenMatcher(patterns)
+        self._head = b""
+        self._parts: list[bytes] | None = []
+        self._size = 0
+        # Lines longer than max_line_bytes that had to be dropped from memory
+        self.oversized = 0
+
+    def feed(self, chunk: bytes) -> list[Frame]:
+        frames: list[Frame] = []
+        pos = 0
+        n = len(chunk)
+        while pos < n:
+            nl = chunk.find(b"\n", pos)
+            if nl < 0:
+                self._extend(chunk[pos:] if pos else chunk)
+                break
+            self._extend(chunk[pos:nl])
+            frames.append(self._finish())
+            pos = nl + 1
+        return frames
+
+    def close(self) -> list[Frame]:
+        """The last line if the output did not end with a newline."""
+        return [self._finish()] if self._size else []
+
+    def _extend(self, seg: bytes) -> None:
+        if not seg:
+            return
+        self._matcher.feed(seg)
+        head_was_short = len(self._head) < HEAD_BYTES
+        if head_was_short:
+            self._head += seg[: HEAD_BYTES - len(self._head)]
+        self._size += len(seg)
+        parts = self._parts
+        if parts is None:
+            return
+        if self._size > self.max_line_bytes:
+            self._parts = None
+            self.oversized += 1
+        elif (
+            head_was_short
+            and len(self._head) >= HEAD_BYTES
+            and self.want is not None
+            and not self.want(self._head)
+        ):
+            self._parts = None
+        else:
+            parts.append(seg)
+
+    def _finish(self) -> Frame:
+        parts = self._parts
+        data = None if parts is None else parts[0] if len(parts) == 1 else b"".join(parts)
+        frame = Frame(self._head, self._size, data, frozenset(self._matcher.found))
+        self._head = b""
+        self._parts = []
+        self._size = 0
+        self._matcher.reset()
+        return frame
@@ -0,0 +1,131 @@
+"""Local history of item durations (``.claude-manager/durations.jsonl``).
+
+Each finished item appends its wall-clock seconds together with the features the
+size estimate uses (title words, child count, prompt length). Estimates for new
+items come from earlier items with similar titles, or else from the child count and
+prompt length scaled by the seconds-per-unit observed so far.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Entries kept when the file is rewritten
+HISTORY_LIMIT = 500
+# Minimum Jaccard similarity of title words for an entry to count as "similar"
+SIMILAR_TITLE = 0.5
+# Seconds per size unit before any history exists
+DEFAULT_SECONDS_PER_UNIT = 60.0
+
+_WORD = re.compile(r"\w+")
+
+
+def title_words(title: str) -> frozenset[str]:
+    return frozenset(w.lower() for w in _WORD.findall(title))
+
+
+def size_units(children: int, prompt_chars: int) -> float:
+    """Relative size of an item from its shape alone."""
+    return 1.0 + 0.5 * children + prompt_chars / 1000
+
+
+@dataclass
+class DurationRecord:
+    title: str
+    children: int
+    prompt_chars: int
+    seconds: float
+
+    @property
+    def units(self) -> float:
+        return size_units(self.children, self.prompt_chars)
+
+
+class DurationHistory:
+    """Durations loaded from and appended to ``path`` (None: kept in memory only)."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: list[DurationRecord] = []
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                rec = json.loads(line)
+                self.records.append(
+                    DurationRecord(
+                        str(rec["title"]),
+                        int(rec["children"]),
+                        int(rec["prompt_chars"]),
+                        float(rec["seconds"]),
+                    )
+                )
+            except (ValueError, KeyError, TypeError):
+                continue
+        if len(self.records) > 2 * HISTORY_LIMIT:
+            self._rewrite(self.records[-HISTORY_LIMIT:])
+
+    def _rewrite(self, records: list[DurationRecord]) -> None:
+        assert self.path is not None
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(self._line(r))
+        tmp.replace(self.path)
+        self.records = records
+
+    @staticmethod
+    def _line(r: DurationRecord) -> str:
+        rec = {
+            "t": round(time.time(), 3),
+            "title": r.title,
+            "children": r.children,
+            "prompt_chars": r.prompt_chars,
+            "seconds": round(r.seconds, 3),
+        }
+        return json.dumps(rec, ensure_ascii=False) + "\n"
+
+    def record(self, title: str, children: int, prompt_chars: int, seconds: float) -> None:
+        r = DurationRecord(title, children, prompt_chars, seconds)
+        with self._lock:
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(self._line(r))
+            self.records.append(r)
+
+    def seconds_per_unit(self) -> float:
+        if not self.records:
+            return DEFAULT_SECONDS_PER_UNIT
+        return statistics.median(r.seconds / r.units for r in self.records)
+
+    def estimate(self, title: str, children: int, prompt_chars: int) -> float:
+        """Expected seconds for an item with this title and shape."""
+        words = title_words(title)
+        weighted = total = 0.0
+        for r in self.records:
+            other = title_words(r.title)
+            if not words or not other:
+                continue
+            sim = len(words & other) / len(words | other)
+            if sim >= SIMILAR_TITLE:
+                # Scale a similar item's time by the size difference
+                weighted += sim * r.seconds * size_units(children, prompt_chars) / r.units
+                total += sim
+        if total:
+            return weighted / total
+        return size_units(children, prompt_chars) * self.seconds_per_unit()
@@ -0,0 +1,108 @@
+"""Append-only run journal (``.claude-manager/state.jsonl``).
+
+Each line records that one TODO item reached a phase. A rerun after a crash reads
+the journal and skips phases that already completed, reusing the recorded branch.
+
+Every append is fsynced, so the engine calls :meth:`RunJournal.record` from a worker
+thread (``engine.record_phase``) rather than on the event loop.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Phases in pipeline order
+PHASES = ("branch", "claude_done", "committed", "pushed", "pr")
+_FIELDS = ("branch", "worktree", "pr_url")
+
+
+@dataclass
+class ItemState:
+    phase: str | None = None
+    branch: str | None = None
+    worktree: str | None = None
+    pr_url: str | None = None
+
+    def reached(self, phase: str) -> bool:
+        """True if the item completed ``phase`` (or a later one)."""
+        if self.phase is None:
+            return False
+        return PHASES.index(self.phase) >= PHASES.index(phase)
+
+
+class RunJournal:
+    """Per-item phase log keyed by the TODO item's tree id (its title if it has none)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._states: dict[str, ItemState] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write; ignore it
+                continue
+            if isinstance(rec, dict) and rec.get("phase") in PHASES and rec.get("item"):
+                self._apply(rec)
+
+    def _apply(self, rec: dict) -> None:
+        item = str(rec["item"])
+        if rec["phase"] == "branch":
+            # A (re)created branch starts the item's pipeline over
+            self._states[item] = ItemState()
+        st = self._states.setdefault(item, ItemState())
+        if st.phase is None or PHASES.index(rec["phase"]) >= PHASES.index(st.phase):
+            st.phase = rec["phase"]
+        for key in _FIELDS:
+            if rec.get(key):
+                setattr(st, key, rec[key])
+
+    def state(self, item: str) -> ItemState | None:
+        with self._lock:
+            return self._states.get(item)
+
+    def record(self, item: str, phase: str, **data) -> None:
+        """Append ``phase`` for ``item`` and fsync so it survives a crash."""
+        if phase not in PHASES:
+            raise ValueError(f"unknown phase: {phase}")
+        rec = {"t": round(time.time(), 3), "item": item, "phase": phase}
+        rec.update({k: v for k, v in data.items() if v is not None})
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(rec)
+
+    def compact(self, keep: set[str]) -> None:
+        """Atomically rewrite the journal with one line per item in ``keep``."""
+        with self._lock:
+            self._states = {k: v for k, v in self._states.items() if k in keep}
+            if not self.path.exists():
+                return
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for item, st in self._states.items():
+                    rec = {"item": item, "phase": st.phase}
+                    for key in _FIELDS:
+                        if getattr(st, key):
+                            rec[key] = getattr(st, key)
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
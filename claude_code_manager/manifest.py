@@ -0,0 +1,115 @@
+"""Manifest of repositories for one multi-repository run (``run --manifest``).
+
+A TOML file with one ``[[repo]]`` table per repository::
+
+    [[repo]]
+    path = "../billing"        # relative to the manifest
+    input_path = "TODO.md"     # default: --input
+    max_workers = 2            # this repo's share of the global -s workers
+
+    [[repo]]
+    path = "../search"
+    git_base_branch = "develop"
+
+Every other key is a ``[claude_manager]`` setting for that repository only. It
+overrides the repository's own ``.claude-manager.toml``, which overrides the command
+line options.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .core import Config, load_config_toml
+
+# Settings that stay global: they describe the shared pool, not a repository
+GLOBAL_KEYS = frozenset(
+    {
+        "worktree_parallel",
+        "worktree_parallel_max_semaphore",
+        "adaptive_concurrency",
+        "min_workers",
+        "cooldown",
+        "launches_per_minute",
+        "launch_burst",
+        "max_cost_usd",
+        "trace_path",
+        "summary_path",
+    }
+)
+
+
+class ManifestError(ValueError):
+    pass
+
+
+@dataclass
+class RepoSpec:
+    path: Path
+    max_workers: int | None = None
+    settings: dict = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+def load_manifest(path: Path) -> list[RepoSpec]:
+    try:
+        data = tomllib.loads(path.read_text(encoding="utf-8"))
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ManifestError(f"{path}: {e}") from None
+    entries = data.get("repo")
+    if not isinstance(entries, list) or not entries:
+        raise ManifestError(f"{path}: no [[repo]] entries")
+    known = {f.name for f in dataclasses.fields(Config)}
+    specs: list[RepoSpec] = []
+    for n, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not entry.get("path"):
+            raise ManifestError(f"{path}: repo #{n} has no path")
+        settings = {k: v for k, v in entry.items() if k not in ("path", "max_workers")}
+        unknown = sorted(set(settings) - known)
+        if unknown:
+            raise ManifestError(f"{path}: repo #{n}: unknown settings {', '.join(unknown)}")
+        fixed = sorted(set(settings) & GLOBAL_KEYS)
+        if fixed:
+            raise ManifestError(f"{path}: repo #{n}: {', '.join(fixed)} can only be set globally")
+        repo = (path.parent / str(entry["path"])).resolve()
+        if not repo.is_dir():
+            raise ManifestError(f"{path}: repo #{n}: {repo} is not a directory")
+        max_workers = entry.get("max_workers")
+        specs.append(RepoSpec(repo, int(max_workers) if max_workers else None, settings))
+    if len({s.path for s in specs}) != len(specs):
+        raise ManifestError(f"{path}: a repository is listed twice")
+    return specs
+
+
+def repo_config(cfg: Config, spec: RepoSpec) -> Config:
+    """``cfg`` with the repository's own config file and manifest settings applied.
+
+    Report lists start empty so every repository is reported on its own; claude
+    usage is also added to ``cfg.usage``, which ``max_cost_usd`` caps for the whole run.
+    """
+    if cfg.usage is None:
+        cfg.usage = []
+    repo_cfg = dataclasses.replace(
+        cfg,
+        pr_urls=[],
+        push_failures=[],
+        timed_out=[],
+        usage=[],
+        budget_usage=cfg.usage,
+        budget_skipped=[],
+        blocked=[],
+    )
+    conf = load_config_toml(spec.path / cfg.config_path).get("claude_manager") or {}
+    for k, v in {**conf, **spec.settings}.items():
+        if hasattr(repo_cfg, k) and k not in GLOBAL_KEYS:
+            setattr(repo_cfg, k, v)
+    # This repository's cap within the shared pool
+    workers = max(1, int(cfg.worktree_parallel_max_semaphore))
+    repo_cfg.worktree_parallel_max_semaphore = min(workers, spec.max_workers or workers)
+    return repo_cfg
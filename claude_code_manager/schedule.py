@@ -0,0 +1,135 @@
+"""Dependency graph of TODO items.
+
+An item names its prerequisites with a trailing ``(after: <title or id>)`` marker;
+items can be given a short ``(id: <id>)`` to refer to. Several prerequisites are
+separated by commas. References to items that are not open in the TODO file
+(e.g. already checked off) are treated as satisfied.
+
+Within those constraints a scheduling policy picks the order: ``file`` keeps the
+TODO file order, ``longest-first`` starts the items with the longest estimated
+remaining chain first (cuts the makespan with several workers), and
+``shortest-first`` starts the smallest estimated items first.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import TodoItem
+
+SCHEDULE_POLICIES = ("file", "longest-first", "shortest-first")
+
+
+class DependencyCycle(ValueError):
+    def __init__(self, titles: list[str]):
+        super().__init__(" -> ".join(titles))
+        self.titles = titles
+
+
+def resolve_dependencies(items: list[TodoItem]) -> tuple[list[list[int]], list[str]]:
+    """Return prerequisite indices for every item and the references that matched nothing.
+
+    Raises :class:`DependencyCycle` if the items cannot be ordered.
+    """
+    by_ref: dict[str, int] = {}
+    for i, item in enumerate(items):
+        by_ref.setdefault(item.name, i)
+    for i, item in enumerate(items):
+        # Ids win over titles
+        if item.item_id:
+            by_ref[item.item_id] = i
+
+    deps: list[list[int]] = []
+    unknown: list[str] = []
+    for i, item in enumerate(items):
+        raw = item.after
+        refs = [] if raw is None else [raw] if raw in by_ref else raw.split(",")
+        prereqs: list[int] = []
+        for ref in (r.strip() for r in refs):
+            j = by_ref.get(ref)
+            if j is None:
+                if ref:
+                    unknown.append(ref)
+            elif j == i:
+                raise DependencyCycle([item.name, item.name])
+            elif j not in prereqs:
+                prereqs.append(j)
+        deps.append(prereqs)
+    topological_order(items, deps)
+    return deps, unknown
+
+
+def _dependents(deps: list[list[int]]) -> list[list[int]]:
+    dependents: list[list[int]] = [[] for _ in deps]
+    for i, prereqs in enumerate(deps):
+        for j in prereqs:
+            dependents[j].append(i)
+    return dependents
+
+
+def topological_order(
+    items: list[TodoItem],
+    deps: list[list[int]],
+    key: Callable[[int], float] | None = None,
+) -> list[int]:
+    """Indices ordered so prerequisites come first.
+
+    Among items that are ready, the lowest ``key(index)`` goes first (file order
+    breaks ties, and is the order without a key).
+    """
+    remaining = [len(d) for d in deps]
+    dependents = _dependents(deps)
+    prio = key or (lambda i: 0.0)
+    ready = [(prio(i), i) for i, n in enumerate(remaining) if n == 0]
+    heapq.heapify(ready)
+    order: list[int] = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.append(i)
+        for k in dependents[i]:
+            remaining[k] -= 1
+            if remaining[k] == 0:
+                heapq.heappush(ready, (prio(k), k))
+    if len(order) < len(items):
+        raise DependencyCycle(_find_cycle(items, deps, set(order)))
+    return order
+
+
+def _find_cycle(items: list[TodoItem], deps: list[list[int]], ordered: set[int]) -> list[str]:
+    # Every unordered item has an unordered prerequisite, so walking them must loop
+    i = next(k for k in range(len(items)) if k not in ordered)
+    seen: list[int] = []
+    while i not in seen:
+        seen.append(i)
+        i = next(j for j in deps[i] if j not in ordered)
+    cycle = seen[seen.index(i) :] + [i]
+    return [items[k].name for k in cycle]
+
+
+def chain_lengths(
+    items: list[TodoItem], deps: list[list[int]], estimates: list[float]
+) -> list[float]:
+    """Each item's estimate plus the longest chain of dependents waiting on it."""
+    dependents = _dependents(deps)
+    lengths = list(estimates)
+    # Dependents come later in a topological order, so walk it backwards
+    for i in reversed(topological_order(items, deps)):
+        lengths[i] += max((lengths[k] for k in dependents[i]), default=0.0)
+    return lengths
+
+
+def schedule_order(
+    items: list[TodoItem], deps: list[list[int]], policy: str, estimates: list[float]
+) -> list[int]:
+    """Dispatch order for ``policy`` (one of :data:`SCHEDULE_POLICIES`)."""
+    if policy == "longest-first":
+        chains = chain_lengths(items, deps, estimates)
+        return topological_order(items, deps, key=lambda i: -chains[i])
+    if policy == "shortest-first":
+        return topological_order(items, deps, key=lambda i: estimates[i])
+    if policy == "file":
+        return topological_order(items, deps)
+    raise ValueError(f"unknown schedule policy: {policy}")
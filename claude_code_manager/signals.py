@@ -0,0 +1,111 @@
+"""Process-wide pressure signals from claude runs (errors, overload, rate limits).
+
+``run_claude`` emits a signal for each stream event that reports an API problem and
+for non-zero exits; controllers that pace the run subscribe to them.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+
+from .stream_json import StreamEvent
+
+RATE_LIMIT = "rate_limit"
+OVERLOADED = "overloaded"
+ERROR = "error"
+
+# How claude words a failed API request in the text of an error event
+_API_ERROR = re.compile(
+    r'API Error: (\d{3})\b|\\?"type\\?":\s*\\?"(rate_limit_error|overloaded_error)\\?"'
+)
+# Top-level "error" of the assistant message claude synthesizes for a failed request
+_ERROR_FIELD_KINDS = {"rate_limit": RATE_LIMIT, "overloaded": OVERLOADED}
+
+_LISTENERS: list[Callable[[str], None]] = []
+
+
+def _kind_from_text(text: str) -> str | None:
+    m = _API_ERROR.search(text)
+    if m is None:
+        return None
+    code, kind = m.groups()
+    if code == "429" or kind == "rate_limit_error":
+        return RATE_LIMIT
+    if code == "529" or kind == "overloaded_error":
+        return OVERLOADED
+    if code and code.startswith("5"):
+        return ERROR
+    return None
+
+
+def _api_error_message(ev: StreamEvent) -> tuple[str | None, str] | None:
+    """(error field, text) if ``ev`` is an assistant message claude marked as an API error.
+
+    Claude marks the messages it synthesizes for a failed request (``error``,
+    ``isApiErrorMessage`` or the ``<synthetic>`` model); model output is never marked.
+    """
+    line = ev.line
+    if '"error"' not in line and "isApiErrorMessage" not in line and "<synthetic>" not in line:
+        return None
+    try:
+        obj = ev.json()
+    except ValueError:
+        return None
+    if not isinstance(obj, dict):
+        return None
+    message = obj.get("message") if isinstance(obj.get("message"), dict) else {}
+    error = obj.get("error") if isinstance(obj.get("error"), str) else None
+    if error is None and obj.get("isApiErrorMessage") is not True:
+        if message.get("model") != "<synthetic>":
+            return None
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(
+            str(b.get("text", ""))
+            for b in content
+            if isinstance(b, dict) and b.get("type") == "text"
+        )
+    return error, content if isinstance(content, str) else ""
+
+
+def classify(ev: StreamEvent) -> str | None:
+    """Return the pressure signal carried by ``ev``, if any.
+
+    Only events claude reports as failures count: error ``result`` events, ``error``
+    events and assistant messages it marked as API errors. Text that merely
+    mentions an API error (model output, tool input or output) never does.
+    """
+    if ev.type == "result":
+        if ev.fields.get("is_error") or (ev.subtype or "").startswith("error"):
+            return _kind_from_text(ev.line) or ERROR
+        return None
+    if ev.type == "error":
+        return _kind_from_text(ev.line) or ERROR
+    if ev.type == "assistant":
+        marked = _api_error_message(ev)
+        if marked is None:
+            return None
+        error, text = marked
+        return _ERROR_FIELD_KINDS.get(error or "") or _kind_from_text(text) or ERROR
+    return None
+
+
+def subscribe(listener: Callable[[str], None]) -> Callable[[], None]:
+    """Call ``listener(kind)`` for every signal; returns an unsubscribe function."""
+    _LISTENERS.append(listener)
+
+    def _unsubscribe() -> None:
+        if listener in _LISTENERS:
+            _LISTENERS.remove(listener)
+
+    return _unsubscribe
+
+
+def emit(kind: str) -> None:
+    for listener in list(_LISTENERS):
+        listener(kind)
+
+
+def active() -> bool:
+    return bool(_LISTENERS)
@@ -0,0 +1,226 @@
+"""Lightweight decoder for Claude ``--output-format stream-json`` lines.
+
+Bulk events (``assistant``/``user``) are classified from their leading ``"type"`` key
+alone. Other events are small and rare (``system`` init, ``result``), so their top
+level is scanned; nested values are skipped with C-level regex matches instead of
+being decoded. The complete object is decoded lazily via :meth:`StreamEvent.json`.
+
+:meth:`StreamDecoder.decode_frame` takes lines framed from raw pipe chunks
+(:mod:`.framing`); bulk lines that were not kept in memory are classified from
+their first bytes alone.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .framing import Frame
+
+# Top-level string values we decode; other string values are skipped
+WANTED_STRINGS = frozenset({"type", "subtype", "session_id"})
+# Top-level object values we decode (small, e.g. the result event's usage block)
+WANTED_OBJECTS = frozenset({"usage"})
+# Event types classified from the leading "type" key without scanning the rest
+BULK_TYPES = frozenset({"assistant", "user"})
+# Event types whose text may legitimately carry the done token
+_NO_DONE_TYPES = frozenset({"user"})
+
+_TYPE_FIRST = re.compile(r'[ \t]*\{[ \t]*"type"[ \t]*:[ \t]*"([A-Za-z_]*)"')
+_TYPE_FIRST_BYTES = re.compile(rb'[ \t]*\{[ \t]*"type"[ \t]*:[ \t]*"([A-Za-z_]*)"')
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"', re.S)
+_SCALAR = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|true|false|null")
+_STRUCT = re.compile(r'["{}\[\]]')
+_LITERALS: dict[str, Any] = {"true": True, "false": False, "null": None}
+
+
+class StreamEvent:
+    """Summary of one stream-json line."""
+
+    __slots__ = ("line", "is_json", "type", "subtype", "session_id", "usage", "fields", "done")
+
+    def __init__(self, line: str):
+        self.line = line
+        self.is_json = False
+        self.type: str | None = None
+        self.subtype: str | None = None
+        self.session_id: str | None = None
+        self.usage: dict | None = None
+        # Top-level numeric/boolean/null fields, e.g. total_cost_usd, duration_ms
+        self.fields: dict[str, Any] = {}
+        self.done = False
+
+    def json(self) -> Any:
+        """Fully decode the line. Raises ``ValueError`` for non-JSON lines."""
+        return json.loads(self.line)
+
+
+def _decode_string(raw: str) -> str:
+    return json.loads(f'"{raw}"') if "\\" in raw else raw
+
+
+def _skip_container(s: str, i: int) -> int:
+    """Return the index just past the object/array opening at ``s[i]``."""
+    depth = 1
+    j = i + 1
+    while depth:
+        m = _STRUCT.search(s, j)
+        if m is None:
+            raise ValueError("unterminated container")
+        ch = m.group()
+        if ch == '"':
+            sm = _STRING.match(s, m.start())
+            if sm is None:
+                raise ValueError("unterminated string")
+            j = sm.end()
+        elif ch in "{[":
+            depth += 1
+            j = m.end()
+        else:
+            depth -= 1
+            j = m.end()
+    return j
+
+
+def scan_top_level(line: str, ev: StreamEvent) -> None:
+    """Populate ``ev`` from the top-level keys of the JSON object in ``line``.
+
+    Raises ``ValueError`` when the line is not a well-formed JSON object.
+    """
+    s = line
+    i = _WS.match(s, 0).end()
+    if i >= len(s) or s[i] != "{":
+        raise ValueError("not a JSON object")
+    i = _WS.match(s, i + 1).end()
+    if i < len(s) and s[i] == "}":
+        return
+    while True:
+        km = _STRING.match(s, i)
+        if km is None:
+            raise ValueError("expected key")
+        key = _decode_string(km.group(1))
+        i = _WS.match(s, km.end()).end()
+        if i >= len(s) or s[i] != ":":
+            raise ValueError("expected ':'")
+        i = _WS.match(s, i + 1).end()
+        if i >= len(s):
+            raise ValueError("expected value")
+        ch = s[i]
+        if ch == '"':
+            vm = _STRING.match(s, i)
+            if vm is None:
+                raise ValueError("unterminated string")
+            if key in WANTED_STRINGS:
+                value = _decode_string(vm.group(1))
+                if key == "type":
+                    ev.type = value
+                elif key == "subtype":
+                    ev.subtype = value
+                else:
+                    ev.session_id = value
+            i = vm.end()
+        elif ch in "{[":
+            end = _skip_container(s, i)
+            if key in WANTED_OBJECTS and ch == "{":
+                ev.usage = json.loads(s[i:end])
+            i = end
+        else:
+            vm = _SCALAR.match(s, i)
+            if vm is None:
+                raise ValueError("invalid value")
+            tok = vm.group()
+            ev.fields[key] = _LITERALS[tok] if tok in _LITERALS else json.loads(tok)
+            i = vm.end()
+        i = _WS.match(s, i).end()
+        if i < len(s) and s[i] == ",":
+            i = _WS.match(s, i + 1).end()
+            continue
+        if i < len(s) and s[i] == "}":
+            return
+        raise ValueError("expected ',' or '}'")
+
+
+def decode_line(line: str, done_token: str = "", *, full_scan: bool = False) -> StreamEvent:
+    """Decode the interesting parts of one stream-json line.
+
+    Bulk events only get ``type`` (and ``done``) unless ``full_scan`` is set. Lines that
+    are not JSON objects (e.g. ``--output-format text``) are returned with
+    ``is_json=False``; the done token is still detected in them.
+    """
+    ev = StreamEvent(line)
+    m = None if full_scan else _TYPE_FIRST.match(line)
+    if m is not None and m.group(1) in BULK_TYPES:
+        ev.type = m.group(1)
+        ev.is_json = True
+    else:
+        try:
+            scan_top_level(line, ev)
+            ev.is_json = True
+        except ValueError:
+            ev.type = ev.subtype = ev.session_id = ev.usage = None
+            ev.fields = {}
+    if done_token and ev.type not in _NO_DONE_TYPES and done_token in line:
+        ev.done = True
+    return ev
+
+
+def bulk_type(head: bytes) -> str | None:
+    """The event type if ``head`` starts a bulk (``assistant``/``user``) line."""
+    m = _TYPE_FIRST_BYTES.match(head)
+    if m is None:
+        return None
+    kind = m.group(1).decode("ascii")
+    return kind if kind in BULK_TYPES else None
+
+
+class StreamDecoder:
+    """Incremental decoder: feed arbitrary text chunks, get one event per complete line."""
+
+    def __init__(self, done_token: str = ""):
+        self.done_token = done_token
+        self.done_seen = False
+        self.session_id: str | None = None
+        # Last "result" event (usage, cost and durations of the run)
+        self.result: StreamEvent | None = None
+        self._pending = ""
+
+    def decode_line(self, line: str) -> StreamEvent:
+        ev = decode_line(line, self.done_token)
+        if ev.done:
+            self.done_seen = True
+        if ev.session_id and self.session_id is None:
+            self.session_id = ev.session_id
+        if ev.type == "result":
+            self.result = ev
+        return ev
+
+    def decode_frame(self, frame: Frame) -> StreamEvent:
+        """Decode a framed line; without its bytes, only type and done token are known.
+
+        ``frame.matches`` must come from a matcher given :attr:`done_pattern`.
+        """
+        if frame.data is not None:
+            return self.decode_line(frame.data.decode("utf-8", errors="replace"))
+        ev = StreamEvent(frame.head.decode("utf-8", errors="replace"))
+        ev.type = bulk_type(frame.head)
+        ev.is_json = ev.type is not None
+        if self.done_pattern in frame.matches and ev.type not in _NO_DONE_TYPES:
+            ev.done = self.done_seen = True
+        return ev
+
+    @property
+    def done_pattern(self) -> bytes:
+        return self.done_token.encode("utf-8")
+
+    def feed(self, chunk: str) -> list[StreamEvent]:
+        data = self._pending + chunk
+        lines = data.split("\n")
+        self._pending = lines.pop()
+        return [self.decode_line(x) for x in lines if x.strip()]
+
+    def close(self) -> list[StreamEvent]:
+        rest, self._pending = self._pending, ""
+        return [self.decode_line(rest)] if rest.strip() else []
@@ -0,0 +1,224 @@
+"""In-memory TODO document with atomic, locked writes.
+
+:class:`TodoDocument` parses the TODO file once into a :class:`~.todo_tree.TodoTree`
+and finds items by their stable id, so ticking an item is a list update instead of a
+re-read and a regex over the whole file. Completions are written back in one atomic
+replace (temp file plus rename) while holding an advisory ``flock`` on the file. If
+the file changed on disk since it was read (another claude-manager process, an
+editor), it is re-read under the lock, only the changed region is re-parsed, and the
+pending completions are applied to the fresh text, so nobody's edits are lost.
+
+:class:`TodoWriter` coalesces bursts of completions (e.g. a batch of PRs) into one
+write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+from .core import TodoItem, debug_log, pr_number_from_url
+from .todo_tree import TodoNode, TodoTree
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None  # type: ignore[assignment]
+
+# Seconds a completion waits for others before the file is written
+TODO_FLUSH_DELAY = 0.25
+
+
+def pr_suffix(pr_url: str | None) -> str:
+    """Text appended to a ticked item: ``[#N](url)`` for PR links, else ``(url)``."""
+    if not pr_url:
+        return ""
+    num = pr_number_from_url(pr_url)
+    return f" [#{num}]({pr_url})" if num is not None else f" ({pr_url})"
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold an exclusive ``flock`` on ``path``.
+
+    Writers replace the file, so after locking, check that ``path`` still names the
+    locked inode and retry otherwise.
+    """
+    if fcntl is None:
+        yield
+        return
+    while True:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(fd)
+    try:
+        yield
+    finally:
+        os.close(fd)
+
+
+def _stamp(path: Path) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class TodoDocument:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.lines: list[str] = []
+        self.tree = TodoTree([], [])
+        # Completions not yet written: node id -> suffix
+        self._pending: dict[str, str] = {}
+        self._stamp: tuple[int, int, int] | None = None
+        self._read()
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    def _read(self) -> None:
+        self._stamp = _stamp(self.path)
+        try:
+            with open(self.path, encoding="utf-8", newline="") as f:
+                self.lines = f.read().splitlines(keepends=True)
+        except FileNotFoundError:
+            self._stamp = None
+            self.lines = []
+        self.tree = self.tree.reparse(self.lines)
+
+    def _find(self, item: TodoItem) -> TodoNode | None:
+        """Open node for ``item``: by id, else the first open top-level item of that title."""
+        node = self.tree.get(item.node_id) if item.node_id else None
+        if node is None:
+            node = next(
+                (r for r in self.tree.roots if r.title == item.title and not r.checked), None
+            )
+        return node if node is not None and not node.checked else None
+
+    def _tick(self, node: TodoNode, suffix: str) -> None:
+        line = self.lines[node.start]
+        body = line.rstrip("\r\n")
+        lead = body[: len(body) - len(body.lstrip())]
+        self.lines[node.start] = f"{lead}{node.bullet} [x] {node.title}{suffix}{line[len(body) :]}"
+        self.tree = self.tree.reparse(self.lines)
+
+    def _refresh(self) -> None:
+        """Re-read the file if it changed on disk and re-apply pending completions."""
+        if _stamp(self.path) == self._stamp:
+            return
+        debug_log(f"{self.path} changed on disk; re-reading it")
+        self._read()
+        for node_id, suffix in list(self._pending.items()):
+            node = self.tree.get(node_id)
+            if node is None or node.checked:
+                # Ticked or removed by whoever edited the file
+                del self._pending[node_id]
+            else:
+                self._tick(node, suffix)
+
+    def reload(self) -> bool:
+        """Pick up edits made on disk; returns True if the file changed."""
+        with self._lock:
+            before = self._stamp
+            self._refresh()
+            return self._stamp != before
+
+    def complete(self, item: TodoItem, pr_url: str | None) -> bool:
+        """Tick ``item`` in memory; returns False if it is not an open item."""
+        with self._lock:
+            self._refresh()
+            node = self._find(item)
+            if node is None:
+                return False
+            suffix = pr_suffix(pr_url)
+            self._pending[node.id] = suffix
+            self._tick(node, suffix)
+            return True
+
+    def flush(self) -> bool:
+        """Atomically write pending completions; returns False if there were none."""
+        with self._lock:
+            if not self._pending or self._stamp is None:
+                return False
+            try:
+                with _locked(self.path):
+                    self._refresh()
+                    if self._pending:
+                        self._replace()
+            except FileNotFoundError:
+                debug_log(f"{self.path} was removed; dropping {len(self._pending)} update(s)")
+                self._stamp = None
+            self._pending.clear()
+            return True
+
+    def _replace(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(self.text())
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, os.stat(self.path).st_mode & 0o7777)
+            os.replace(tmp, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        self._stamp = _stamp(self.path)
+
+
+class TodoWriter:
+    """Asynchronous front end of a :class:`TodoDocument` that coalesces writes."""
+
+    def __init__(self, doc: TodoDocument, delay: float = TODO_FLUSH_DELAY):
+        self.doc = doc
+        self.delay = delay
+        self._scheduled: asyncio.Task | None = None
+        self.writes = 0
+
+    async def complete(self, item: TodoItem, pr_url: str | None, *, flush: bool = False) -> bool:
+        """Tick ``item``; written now with ``flush``, else after ``delay`` seconds."""
+        found = self.doc.complete(item, pr_url)
+        if flush:
+            await self.flush()
+        elif found and self._scheduled is None:
+            self._scheduled = asyncio.create_task(self._flush_later())
+        return found
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.delay)
+        self._scheduled = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self.doc.dirty and await asyncio.to_thread(self.doc.flush):
+            self.writes += 1
+
+    async def close(self) -> None:
+        """Write anything still pending and stop the delayed flush."""
+        task, self._scheduled = self._scheduled, None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self.flush()
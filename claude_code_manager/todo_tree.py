@@ -0,0 +1,192 @@
+"""Markdown checklist parser that keeps the whole TODO tree.
+
+:class:`TodoTree` is built in one pass over the lines. Every ``- [ ]``/``- [x]``
+item (bullets ``-``, ``*`` or ``+``, any depth) becomes a :class:`TodoNode` with its
+line span and a stable id. Lines inside fenced code blocks are never items.
+
+Ids survive edits elsewhere in the file: an item's id is its ``(id: ...)`` marker if
+it has one, else a hash of its ancestors' titles, its own title and how many
+earlier siblings share that title (so duplicate titles get distinct ids). Ticking an
+item keeps its id: the PR link added to the title is ignored.
+
+:meth:`TodoTree.reparse` re-parses only the top-level items that overlap the lines
+that changed and shifts the rest.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from .core import split_todo_options
+
+TAB_WIDTH = 4
+
+_ITEM = re.compile(r"^(?P<indent>[ \t]*)(?P<bullet>[-*+]) \[(?P<mark>[ xX])\] (?P<title>.*\S)\s*$")
+_FENCE = re.compile(r"^[ \t]*(?P<fence>`{3,}|~{3,})")
+# PR link appended when an item is ticked; not part of its identity
+_PR_LINK = re.compile(r"\s+(?:\[#\d+\]\(\S+\)|\(\S+://\S+\))$")
+
+
+def _width(indent: str) -> int:
+    return len(indent.expandtabs(TAB_WIDTH))
+
+
+@dataclass(eq=False)
+class TodoNode:
+    title: str  # as written, including option markers
+    checked: bool
+    indent: int  # column of the bullet
+    bullet: str
+    start: int  # line of the item (0-based)
+    end: int = 0  # one past the last non-blank line of the item and its subtree
+    children: list[TodoNode] = field(default_factory=list)
+    parent: TodoNode | None = field(default=None, repr=False)
+    id: str = ""
+
+    def walk(self) -> Iterator[TodoNode]:
+        """This node and its descendants in document order."""
+        yield self
+        for c in self.children:
+            yield from c.walk()
+
+    def shift(self, delta: int) -> None:
+        for n in self.walk():
+            n.start += delta
+            n.end += delta
+
+
+def _parse(lines: list[str], offset: int = 0) -> tuple[list[TodoNode], list[TodoNode], bool]:
+    """Parse ``lines`` (starting at line ``offset``) into root nodes.
+
+    Also returns the nodes still open at the end and whether a code fence is open.
+    """
+    roots: list[TodoNode] = []
+    stack: list[TodoNode] = []
+    fence: str | None = None
+    last = offset - 1  # last non-blank line
+
+    def _close(indent: int) -> None:
+        while stack and stack[-1].indent >= indent:
+            stack.pop().end = last + 1
+
+    for n, raw in enumerate(lines, start=offset):
+        line = raw.rstrip("\r\n")
+        if fence is not None:
+            m = _FENCE.match(line)
+            if m and m.group("fence")[0] == fence[0] and len(m.group("fence")) >= len(fence):
+                fence = None
+            if line.strip():
+                last = n
+            continue
+        if not line.strip():
+            continue
+        m = _FENCE.match(line)
+        if m:
+            _close(_width(line[: len(line) - len(line.lstrip())]))
+            # An unindented fence ends every item; an indented one belongs to the item
+            fence = m.group("fence")
+            last = n
+            continue
+        m = _ITEM.match(line)
+        if m is None:
+            # Text at or left of an item's bullet ends that item
+            _close(_width(line[: len(line) - len(line.lstrip())]))
+            last = n
+            continue
+        indent = _width(m.group("indent"))
+        _close(indent)
+        node = TodoNode(
+            title=m.group("title").strip(),
+            checked=m.group("mark") != " ",
+            indent=indent,
+            bullet=m.group("bullet"),
+            start=n,
+        )
+        if stack:
+            node.parent = stack[-1]
+            stack[-1].children.append(node)
+        else:
+            roots.append(node)
+        stack.append(node)
+        last = n
+    open_nodes = list(stack)
+    _close(-1)
+    return roots, open_nodes, fence is not None
+
+
+def _assign_ids(nodes: list[TodoNode], path: str = "") -> None:
+    seen: dict[str, int] = {}
+    for node in nodes:
+        name, options = split_todo_options(_PR_LINK.sub("", node.title))
+        k = seen[name] = seen.get(name, 0) + 1
+        key = f"{path}/{name}#{k}"
+        node.id = options.get("id") or hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        _assign_ids(node.children, key)
+
+
+class TodoTree:
+    def __init__(self, lines: list[str], roots: list[TodoNode]):
+        self.lines = lines
+        self.roots = roots
+        self._by_id: dict[str, TodoNode] | None = None
+
+    @classmethod
+    def parse(cls, text: str | list[str]) -> TodoTree:
+        lines = text.splitlines(keepends=True) if isinstance(text, str) else list(text)
+        roots, _, _ = _parse(lines)
+        _assign_ids(roots)
+        return cls(lines, roots)
+
+    def walk(self) -> Iterator[TodoNode]:
+        for r in self.roots:
+            yield from r.walk()
+
+    def get(self, node_id: str) -> TodoNode | None:
+        if self._by_id is None:
+            self._by_id = {}
+            for n in self.walk():
+                self._by_id.setdefault(n.id, n)
+        return self._by_id.get(node_id)
+
+    def reparse(self, lines: list[str]) -> TodoTree:
+        """Tree for ``lines``, an edited version of this tree's lines.
+
+        Only the top-level items around the changed lines are parsed again; falls
+        back to a full parse when the edit changes how later lines nest (e.g. it
+        opens a code fence). Nodes after the change are moved, not copied, so this
+        tree must not be used afterwards.
+        """
+        old = self.lines
+        limit = min(len(old), len(lines))
+        p = 0
+        while p < limit and old[p] == lines[p]:
+            p += 1
+        if p == len(old) == len(lines):
+            return TodoTree(list(lines), self.roots)
+        s = 0
+        while s < limit - p and old[-1 - s] == lines[-1 - s]:
+            s += 1
+        changed_end = len(old) - s
+        # Re-parse from the last top-level item that starts before the first changed
+        # line (parsing is in a known state there) up to the first one starting at or
+        # after the last changed line
+        before = bisect.bisect_left(self.roots, p, key=lambda r: r.start)
+        first = max(0, before - 1)
+        start = self.roots[first].start if before else 0
+        after = bisect.bisect_left(self.roots, changed_end, lo=first, key=lambda r: r.start)
+        stop = self.roots[after].start if after < len(self.roots) else len(old)
+        delta = len(lines) - len(old)
+
+        region, open_nodes, in_fence = _parse(lines[start : stop + delta], start)
+        nxt = self.roots[after] if after < len(self.roots) else None
+        if in_fence or (nxt is not None and any(n.indent < nxt.indent for n in open_nodes)):
+            return TodoTree.parse(lines)
+        for r in self.roots[after:]:
+            r.shift(delta)
+        roots = self.roots[:first] + region + self.roots[after:]
+        _assign_ids(roots)
+        return TodoTree(list(lines), roots)
@@ -0,0 +1,126 @@
+"""Span timing for a run, exported as Chrome trace-event JSON.
+
+Open the written file in https://ui.perfetto.dev (or ``chrome://tracing``). Each
+worker slot is one track ("thread"), so queueing, git, gh and claude time of every
+item can be compared side by side. Tracing is off unless :func:`start` was called;
+:func:`span` is then a no-op.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+_TRACER: Tracer | None = None
+# Track of the current asyncio task (0: the main/sequential track)
+_LANE: ContextVar[int] = ContextVar("claude_manager_trace_lane", default=0)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.events: list[dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+        self._lanes: dict[int, str] = {0: "main"}
+        self._lock = threading.Lock()
+
+    def now_us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def add(self, name: str, start_us: float, end_us: float, lane: int, args: dict) -> None:
+        ev = {
+            "name": name,
+            "ph": "X",
+            "ts": round(start_us, 1),
+            "dur": round(end_us - start_us, 1),
+            "pid": self.pid,
+            "tid": lane,
+        }
+        if args:
+            ev["args"] = args
+        with self._lock:
+            self.events.append(ev)
+
+    def name_lane(self, lane: int, name: str) -> None:
+        with self._lock:
+            self._lanes[lane] = name
+
+    def to_json(self) -> dict[str, Any]:
+        meta: list[dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "claude-manager"}}
+        ]
+        for lane, name in sorted(self._lanes.items()):
+            meta.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": lane,
+                    "args": {"name": name},
+                }
+            )
+            meta.append(
+                {
+                    "name": "thread_sort_index",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": lane,
+                    "args": {"sort_index": lane},
+                }
+            )
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json()), encoding="utf-8")
+
+
+def start() -> Tracer:
+    """Start collecting spans for this process (replacing any previous tracer)."""
+    global _TRACER
+    _TRACER = Tracer()
+    return _TRACER
+
+
+def stop() -> Tracer | None:
+    """Stop collecting and return the tracer that was active, if any."""
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    return tracer
+
+
+def enabled() -> bool:
+    return _TRACER is not None
+
+
+def set_lane(lane: int, name: str) -> None:
+    """Put the current task's spans on track ``lane`` (labelled ``name``)."""
+    _LANE.set(lane)
+    if _TRACER is not None:
+        _TRACER.name_lane(lane, name)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[dict[str, Any]]:
+    """Time the enclosed block. The yielded dict can be filled with result args."""
+    tracer = _TRACER
+    if tracer is None:
+        yield args
+        return
+    start_us = tracer.now_us()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        tracer.add(name, start_us, tracer.now_us(), _LANE.get(), args)
@@ -0,0 +1,334 @@
+"""Compressed transcripts of every claude attempt (``.claude-manager/transcripts``).
+
+Each run gets a directory named after its start time. In it, every attempt's raw
+output is stored as ``<branch>/attempt-<n>.jsonl.gz`` (``.zst`` with the zstd
+codec), and ``index.jsonl`` gets one line per finished attempt with its item,
+return code and sizes.
+
+Workers only hand output chunks to :meth:`Transcript.write`. One background thread
+per run compresses and writes them. The bytes waiting for that thread are capped at
+``max_buffer_bytes``. While the cap is reached, new output lines are dropped instead
+of stalling claude's pipe. A line already being written is finished first, so the
+transcript stays valid JSONL. Each gap is marked by a
+``{"type": "claude_manager_dropped", ...}`` line and counted in the index.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import json
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import BinaryIO
+
+CODECS = ("gzip", "zstd")
+INDEX_NAME = "index.jsonl"
+# "type" of the line that marks output dropped while the buffer was full
+DROPPED_TYPE = "claude_manager_dropped"
+# Run directory names: start time, plus "-<n>" for runs started in the same second
+_RUN_NAME = re.compile(r"(\d{8}-\d{6})(?:-(\d+))?")
+
+
+def _zstd_opener() -> Callable[[Path], BinaryIO] | None:
+    try:
+        from compression import zstd  # Python 3.14+
+
+        return lambda path: zstd.open(path, "wb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return lambda path: zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+
+
+def resolve_codec(name: str) -> tuple[str, str, Callable[[Path], BinaryIO]]:
+    """(codec, file suffix, opener) for ``name``; zstd falls back to gzip if unavailable."""
+    if name == "zstd":
+        opener = _zstd_opener()
+        if opener is not None:
+            return "zstd", ".zst", opener
+    elif name != "gzip":
+        raise ValueError(f"unknown transcript codec: {name} (use {' or '.join(CODECS)})")
+    return "gzip", ".gz", lambda path: gzip.open(path, "wb", compresslevel=6)
+
+
+class Transcript:
+    """One claude attempt's output. Written from the event loop and never blocks."""
+
+    def __init__(self, store: TranscriptStore, item: str, branch: str, attempt: int, path: Path):
+        self.item = item
+        self.branch = branch
+        self.attempt = attempt
+        self.path = path
+        self.lines = 0
+        self.bytes = 0
+        self.dropped_lines = 0
+        self.dropped_bytes = 0
+        self.closed = False
+        # Set when writing failed (e.g. a full disk); later output is discarded
+        self.error: str | None = None
+        self._store = store
+        self._started = time.monotonic()
+        self._file: BinaryIO | None = None
+        # The output accepted so far ends mid-line
+        self._mid_line = False
+        # Inside a line that is being dropped
+        self._skipping = False
+        # Dropped since the last gap marker
+        self._gap_bytes = 0
+        self._gap_lines = 0
+
+    def write(self, data: bytes) -> None:
+        if data and not self.closed:
+            self._store._put(self, data)
+
+    def close(self, **meta) -> None:
+        """Finish the attempt; ``meta`` (return code, done, ...) goes to the index."""
+        if self.closed:
+            return
+        self.closed = True
+        meta["seconds"] = round(time.monotonic() - self._started, 3)
+        self._store._put(self, None, meta)
+
+
+class TranscriptStore:
+    """The transcripts of one run, written by a background thread."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        codec: str = "gzip",
+        max_buffer_bytes: int = 8 << 20,
+        root: Path | None = None,
+    ):
+        self.directory = directory
+        # Paths in PR summaries are shown relative to this (the repository)
+        self.root = root
+        self.codec, self._suffix, self._open = resolve_codec(codec)
+        self.max_buffer_bytes = max(1, int(max_buffer_bytes))
+        self.buffered = 0
+        self._queue: deque[tuple[Transcript, bytes | None, dict | None]] = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread: threading.Thread | None = None
+        # Branch -> its attempts, in order
+        self._items: dict[str, list[Transcript]] = {}
+
+    def open(self, item: str, branch: str, attempt: int) -> Transcript:
+        name = branch.replace("/", "-")
+        path = self.directory / name / f"attempt-{attempt}.jsonl{self._suffix}"
+        transcript = Transcript(self, item, branch, attempt, path)
+        self._items.setdefault(branch, []).append(transcript)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._drain, name="claude-manager-transcripts", daemon=True
+                )
+                self._thread.start()
+        return transcript
+
+    def attempts(self, branch: str) -> list[Transcript]:
+        return list(self._items.get(branch, []))
+
+    def summary(self, branch: str) -> str:
+        """One line describing ``branch``'s transcripts, for the PR body."""
+        attempts = self._items.get(branch)
+        if not attempts:
+            return ""
+        folder = attempts[0].path.parent
+        if self.root is not None:
+            with contextlib.suppress(ValueError):
+                folder = folder.relative_to(self.root)
+        n = len(attempts)
+        lines = sum(t.lines for t in attempts)
+        text = f"Claude transcript: {n} attempt{'s' if n != 1 else ''}, {lines} lines"
+        dropped = sum(t.dropped_lines for t in attempts)
+        if dropped:
+            text += f" ({dropped} dropped)"
+        return f"{text}, saved locally in `{folder}`"
+
+    def _put(self, transcript: Transcript, data: bytes | None, meta: dict | None = None) -> None:
+        with self._cond:
+            if data is None:
+                if transcript._skipping:
+                    # The attempt ended inside a dropped line
+                    transcript._gap_lines += 1
+                    transcript.dropped_lines += 1
+                self._mark_gap(transcript)
+                self._queue.append((transcript, None, meta))
+            else:
+                self._put_output(transcript, data)
+            self._cond.notify()
+
+    def _put_output(self, t: Transcript, data: bytes) -> None:
+        """Queue ``data``, dropping whole lines while the buffer is full."""
+        if t._skipping:
+            nl = data.find(b"\n")
+            if nl < 0:
+                self._drop(t, data)
+                return
+            self._drop(t, data[: nl + 1])
+            t._skipping = False
+            data = data[nl + 1 :]
+            if not data:
+                return
+        # An empty buffer always takes a chunk, so huge chunks still get through
+        if not self._queue or self.buffered + len(data) <= self.max_buffer_bytes:
+            self._accept(t, data)
+            return
+        if t._mid_line:
+            # Finish the line already being written
+            nl = data.find(b"\n")
+            if nl < 0:
+                self._accept(t, data)
+                return
+            self._accept(t, data[: nl + 1])
+            data = data[nl + 1 :]
+        if data:
+            self._drop(t, data)
+            t._skipping = not data.endswith(b"\n")
+
+    def _accept(self, t: Transcript, data: bytes) -> None:
+        if not t._mid_line:
+            self._mark_gap(t)
+        self._enqueue(t, data)
+        t.lines += data.count(b"\n")
+        t.bytes += len(data)
+        t._mid_line = not data.endswith(b"\n")
+
+    def _drop(self, t: Transcript, data: bytes) -> None:
+        lines = data.count(b"\n")
+        t._gap_bytes += len(data)
+        t._gap_lines += lines
+        t.dropped_bytes += len(data)
+        t.dropped_lines += lines
+
+    def _mark_gap(self, t: Transcript) -> None:
+        """Queue the marker for output dropped since the last one, if any."""
+        if not t._gap_bytes:
+            return
+        marker = {
+            "type": DROPPED_TYPE,
+            "dropped_bytes": t._gap_bytes,
+            "dropped_lines": t._gap_lines,
+        }
+        t._gap_bytes = t._gap_lines = 0
+        self._enqueue(t, json.dumps(marker).encode("utf-8") + b"\n")
+
+    def _enqueue(self, t: Transcript, data: bytes) -> None:
+        self.buffered += len(data)
+        self._queue.append((t, data, None))
+
+    def _drain(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                transcript, data, meta = self._queue.popleft()
+            try:
+                if data is None:
+                    self._finish(transcript, meta or {})
+                elif transcript.error is None:
+                    self._file_for(transcript).write(data)
+            except OSError as e:
+                # A full or read-only disk must not stop the run
+                transcript.error = transcript.error or str(e)
+                self._close_file(transcript)
+            finally:
+                if data is not None:
+                    with self._cond:
+                        self.buffered -= len(data)
+
+    def _file_for(self, transcript: Transcript) -> BinaryIO:
+        if transcript._file is None:
+            transcript.path.parent.mkdir(parents=True, exist_ok=True)
+            transcript._file = self._open(transcript.path)
+        return transcript._file
+
+    def _close_file(self, transcript: Transcript) -> None:
+        f, transcript._file = transcript._file, None
+        if f is not None:
+            with contextlib.suppress(OSError):
+                f.close()
+
+    def _finish(self, transcript: Transcript, meta: dict) -> None:
+        if transcript.error is None:
+            # Attempts without output still get an (empty) file so the index never dangles
+            self._file_for(transcript).close()
+            transcript._file = None
+        else:
+            self._close_file(transcript)
+        rec = {
+            "item": transcript.item,
+            "branch": transcript.branch,
+            "attempt": transcript.attempt,
+            "path": transcript.path.relative_to(self.directory).as_posix(),
+            "lines": transcript.lines,
+            "bytes": transcript.bytes,
+            "dropped_lines": transcript.dropped_lines,
+            "dropped_bytes": transcript.dropped_bytes,
+            **{k: v for k, v in meta.items() if v is not None},
+        }
+        if transcript.error is None:
+            rec["compressed_bytes"] = transcript.path.stat().st_size
+        else:
+            rec["error"] = transcript.error
+        with open(self.directory / INDEX_NAME, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        """Write everything still buffered and stop the thread (blocks)."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        if not self._items:
+            # Nothing ran; do not leave an empty run behind
+            with contextlib.suppress(OSError):
+                self.directory.rmdir()
+
+
+def _run_order(path: Path) -> tuple[str, int] | None:
+    """Sort key of a run directory ("-10" after "-2" in the same second); None if not a run."""
+    m = _RUN_NAME.fullmatch(path.name)
+    if m is None:
+        return None
+    return m.group(1), int(m.group(2) or 1)
+
+
+def open_run_store(
+    base: Path,
+    *,
+    codec: str = "gzip",
+    max_buffer_bytes: int = 8 << 20,
+    keep: int = 0,
+    root: Path | None = None,
+) -> TranscriptStore:
+    """A store in a new run directory under ``base``, keeping the last ``keep`` runs."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    directory = base / stamp
+    n = 1
+    while directory.exists():
+        n += 1
+        directory = base / f"{stamp}-{n}"
+    if keep > 0 and base.is_dir():
+        # Only run directories are pruned; anything else under base is left alone
+        keyed = [(key, p) for p in base.iterdir() if p.is_dir() and (key := _run_order(p))]
+        runs = [p for _, p in sorted(keyed)]
+        for old in runs[: max(0, len(runs) - (keep - 1))]:
+            shutil.rmtree(old, ignore_errors=True)
+    directory.mkdir(parents=True)
+    return TranscriptStore(directory, codec=codec, max_buffer_bytes=max_buffer_bytes, root=root)
@@ -0,0 +1,96 @@
+"""Token, cost and API-time accounting from stream-json ``result`` events."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any
+
+from .stream_json import StreamEvent
+
+# Token counters copied from the result event's "usage" object
+TOKEN_KEYS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+@dataclass
+class Usage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cost_usd: float = 0.0
+    duration_ms: int = 0
+    duration_api_ms: int = 0
+    num_turns: int = 0
+
+    @classmethod
+    def from_event(cls, ev: StreamEvent) -> Usage:
+        u = cls()
+        for key in TOKEN_KEYS:
+            value = (ev.usage or {}).get(key)
+            if isinstance(value, int):
+                setattr(u, key, value)
+        # Older CLIs report "cost_usd" instead of "total_cost_usd"
+        cost = ev.fields.get("total_cost_usd", ev.fields.get("cost_usd"))
+        if isinstance(cost, int | float):
+            u.cost_usd = float(cost)
+        for key in ("duration_ms", "duration_api_ms", "num_turns"):
+            value = ev.fields.get(key)
+            if isinstance(value, int | float):
+                setattr(u, key, int(value))
+        return u
+
+    def add(self, other: Usage) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(getattr(self, key) for key in TOKEN_KEYS)
+
+    def to_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        d["cost_usd"] = round(self.cost_usd, 6)
+        return d
+
+    def describe(self) -> str:
+        return (
+            f"in {self.input_tokens:,} / out {self.output_tokens:,} tokens"
+            f" (cache read {self.cache_read_input_tokens:,}, write"
+            f" {self.cache_creation_input_tokens:,}), ${self.cost_usd:.4f},"
+            f" API {self.duration_api_ms / 1000:.1f}s"
+        )
+
+
+@dataclass
+class ItemUsage:
+    """Usage of every claude attempt (first run plus bounces) for one TODO item."""
+
+    title: str
+    attempts: list[Usage] = field(default_factory=list)
+
+    @property
+    def total(self) -> Usage:
+        return sum_usage(self.attempts)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "title": self.title,
+            "attempts": [a.to_dict() for a in self.attempts],
+            "total": self.total.to_dict(),
+        }
+
+
+def sum_usage(usages: list[Usage]) -> Usage:
+    total = Usage()
+    for u in usages:
+        total.add(u)
+    return total
+
+
+def run_total(items: list[ItemUsage] | None) -> Usage:
+    return sum_usage([i.total for i in items or []])
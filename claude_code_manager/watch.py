@@ -0,0 +1,179 @@
+"""``claude-manager watch``: start TODO items as soon as they are saved.
+
+The TODO file is polled with one ``stat`` per interval and re-read only when its
+inode, size or mtime changed; the tree is then re-parsed incrementally. Every open
+item that has not been dispatched yet starts in a worktree while the items already
+running carry on. Worktree slots, the fetch, the gh capability probe and the
+admission gate are shared by the whole session, so a new item pays none of the
+start-up cost of a fresh ``claude-manager run``.
+
+Items are recognized by their TODO tree id: editing other lines does not start an
+item twice, and an item that failed is not retried until the next session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+from pathlib import Path
+
+from . import admission
+from .admission import AdmissionController
+from .concurrency import AdjustableSemaphore
+from .core import Config, TodoItem, color_info, color_warn, debug_log, echo, todo_items, tr
+from .engine import (
+    PendingPublish,
+    WorktreePool,
+    _base_after_prereqs,
+    _dispatch_order,
+    _skip_for_budget,
+    close_todo_writers,
+    close_transcripts,
+    enable_partial_clone,
+    fetch_coordinator,
+    open_history,
+    open_journal,
+    open_transcripts,
+    process_in_worktree,
+    publish_pending,
+    todo_writer,
+    worker_semaphore,
+)
+from .schedule import DependencyCycle, resolve_dependencies
+from .tracing import set_lane, span
+
+
+class TodoWatcher:
+    def __init__(self, root: Path, cfg: Config, *, interval: float | None = None):
+        self.root = root
+        self.cfg = cfg
+        self.interval = cfg.watch_interval if interval is None else interval
+        # The same document the workers tick items in, so our own writes are not "edits"
+        self.doc = todo_writer(root / cfg.input_path).doc
+        self.history = open_history(root, cfg)
+        self.pool = (
+            WorktreePool(root, sparse_mode=cfg.worktree_sparse) if cfg.worktree_reuse else None
+        )
+        self.pending: list[PendingPublish] | None = [] if cfg.batch_push else None
+        self.journal = open_journal(root, cfg, todo_items(self.doc.tree))
+        self.transcripts = open_transcripts(root, cfg)
+        # Node id -> the item's branch once committed (None: it did not finish)
+        self.dispatched: dict[str, asyncio.Future[str | None]] = {}
+        self.tasks: set[asyncio.Task] = set()
+        workers = max(1, int(cfg.worktree_parallel_max_semaphore))
+        self._free_lanes = list(range(1, workers + 1))
+        self._sem: asyncio.Semaphore | AdjustableSemaphore | None = None
+        # Status lines number items in the order they were dispatched
+        self._count = 0
+
+    def scan(self) -> list[tuple[TodoItem, list[str]]]:
+        """Open items not dispatched yet, in schedule order, with their prerequisites' ids."""
+        items = todo_items(self.doc.tree)
+        if all(item.node_id in self.dispatched for item in items):
+            return []
+        try:
+            deps, unknown = resolve_dependencies(items)
+        except DependencyCycle as e:
+            # Wait for the file to be fixed; nothing in the cycle can start
+            echo(tr("dependency_cycle", self.cfg.lang, cycle=str(e)), err=True)
+            return []
+        for ref in unknown:
+            debug_log(f"(after: {ref}) matches no open item; treating it as done")
+        order = _dispatch_order(items, deps, self.cfg, self.history)
+        return [
+            (items[i], [items[j].node_id for j in deps[i]])
+            for i in order
+            if items[i].node_id not in self.dispatched
+        ]
+
+    def dispatch(self, new: list[tuple[TodoItem, list[str]]]) -> None:
+        loop = asyncio.get_running_loop()
+        for item, prereqs in new:
+            echo(color_info(tr("watch_new_item", self.cfg.lang, title=item.name)))
+            self.dispatched[item.node_id] = loop.create_future()
+            task = asyncio.create_task(self._worker(item, prereqs, self._count))
+            self._count += 1
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _worker(self, item: TodoItem, prereqs: list[str], row_index: int) -> None:
+        cfg = self.cfg
+        assert self._sem is not None
+        branch: str | None = None
+        try:
+            base = _base_after_prereqs(item, [await self.dispatched[p] for p in prereqs], cfg)
+            if base is None:
+                return
+            async with self._sem:
+                if _skip_for_budget(item, cfg):
+                    return
+                lane = heapq.heappop(self._free_lanes)
+                set_lane(lane, f"worker {lane}")
+                try:
+                    with span("item", title=item.name):
+                        branch = await process_in_worktree(
+                            self.root,
+                            item,
+                            cfg,
+                            row_index=row_index,
+                            pool=self.pool,
+                            pending=self.pending,
+                            journal=self.journal,
+                            base=base,
+                            transcripts=self.transcripts,
+                            history=self.history,
+                        )
+                except Exception as e:
+                    # One broken item must not take the session down
+                    echo(color_warn(tr("watch_item_failed", cfg.lang, title=item.name, error=e)))
+                finally:
+                    heapq.heappush(self._free_lanes, lane)
+        finally:
+            fut = self.dispatched[item.node_id]
+            if not fut.done():
+                fut.set_result(branch)
+
+    async def _publish(self) -> None:
+        """Push and open PRs for batched items once nothing is running."""
+        if self.pending and not self.tasks:
+            batch, self.pending[:] = list(self.pending), []
+            await publish_pending(self.root, batch, self.cfg, self.journal, self.transcripts)
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        """Watch until ``stop`` is set, then let running items finish.
+
+        Cancelling the task (Ctrl+C) cancels the running items instead.
+        """
+        stop = stop or asyncio.Event()
+        cfg = self.cfg
+        sem, controller = worker_semaphore(self.root, cfg)
+        self._sem = sem
+        try:
+            with admission.shared(AdmissionController.from_config(cfg)):
+                if cfg.partial_clone_filter:
+                    await enable_partial_clone(self.root, cfg)
+                await fetch_coordinator(self.root, cfg.fetch_ttl).ensure_fresh()
+                self.dispatch(self.scan())
+                while not stop.is_set():
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(stop.wait(), self.interval)
+                    if self.doc.reload():
+                        self.dispatch(self.scan())
+                    await self._publish()
+                while self.tasks:
+                    await asyncio.gather(*self.tasks)
+                await self._publish()
+        finally:
+            tasks = list(self.tasks)
+            if controller is not None:
+                tasks.append(controller)
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await close_todo_writers()
+            await close_transcripts(self.transcripts, cfg)
+
+
+async def run_watch(root: Path, cfg: Config, stop: asyncio.Event | None = None) -> None:
+    await TodoWatcher(root, cfg).run(stop)
@@ -1,4 +1,4 @@
-from claude_code_manager.cli import main
+from claude_code_manager.__main__ import main
 
 
 if __name__ == "__main__":
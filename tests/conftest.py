@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+FAKE_CLAUDE = textwrap.dedent(
+    """\
+    #!{python}
+    import json, os, sys, time, uuid
+    from pathlib import Path
+
+    log = os.environ.get("FAKE_CLAUDE_LOG")
+    prompt = sys.argv[sys.argv.index("-p") + 1]
+    start = time.time()
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            files = sorted(str(p) for p in Path(".").rglob("*") if ".git" not in p.parts)
+            ev = {{"event": "start", "t": start, "argv": sys.argv[1:], "files": files,
+                  "cwd": os.getcwd()}}
+            f.write(json.dumps(ev) + "\\n")
+    sid = sys.argv[sys.argv.index("--resume") + 1] if "--resume" in sys.argv else str(uuid.uuid4())
+    print(json.dumps({{"type": "system", "subtype": "init", "session_id": sid}}), flush=True)
+    time.sleep(float(os.environ.get("FAKE_CLAUDE_DELAY", "0")))
+    # Countdown file: while positive, fail like claude does on an API 429
+    limited = Path(os.environ.get("FAKE_CLAUDE_RATE_LIMITED", "/nonexistent"))
+    if limited.exists() and int(limited.read_text() or 0) > 0:
+        limited.write_text(str(int(limited.read_text()) - 1))
+        error = 'API Error: 429 {{"type":"error","error":{{"type":"rate_limit_error"}}}}'
+        print(json.dumps({{"type": "result", "subtype": "success", "is_error": True,
+                          "result": error, "session_id": sid}}), flush=True)
+        sys.exit(1)
+    if os.environ.get("FAKE_CLAUDE_HANG_ON", "\\0") in prompt:
+        time.sleep(60)
+    Path("claude-" + uuid.uuid4().hex[:8] + ".txt").write_text(prompt, encoding="utf-8")
+    print(json.dumps({{"type": "assistant", "message": {{"content": "working"}}}}), flush=True)
+    if os.environ.get("FAKE_CLAUDE_DONE", "1") == "1":
+        print(json.dumps({{"type": "assistant", "message": {{"content": "CLAUDE_MANAGER_DONE"}}}}))
+    result = {{
+        "type": "result",
+        "subtype": "success",
+        "is_error": os.environ.get("FAKE_CLAUDE_RC", "0") != "0",
+        "session_id": sid,
+        "total_cost_usd": float(os.environ.get("FAKE_CLAUDE_COST", "0.01")),
+        "duration_ms": 1500,
+        "duration_api_ms": 1200,
+        "num_turns": 2,
+        "usage": {{"input_tokens": 100, "output_tokens": 20, "cache_read_input_tokens": 5}},
+    }}
+    print(json.dumps(result), flush=True)
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps({{"event": "end", "t": time.time(), "cwd": os.getcwd()}}) + "\\n")
+    if float(os.environ.get("FAKE_CLAUDE_LINGER", "0")):
+        # Close the output but keep running
+        sys.stdout.flush()
+        os.close(1)
+        os.close(2)
+        time.sleep(float(os.environ["FAKE_CLAUDE_LINGER"]))
+    sys.exit(int(os.environ.get("FAKE_CLAUDE_RC", "0")))
+    """
+)
+
+FAKE_GH = textwrap.dedent(
+    """\
+    #!{python}
+    import json, os, sys
+
+    log = os.environ.get("FAKE_GH_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(sys.argv[1:]) + "\\n")
+    args = sys.argv[1:]
+    if "--help" in args:
+        print("Flags:\\n  --json fields\\n  -q, --jq expression")
+    elif args[:1] == ["--version"]:
+        print("gh version 9.9.9 (fake)")
+    elif args[:2] == ["pr", "create"]:
+        head = args[args.index("--head") + 1]
+        print("https://github.com/o/r/pull/" + str(abs(hash(head)) % 1000))
+    else:
+        sys.exit(1)
+    """
+)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_caches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Keep on-disk caches under tmp_path and forget in-process probe results."""
+    from claude_code_manager import cli, engine
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    engine.reset_gh_capabilities()
+    engine.reset_fetch_coordinators()
+    engine.reset_todo_writers()
+    yield
+    engine.reset_gh_capabilities()
+    engine.reset_fetch_coordinators()
+    engine.reset_todo_writers()
+    cli.CREATED_WORKTREES.clear()
+
+
+def _git(*args: str, cwd: Path) -> None:
+    subprocess.check_call(
+        ["git", *args], cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+@pytest.fixture
+def git_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A working repo on ``main`` with a local bare repository as ``origin``."""
+    remote = tmp_path / "remote.git"
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git("init", "--bare", "-b", "main", str(remote), cwd=tmp_path)
+    _git("init", "-b", "main", cwd=repo)
+    for k, v in (("user.name", "t"), ("user.email", "t@example.com")):
+        _git("config", k, v, cwd=repo)
+    (repo / ".gitignore").write_text("TODO.md\n.worktrees/\n.claude-manager/\n", encoding="utf-8")
+    (repo / "README.md").write_text("hello\n", encoding="utf-8")
+    _git("add", "-A", cwd=repo)
+    _git("commit", "-m", "init", cwd=repo)
+    _git("remote", "add", "origin", str(remote), cwd=repo)
+    _git("push", "-u", "origin", "main", cwd=repo)
+    monkeypatch.chdir(repo)
+    return repo
+
+
+@pytest.fixture
+def fake_bin(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Put stub ``claude`` and ``gh`` executables first on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, src in (("claude", FAKE_CLAUDE), ("gh", FAKE_GH)):
+        exe = bin_dir / name
+        exe.write_text(src.format(python=sys.executable), encoding="utf-8")
+        exe.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("FAKE_CLAUDE_LOG", str(tmp_path / "claude.log"))
+    monkeypatch.setenv("FAKE_GH_LOG", str(tmp_path / "gh.log"))
+    return bin_dir
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from pathlib import Path
+
+import pytest
+import typer
+from claude_code_manager import admission, engine, signals
+from claude_code_manager.admission import AdmissionController
+from claude_code_manager.cli import Config, parse_todo_markdown
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_launch_budget_is_a_token_bucket():
+    clock = FakeClock()
+    gate = AdmissionController(launches_per_minute=30, burst=2, clock=clock)
+    assert gate.delay() == 0
+    gate._take()
+    gate._take()
+    # Bucket empty: one launch every 2 seconds
+    assert gate.delay() == pytest.approx(2.0)
+    clock.now += 1.5
+    assert gate.delay() == pytest.approx(0.5)
+    clock.now += 10
+    # Refills only up to the burst size
+    gate._take()
+    gate._take()
+    assert gate.delay() == pytest.approx(2.0)
+
+
+def test_backoff_is_jittered_exponential_and_shared():
+    clock = FakeClock()
+    gate = AdmissionController(backoff_base=10, backoff_max=35, clock=clock, rng=random.Random(1))
+    first = gate.backoff("rate_limit")
+    assert 5 <= first <= 10 and gate.delay() == pytest.approx(first)
+    # Every worker reporting the same limit does not escalate the pause
+    gate.note_signal(signals.RATE_LIMIT)
+    gate.note_signal(signals.OVERLOADED)
+    gate.note_signal(signals.ERROR)
+    assert gate.failures == 1
+    clock.now += first
+    assert 10 <= gate.backoff("rate_limit") <= 20
+    clock.now += 100
+    # Capped at backoff_max
+    assert 17.5 <= gate.backoff("rate_limit") <= 35
+    gate.note_success()
+    clock.now += 100
+    assert gate.backoff("rate_limit") <= 10
+
+
+def test_cooldown_caps_the_launch_rate():
+    gate = AdmissionController.from_config(Config(cooldown=4, launches_per_minute=60))
+    assert gate.rate == pytest.approx(0.25)
+    assert AdmissionController.from_config(Config()).rate == 0
+
+
+def test_rate_limited_runs_back_off_and_retry(git_repo: Path, fake_bin: Path, monkeypatch):
+    countdown = git_repo.parent / "limited"
+    countdown.write_text("2")
+    monkeypatch.setenv("FAKE_CLAUDE_RATE_LIMITED", str(countdown))
+    (git_repo / "TODO.md").write_text("- [ ] one\n- [ ] two\n", encoding="utf-8")
+    items = parse_todo_markdown((git_repo / "TODO.md").read_text(encoding="utf-8"))
+    cfg = Config(pr_urls=[])
+    gate = AdmissionController(backoff_base=0.2, backoff_max=1.0)
+
+    async def _run() -> None:
+        # An outer controller is shared instead of the run's own
+        with admission.shared(gate):
+            await engine.run_sequential(git_repo, items, cfg)
+
+    asyncio.run(_run())
+    assert len(cfg.pr_urls) == 2 and all(cfg.pr_urls)
+    assert countdown.read_text() == "0"
+    # Two retries, then a clean run reset the backoff
+    assert gate.launches == 4 and gate.failures == 0
+    assert admission.current() is None
+
+    log = fake_bin.parent / "claude.log"
+    starts = [
+        e["t"] for e in map(json.loads, log.read_text().splitlines()) if e["event"] == "start"
+    ]
+    # The second retry waited longer than the first (0.1-0.2s, then 0.2-0.4s)
+    assert starts[1] - starts[0] >= 0.1 and starts[2] - starts[1] >= 0.2
+
+
+def test_rate_limit_retries_are_bounded(git_repo: Path, fake_bin: Path, monkeypatch):
+    countdown = git_repo.parent / "limited"
+    countdown.write_text("5")
+    monkeypatch.setenv("FAKE_CLAUDE_RATE_LIMITED", str(countdown))
+    (git_repo / "TODO.md").write_text("- [ ] one\n", encoding="utf-8")
+    items = parse_todo_markdown((git_repo / "TODO.md").read_text(encoding="utf-8"))
+    cfg = Config(backoff_base=0.01, rate_limit_retries=1, pr_urls=[])
+    with pytest.raises(typer.Exit):
+        asyncio.run(engine.run_sequential(git_repo, items, cfg))
+    assert countdown.read_text() == "3"
+
+
+def test_launch_budget_spans_parallel_workers(git_repo: Path, fake_bin: Path):
+    (git_repo / "TODO.md").write_text("- [ ] a\n- [ ] b\n- [ ] c\n", encoding="utf-8")
+    items = parse_todo_markdown((git_repo / "TODO.md").read_text(encoding="utf-8"))
+    cfg = Config(worktree_parallel_max_semaphore=3, launches_per_minute=200, pr_urls=[])
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+    assert len(cfg.pr_urls) == 3
+    log = fake_bin.parent / "claude.log"
+    starts = sorted(
+        e["t"] for e in map(json.loads, log.read_text().splitlines()) if e["event"] == "start"
+    )
+    # 200/min: at least 0.3s between launches even with three free workers
+    assert all(b - a >= 0.25 for a, b in zip(starts, starts[1:], strict=False))
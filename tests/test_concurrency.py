@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+import typer
+from claude_code_manager import engine, signals
+from claude_code_manager.cli import Config, TodoItem
+from claude_code_manager.concurrency import (
+    AdjustableSemaphore,
+    ConcurrencyController,
+    SystemSample,
+)
+from claude_code_manager.stream_json import decode_line
+
+
+def _line(obj: dict) -> str:
+    return json.dumps(obj)
+
+
+def test_classify_stream_signals():
+    def kind(obj: dict) -> str | None:
+        return signals.classify(decode_line(_line(obj)))
+
+    api_529 = {
+        "type": "assistant",
+        "message": {
+            "model": "<synthetic>",
+            "content": [{"type": "text", "text": "API Error: 529"}],
+        },
+        "isApiErrorMessage": True,
+    }
+    assert kind(api_529) == signals.OVERLOADED
+    marked = {"type": "assistant", "message": {"content": "Rate limited"}, "error": "rate_limit"}
+    assert kind(marked) == signals.RATE_LIMIT
+    err = {"type": "error", "error": {"type": "rate_limit_error", "message": "slow down"}}
+    assert kind(err) == signals.RATE_LIMIT
+    assert kind({"type": "result", "subtype": "success", "is_error": True}) == signals.ERROR
+    assert kind({"type": "result", "subtype": "success", "is_error": False}) is None
+    # Tool output (and prose) mentioning an error type is not a signal
+    assert kind({"type": "user", "message": {"content": "API Error: 429"}}) is None
+    assert kind({"type": "assistant", "message": {"content": "handle rate_limit_error"}}) is None
+    assert kind({"type": "assistant", "message": {"content": "API Error: 529 overloaded"}}) is None
+    tool_use = {
+        "type": "assistant",
+        "message": {
+            "content": [
+                {
+                    "type": "tool_use",
+                    "name": "Edit",
+                    "input": {"new_string": 'error = "API Error: 429"', "error": "rate_limit"},
+                }
+            ]
+        },
+    }
+    assert kind(tool_use) is None
+    result = {"type": "result", "subtype": "success", "result": "Fixed API Error: 429 handling"}
+    assert kind(result) is None
+
+
+def test_controller_decisions():
+    async def main() -> None:
+        sem = AdjustableSemaphore(4)
+        ctl = ConcurrencyController(sem, min_workers=1, max_workers=6, min_free_memory_mb=500)
+        healthy = SystemSample(load_per_cpu=0.2, free_memory_mb=8000, free_disk_mb=1e6)
+
+        # No queued items: stay put
+        assert ctl.decide(healthy)[0] == 4
+        ctl.note_signal(signals.OVERLOADED)
+        assert ctl.decide(healthy)[0] == 2
+        # Signals are consumed by a decision
+        assert ctl.decide(healthy)[0] == 4
+        assert ctl.decide(SystemSample(load_per_cpu=3.0))[0] == 3
+        assert ctl.decide(SystemSample(free_memory_mb=100))[0] == 3
+        ctl.note_signal(signals.ERROR)
+        assert ctl.decide(healthy)[0] == 3
+
+        # Every slot busy and items queued: grow by one, up to the max
+        for _ in range(4):
+            await sem.acquire()
+        waiter = asyncio.create_task(sem.acquire())
+        await asyncio.sleep(0)
+        assert sem.waiting == 1
+        ctl.probe = lambda: healthy
+        await ctl.step()
+        await asyncio.wait_for(waiter, 1)
+        assert sem.limit == 5 and sem.active == 5
+        assert ctl.history[-1][1:] == (5, "healthy with queued items")
+
+    asyncio.run(main())
+
+
+def test_lowering_the_limit_only_delays_new_acquires():
+    async def main() -> None:
+        sem = AdjustableSemaphore(2)
+        await sem.acquire()
+        await sem.acquire()
+        await sem.set_limit(1)
+        late = asyncio.create_task(sem.acquire())
+        await sem.release()
+        await asyncio.sleep(0.01)
+        # Still one active (over the new limit of 1 until it drains)
+        assert not late.done()
+        await sem.release()
+        await asyncio.wait_for(late, 1)
+        assert sem.active == 1
+
+    asyncio.run(main())
+
+
+def test_adaptive_parallel_run_completes(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DELAY", "0.2")
+    titles = ["a", "b", "c"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(
+        worktree_parallel_max_semaphore=3,
+        adaptive_concurrency=True,
+        adapt_interval=0.05,
+        pr_urls=[],
+    )
+    asyncio.run(engine.run_worktree_parallel(git_repo, [TodoItem(t, []) for t in titles], cfg))
+    assert len(cfg.pr_urls) == 3 and all(cfg.pr_urls)
+    assert not signals.active()
+
+
+def test_failed_launch_emits_one_error(tmp_path: Path, fake_bin: Path, monkeypatch):
+    # The stream's is_error result and the non-zero exit are the same failure
+    monkeypatch.setenv("FAKE_CLAUDE_RC", "1")
+    seen: list[str] = []
+    unsubscribe = signals.subscribe(seen.append)
+    try:
+        with pytest.raises(typer.Exit):
+            asyncio.run(
+                engine._run_claude_for_item(
+                    TodoItem("fails", []), Config(), tmp_path, row_index=0, row_updater=None
+                )
+            )
+    finally:
+        unsubscribe()
+    assert seen == [signals.ERROR]
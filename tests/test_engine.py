@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+import time
+from pathlib import Path
+
+from claude_code_manager import cli, engine
+from claude_code_manager.cli import Config, TodoItem
+
+
+def _read_log(path: Path) -> list[dict]:
+    return [json.loads(x) for x in path.read_text(encoding="utf-8").splitlines() if x]
+
+
+def test_run_worktree_parallel_caps_concurrency(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DELAY", "0.3")
+    titles = ["item a", "item b", "item c", "item d"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(worktree_parallel=True, worktree_parallel_max_semaphore=2, pr_urls=[])
+
+    items = [TodoItem(title=t, children=[]) for t in titles]
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+
+    assert len(cfg.pr_urls) == 4 and all(cfg.pr_urls)
+    todo = (git_repo / "TODO.md").read_text(encoding="utf-8")
+    assert todo.count("- [x] ") == 4
+
+    # Replay start/end events to find the peak number of concurrent claude runs
+    active = peak = 0
+    events = sorted(_read_log(fake_bin.parent / "claude.log"), key=lambda e: e["t"])
+    for ev in events:
+        active += 1 if ev["event"] == "start" else -1
+        peak = max(peak, active)
+    assert peak == 2
+
+    # Two pooled worktrees served all four items
+    assert sorted(p.name for p in cli.CREATED_WORKTREES) == ["slot-1", "slot-2"]
+
+    # Each pushed branch holds only its own change, nothing left over from the slot's
+    # previous item
+    heads = subprocess.check_output(
+        ["git", "ls-remote", "--heads", "origin"], cwd=git_repo, text=True
+    )
+    branches = [ln.split("refs/heads/")[1] for ln in heads.splitlines() if "todo/" in ln]
+    assert len(branches) == 4
+    for b in branches:
+        files = subprocess.check_output(
+            ["git", "ls-tree", "--name-only", f"origin/{b}"], cwd=git_repo, text=True
+        ).split()
+        assert sum(f.startswith("claude-") for f in files) == 1
+
+    cli._cleanup_created_worktrees(git_repo)
+    assert not any((git_repo / ".worktrees").iterdir())
+
+
+def test_run_worktree_parallel_without_reuse(git_repo: Path, fake_bin: Path):
+    (git_repo / "TODO.md").write_text("- [ ] one\n- [ ] two\n", encoding="utf-8")
+    cfg = Config(worktree_parallel_max_semaphore=2, worktree_reuse=False, pr_urls=[])
+    items = [TodoItem(title=t, children=[]) for t in ("one", "two")]
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+    assert len(cfg.pr_urls) == 2 and all(cfg.pr_urls)
+    assert not cli.CREATED_WORKTREES
+    assert not any((git_repo / ".worktrees").iterdir())
+
+
+def test_check_output_raises_called_process_error(tmp_path: Path):
+    try:
+        asyncio.run(engine.git("rev-parse", "HEAD", cwd=tmp_path))
+    except subprocess.CalledProcessError as e:
+        assert e.returncode != 0
+    else:
+        raise AssertionError("expected CalledProcessError")
+
+
+def test_gh_capabilities_probed_once_and_cached_on_disk(tmp_path: Path, fake_bin: Path):
+    gh_log = fake_bin.parent / "gh.log"
+
+    async def _create_many() -> list[str | None]:
+        return await asyncio.gather(
+            *[engine.create_pr("t", "b", "main", f"todo/x{i}", cwd=tmp_path) for i in range(5)]
+        )
+
+    urls = asyncio.run(_create_many())
+    assert all(u and "/pull/" in u for u in urls)
+    calls = _read_log(gh_log)
+    assert sum("--help" in c for c in calls) == 2
+    assert sum(c == ["--version"] for c in calls) == 1
+    assert engine.gh_cache_path().exists()
+
+    # A fresh process (simulated by a reset) reuses the on-disk result
+    engine.reset_gh_capabilities()
+    gh_log.unlink()
+    asyncio.run(engine.create_pr("t", "b", "main", "todo/y", cwd=tmp_path))
+    calls = _read_log(gh_log)
+    assert not any("--help" in c for c in calls)
+    assert sum(c == ["--version"] for c in calls) == 1
+
+
+def test_fetch_coordinator_dedupes_and_honours_ttl(git_repo: Path, tmp_path: Path):
+    # Advance the bare remote from a second clone
+    other = tmp_path / "other"
+    subprocess.check_call(
+        ["git", "clone", "-q", str(tmp_path / "remote.git"), str(other)], cwd=tmp_path
+    )
+    (other / "new.txt").write_text("x", encoding="utf-8")
+    for args in (["add", "-A"], ["commit", "-qm", "new"], ["push", "-q"]):
+        subprocess.check_call(
+            ["git", "-c", "user.name=o", "-c", "user.email=o@x", *args], cwd=other
+        )
+
+    fc = engine.fetch_coordinator(git_repo, ttl=60)
+
+    async def _many() -> None:
+        await asyncio.gather(*[fc.ensure_fresh() for _ in range(8)])
+        await fc.ensure_fresh()
+
+    asyncio.run(_many())
+    assert fc.fetch_count == 1
+    log = subprocess.check_output(["git", "log", "--oneline", "origin/main"], cwd=git_repo)
+    assert b"new" in log
+
+    fc.ttl = 0
+    asyncio.run(fc.ensure_fresh())
+    assert fc.fetch_count == 2
+    assert engine.fetch_coordinator(git_repo, ttl=0) is fc
+
+
+def test_sparse_worktree_materializes_only_the_cone(git_repo: Path, fake_bin: Path):
+    for rel in ("pkg/a/x.txt", "pkg/b/y.txt"):
+        (git_repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (git_repo / rel).write_text(rel, encoding="utf-8")
+    subprocess.check_call(["git", "add", "-A"], cwd=git_repo)
+    subprocess.check_call(["git", "commit", "-qm", "pkgs"], cwd=git_repo)
+
+    titles = ["only a (sparse: pkg/a)", "only b (sparse: pkg/b)", "everything"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(worktree_sparse=True, pr_urls=[])
+    items = [TodoItem(title=t, children=[]) for t in titles]
+    # One slot is reused, so the cone must change between items
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+
+    starts = [e for e in _read_log(fake_bin.parent / "claude.log") if e["event"] == "start"]
+    by_prompt = {e["argv"][1].split("Title: ")[1].split("\n")[0]: set(e["files"]) for e in starts}
+    assert "pkg/a/x.txt" in by_prompt["only a"] and "pkg/b/y.txt" not in by_prompt["only a"]
+    assert "pkg/b/y.txt" in by_prompt["only b"] and "pkg/a/x.txt" not in by_prompt["only b"]
+    assert {"pkg/a/x.txt", "pkg/b/y.txt"} <= by_prompt["everything"]
+    assert (git_repo / "TODO.md").read_text(encoding="utf-8").count("- [x] ") == 3
+
+
+def test_batch_push_single_push_and_per_branch_failures(
+    git_repo: Path, fake_bin: Path, tmp_path: Path
+):
+    hooks = tmp_path / "remote.git" / "hooks"
+    pushes = tmp_path / "pushes.log"
+    (hooks / "pre-receive").write_text(f"#!/bin/sh\necho push >> {pushes}\n", encoding="utf-8")
+    (hooks / "update").write_text(
+        '#!/bin/sh\ncase "$1" in *reject*) exit 1;; esac\nexit 0\n', encoding="utf-8"
+    )
+    for hook in ("pre-receive", "update"):
+        (hooks / hook).chmod(0o755)
+
+    titles = ["good one", "reject me", "good two"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(worktree_parallel_max_semaphore=2, batch_push=True, pr_urls=[], push_failures=[])
+    items = [TodoItem(title=t, children=[]) for t in titles]
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+
+    assert pushes.read_text(encoding="utf-8").splitlines() == ["push"]
+    assert len(cfg.pr_urls) == 2 and all(cfg.pr_urls)
+    assert len(cfg.push_failures) == 1 and "reject-me" in cfg.push_failures[0]
+    todo = (git_repo / "TODO.md").read_text(encoding="utf-8")
+    assert "- [ ] reject me" in todo and todo.count("- [x] ") == 2
+
+
+def test_parse_push_porcelain():
+    out = (
+        "To /tmp/remote.git\n"
+        "*\trefs/heads/a:refs/heads/a\t[new branch]\n"
+        "!\trefs/heads/b:refs/heads/b\t[remote rejected] (hook declined)\n"
+        "=\trefs/heads/c:refs/heads/c\t[up to date]\n"
+        "Done\n"
+    )
+    assert engine.parse_push_porcelain(out) == {"a": True, "b": False, "c": True}
+
+
+def test_bounces_resume_the_first_session(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DONE", "0")
+    (git_repo / "TODO.md").write_text("- [ ] keep going\n", encoding="utf-8")
+    cfg = Config(max_keep_asking=2, pr_urls=[])
+    item = TodoItem(title="keep going", children=[])
+    asyncio.run(engine.run_sequential(git_repo, [item], cfg))
+
+    argvs = [e["argv"] for e in _read_log(fake_bin.parent / "claude.log") if e["event"] == "start"]
+    assert len(argvs) == 3
+    assert "--resume" not in argvs[0]
+    resumed = {a[a.index("--resume") + 1] for a in argvs[1:]}
+    assert len(resumed) == 1 and resumed != {""}
+
+
+def test_stalled_item_times_out_and_frees_its_slot(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_HANG_ON", "Title: slow")
+    titles = ["slow one", "fast one"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(claude_stall_timeout=0.5, pr_urls=[], timed_out=[])
+    items = [TodoItem(title=t, children=[]) for t in titles]
+
+    t0 = time.monotonic()
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+    assert time.monotonic() - t0 < 30
+
+    assert cfg.timed_out == ["slow one"]
+    assert len(cfg.pr_urls) == 1
+    todo = (git_repo / "TODO.md").read_text(encoding="utf-8")
+    assert "- [ ] slow one" in todo and "- [x] fast one" in todo
+
+
+def test_claude_timeout_excludes_admission_waits(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DONE", "0")
+    (git_repo / "TODO.md").write_text("- [ ] keep going\n", encoding="utf-8")
+    # The bounce waits 2s for the cooldown, longer than the whole claude budget
+    cfg = Config(max_keep_asking=1, cooldown=2, claude_timeout=1.5, pr_urls=[], timed_out=[])
+    item = TodoItem(title="keep going", children=[])
+    asyncio.run(engine.run_sequential(git_repo, [item], cfg))
+
+    starts = [e for e in _read_log(fake_bin.parent / "claude.log") if e["event"] == "start"]
+    assert len(starts) == 2 and starts[1]["t"] - starts[0]["t"] >= 1.5
+    assert cfg.timed_out == [] and len(cfg.pr_urls) == 1
+
+
+def test_claude_lingering_after_its_output_closes_is_stopped(
+    tmp_path: Path, fake_bin: Path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_CLAUDE_LINGER", "60")
+
+    def run(**kw) -> engine.ClaudeRunResult:
+        return asyncio.run(
+            engine.run_claude(
+                "",
+                False,
+                cwd=tmp_path,
+                prompt="p",
+                done_token="CLAUDE_MANAGER_DONE",
+                row_index=0,
+                kill_grace=0.5,
+                **kw,
+            )
+        )
+
+    t0 = time.monotonic()
+    res = run(stall_timeout=0.5)
+    assert res.timed_out == "stall" and res.done_seen
+    # Without timeouts it gets kill_grace to exit, then is terminated
+    res = run()
+    assert res.timed_out is None and res.returncode != 0
+    assert time.monotonic() - t0 < 10
+
+
+def test_own_files_stay_out_of_item_commits(git_repo: Path, fake_bin: Path):
+    # A repository that does not ignore .claude-manager/
+    (git_repo / ".gitignore").write_text("TODO.md\n.worktrees/\n", encoding="utf-8")
+    subprocess.check_call(["git", "commit", "-qam", "track state"], cwd=git_repo)
+    # Left over from an earlier run with --trace/--summary-json
+    (git_repo / "trace.json").write_text("{}", encoding="utf-8")
+    (git_repo / "summary.json").write_text("{}", encoding="utf-8")
+    titles = ["item a", "item b", "item c"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(pr_urls=[], trace_path="trace.json", summary_path="summary.json")
+    items = [TodoItem(title=t, children=[]) for t in titles]
+    asyncio.run(engine.run_sequential(git_repo, items, cfg))
+
+    assert len(cfg.pr_urls) == 3 and all(cfg.pr_urls)
+    assert (git_repo / ".claude-manager" / "durations.jsonl").exists()
+    for branch in subprocess.check_output(
+        ["git", "branch", "--format=%(refname:short)", "--list", "todo/*"], cwd=git_repo, text=True
+    ).split():
+        files = subprocess.check_output(
+            ["git", "diff", "--name-only", "main", branch], cwd=git_repo, text=True
+        ).split()
+        assert files and all(f.startswith("claude-") for f in files), (branch, files)
+
+
+def test_partial_clone_needs_explicit_opt_in(git_repo: Path, capsys):
+    def config() -> list[str]:
+        out = subprocess.check_output(["git", "config", "--local", "--list"], cwd=git_repo)
+        return out.decode().splitlines()
+
+    before = config()
+    asyncio.run(engine.enable_partial_clone(git_repo, Config(partial_clone_filter="blob:none")))
+    assert config() == before
+    assert "remote.origin.promisor=true" in capsys.readouterr().out
+
+    cfg = Config(partial_clone_filter="blob:none", partial_clone_convert=True)
+    asyncio.run(engine.enable_partial_clone(git_repo, cfg))
+    added = [c for c in config() if c not in before]
+    assert {"remote.origin.promisor=true", "remote.origin.partialclonefilter=blob:none"} <= set(
+        added
+    )
+    out = capsys.readouterr().out
+    assert all(c in out for c in added)
+    assert "git config --unset remote.origin.promisor" in out
+    assert "git fetch --refetch --no-filter origin" in out
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from claude_code_manager import engine
+from claude_code_manager.framing import HEAD_BYTES, LineFramer, TokenMatcher
+from claude_code_manager.stream_json import StreamDecoder, bulk_type
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_token_matcher_finds_patterns_split_across_chunks():
+    for size in (1, 2, 3, 5, 64):
+        m = TokenMatcher([b"DONE_TOKEN", b"API Error: 429"])
+        for chunk in _chunks(b"xx DONE_TO" + b"KEN yy API Error: 42" + b"9", size):
+            m.feed(chunk)
+        assert m.found == {b"DONE_TOKEN", b"API Error: 429"}, size
+    m = TokenMatcher([b"DONE_TOKEN"])
+    for chunk in _chunks(b"DONE_TOKE n DONE_TOKEX", 3):
+        m.feed(chunk)
+    assert m.found == set()
+
+
+def test_framer_keeps_wanted_lines_and_caps_the_rest():
+    user = b'{"type":"user","message":"' + b"u" * 5000 + b' TOKEN"}'
+    assistant = b'{"type":"assistant","message":"' + b"a" * 5000 + b' TOKEN"}'
+    result = b'{"type":"result","session_id":"s1"}'
+    huge = b'{"type":"result","result":"' + b"r" * 5000 + b'"}'
+    data = b"\n".join([user, assistant, result, huge, b"tail TOKEN"])
+    framer = LineFramer([b"TOKEN"], max_line_bytes=1000, want=lambda head: bulk_type(head) is None)
+    frames = [f for chunk in _chunks(data, 97) for f in framer.feed(chunk)] + framer.close()
+
+    assert [f.size for f in frames] == [len(user), len(assistant), len(result), len(huge), 10]
+    assert [f.data is not None for f in frames] == [False, False, True, False, True]
+    assert frames[2].data == result and len(frames[0].head) == HEAD_BYTES
+    assert [b"TOKEN" in f.matches for f in frames] == [True, True, False, False, True]
+    assert framer.oversized == 1
+
+    decoder = StreamDecoder("TOKEN")
+    events = [decoder.decode_frame(f) for f in frames[:3]]
+    # Tool output quoting the token does not count; the assistant saying it does
+    assert [(e.type, e.done) for e in events] == [
+        ("user", False),
+        ("assistant", True),
+        ("result", False),
+    ]
+    assert decoder.done_seen and decoder.session_id == "s1"
+
+
+def test_run_claude_decodes_tiny_chunks(tmp_path: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setattr(engine, "READ_CHUNK", 7)
+    monkeypatch.setattr(engine, "MAX_LINE_BYTES", 1024)
+    res = asyncio.run(
+        engine.run_claude(
+            "",
+            False,
+            cwd=tmp_path,
+            prompt="p",
+            done_token="CLAUDE_MANAGER_DONE",
+            row_index=0,
+        )
+    )
+    assert res.returncode == 0 and res.done_seen
+    assert res.session_id and res.usage is not None and res.usage.input_tokens == 100
+    log = [json.loads(x) for x in (fake_bin.parent / "claude.log").read_text().splitlines()]
+    assert [e["event"] for e in log] == ["start", "end"]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+import threading
+from pathlib import Path
+
+from claude_code_manager import engine, journal
+from claude_code_manager.cli import Config, TodoItem, parse_todo_markdown
+from claude_code_manager.history import DurationHistory
+from claude_code_manager.journal import RunJournal
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.check_output(["git", *args], cwd=repo, text=True).strip()
+
+
+def _claude_starts(fake_bin: Path) -> int:
+    log = fake_bin.parent / "claude.log"
+    if not log.exists():
+        return 0
+    return sum(json.loads(x)["event"] == "start" for x in log.read_text().splitlines() if x)
+
+
+def test_journal_replay(tmp_path: Path):
+    path = tmp_path / "state.jsonl"
+    j = RunJournal(path)
+    j.record("a", "branch", branch="todo/a")
+    j.record("a", "committed")
+    j.record("b", "branch", branch="todo/b")
+    j.record("b", "pr", pr_url="https://example.com/pull/1")
+    j.record("b", "branch", branch="todo/b2")
+    # A crash mid-append leaves a torn last line
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"item": "a", "pha')
+
+    j2 = RunJournal(path)
+    a = j2.state("a")
+    assert a is not None and a.branch == "todo/a" and a.reached("committed")
+    assert not a.reached("pushed")
+    # A new branch record starts the item over
+    b = j2.state("b")
+    assert b is not None and b.branch == "todo/b2" and b.phase == "branch" and b.pr_url is None
+
+    j2.compact({"a"})
+    assert RunJournal(path).state("b") is None
+    assert RunJournal(path).state("a").reached("committed")
+
+
+def test_rerun_resumes_item_in_its_old_worktree(git_repo: Path, fake_bin: Path):
+    # Simulate a run killed after claude finished but before the commit
+    wt = git_repo / ".worktrees" / "slot-1"
+    _git(git_repo, "worktree", "add", "-B", "todo/resume-me", str(wt), "main")
+    (wt / "partial.txt").write_text("claude output\n", encoding="utf-8")
+    j = RunJournal(git_repo / ".claude-manager" / "state.jsonl")
+    j.record("resume me", "branch", branch="todo/resume-me", worktree=str(wt))
+    j.record("resume me", "claude_done")
+
+    (git_repo / "TODO.md").write_text("- [ ] resume me\n- [ ] fresh\n", encoding="utf-8")
+    cfg = Config(worktree_parallel_max_semaphore=2, pr_urls=[])
+    items = [TodoItem(title=t, children=[]) for t in ("resume me", "fresh")]
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+
+    # Only the fresh item ran claude, and it did not take over the reserved slot
+    assert _claude_starts(fake_bin) == 1
+    assert len(cfg.pr_urls) == 2 and all(cfg.pr_urls)
+    files = _git(git_repo, "ls-tree", "--name-only", "origin/todo/resume-me").split()
+    assert "partial.txt" in files
+    state = RunJournal(git_repo / ".claude-manager" / "state.jsonl").state("resume me")
+    assert state is not None and state.reached("pr")
+    # Only the item claude ran for has a duration; the resumed one would be near zero
+    history = DurationHistory(git_repo / cfg.history_path)
+    assert [r.title for r in history.records] == ["fresh"]
+
+
+def test_sequential_rerun_only_opens_the_missing_pr(git_repo: Path, fake_bin: Path):
+    _git(git_repo, "branch", "todo/pushed-item", "main")
+    j = RunJournal(git_repo / ".claude-manager" / "state.jsonl")
+    j.record("pushed item", "branch", branch="todo/pushed-item")
+    j.record("pushed item", "pushed")
+
+    (git_repo / "TODO.md").write_text("- [ ] pushed item\n", encoding="utf-8")
+    cfg = Config(pr_urls=[])
+    asyncio.run(engine.run_sequential(git_repo, [TodoItem("pushed item", [])], cfg))
+
+    assert _claude_starts(fake_bin) == 0
+    gh_calls = [json.loads(x) for x in (fake_bin.parent / "gh.log").read_text().splitlines()]
+    creates = [c for c in gh_calls if c[:2] == ["pr", "create"] and "--help" not in c]
+    assert len(creates) == 1 and "todo/pushed-item" in creates[0]
+    assert "- [x] pushed item" in (git_repo / "TODO.md").read_text(encoding="utf-8")
+    assert DurationHistory(git_repo / cfg.history_path).records == []
+
+
+def test_items_with_the_same_title_have_their_own_journal_entries(git_repo: Path, fake_bin: Path):
+    md = "- [ ] same\n- [ ] same\n"
+    (git_repo / "TODO.md").write_text(md, encoding="utf-8")
+    cfg = Config(pr_urls=[])
+    items = parse_todo_markdown(md)
+    asyncio.run(engine.run_sequential(git_repo, items, cfg))
+
+    assert _claude_starts(fake_bin) == 2
+    assert len(set(cfg.pr_urls)) == 2 and all(cfg.pr_urls)
+    todo = (git_repo / "TODO.md").read_text(encoding="utf-8")
+    assert todo.count("- [x] same") == 2
+    assert all(u in todo for u in cfg.pr_urls)
+    j = RunJournal(git_repo / ".claude-manager" / "state.jsonl")
+    states = [j.state(engine.journal_key(item)) for item in items]
+    assert all(s is not None and s.reached("pr") for s in states)
+    assert states[0].branch != states[1].branch
+
+
+def test_journal_fsyncs_off_the_event_loop(git_repo: Path, fake_bin: Path, monkeypatch):
+    threads: list[threading.Thread] = []
+    fsync = journal.os.fsync
+
+    def _fsync(fd: int) -> None:
+        threads.append(threading.current_thread())
+        fsync(fd)
+
+    monkeypatch.setattr(journal.os, "fsync", _fsync)
+    (git_repo / "TODO.md").write_text("- [ ] a\n- [ ] b\n", encoding="utf-8")
+    cfg = Config(worktree_parallel_max_semaphore=2, pr_urls=[])
+    items = [TodoItem(title=t, children=[]) for t in ("a", "b")]
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+
+    # branch, claude_done, committed, pushed and pr for each item
+    assert len(threads) >= 10
+    assert threading.main_thread() not in threads
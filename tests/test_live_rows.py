@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import io
+
+from claude_code_manager.cli import LiveRows
+
+
+class _CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s: str) -> int:
+        self.writes += 1
+        return super().write(s)
+
+
+def test_live_rows_coalesces_updates():
+    out = _CountingStream()
+    live = LiveRows(3, lines_per_row=1, fps=5, stream=out)
+    for i in range(300):
+        live.update(i % 3, f"row {i % 3} step {i}", "")
+    live.finish()
+    text = out.getvalue()
+    assert "row 0 step 297" in text and "row 2 step 299" in text
+    # 300 updates collapse into a handful of frames (plus the trailing newline)
+    assert out.writes < 20
+
+
+def test_live_rows_redraws_only_changed_rows():
+    out = io.StringIO()
+    live = LiveRows(2, lines_per_row=1, stream=out)
+    live.lines[0] = ("alpha", "", False)
+    live.lines[1] = ("beta", "", False)
+    first = live._render_frame()
+    assert "alpha" in first and "beta" in first
+
+    live.lines[1] = ("gamma", "", False)
+    second = live._render_frame()
+    assert "gamma" in second and "alpha" not in second
+    assert live._render_frame() == ""
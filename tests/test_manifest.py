@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+from claude_code_manager import engine
+from claude_code_manager.cli import Config, parse_todo_markdown
+from claude_code_manager.manifest import ManifestError, load_manifest, repo_config
+
+
+def _git(*args: str, cwd: Path) -> None:
+    subprocess.check_call(
+        ["git", *args], cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def _make_repo(tmp_path: Path, name: str, todo: str) -> Path:
+    remote = tmp_path / f"{name}.git"
+    repo = tmp_path / name
+    repo.mkdir()
+    _git("init", "--bare", "-b", "main", str(remote), cwd=tmp_path)
+    _git("init", "-b", "main", cwd=repo)
+    for k, v in (("user.name", "t"), ("user.email", "t@example.com")):
+        _git("config", k, v, cwd=repo)
+    (repo / ".gitignore").write_text("TODO.md\n.worktrees/\n.claude-manager/\n", encoding="utf-8")
+    _git("add", "-A", cwd=repo)
+    _git("commit", "-m", "init", cwd=repo)
+    _git("remote", "add", "origin", str(remote), cwd=repo)
+    _git("push", "-u", "origin", "main", cwd=repo)
+    (repo / "TODO.md").write_text(todo, encoding="utf-8")
+    return repo
+
+
+def test_manifest_settings_precedence(tmp_path: Path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "b" / ".claude-manager.toml").write_text(
+        '[claude_manager]\ngit_base_branch = "develop"\ngit_branch_prefix = "b/"\n',
+        encoding="utf-8",
+    )
+    manifest = tmp_path / "repos.toml"
+    manifest.write_text(
+        '[[repo]]\npath = "a"\nmax_workers = 8\n\n'
+        '[[repo]]\npath = "b"\nmax_workers = 1\ngit_branch_prefix = "svc-b/"\n',
+        encoding="utf-8",
+    )
+    a, b = load_manifest(manifest)
+    assert a.path == (tmp_path / "a").resolve()
+
+    cfg = Config(worktree_parallel_max_semaphore=4, git_branch_prefix="todo/", usage=[])
+    cfg_a, cfg_b = repo_config(cfg, a), repo_config(cfg, b)
+    # A repository's share never exceeds the global pool
+    assert cfg_a.worktree_parallel_max_semaphore == 4
+    assert cfg_b.worktree_parallel_max_semaphore == 1
+    # Manifest settings win over the repository's config file, which wins over the CLI
+    assert (cfg_a.git_branch_prefix, cfg_a.git_base_branch) == ("todo/", "main")
+    assert (cfg_b.git_branch_prefix, cfg_b.git_base_branch) == ("svc-b/", "develop")
+    # Separate reports, one cost budget
+    assert cfg_a.usage is not cfg_b.usage
+    assert cfg_a.budget_usage is cfg_b.budget_usage is cfg.usage
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "",
+        "[[repo]]\nmax_workers = 1\n",
+        '[[repo]]\npath = "a"\nno_such_setting = 1\n',
+        '[[repo]]\npath = "a"\nworktree_parallel_max_semaphore = 3\n',
+        '[[repo]]\npath = "missing"\n',
+        '[[repo]]\npath = "a"\n\n[[repo]]\npath = "./a"\n',
+    ],
+)
+def test_invalid_manifest(tmp_path: Path, body: str):
+    (tmp_path / "a").mkdir()
+    manifest = tmp_path / "repos.toml"
+    manifest.write_text(body, encoding="utf-8")
+    with pytest.raises(ManifestError):
+        load_manifest(manifest)
+
+
+def test_run_repos_shares_one_pool(tmp_path: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DELAY", "0.3")
+    repo_a = _make_repo(tmp_path, "a", "- [ ] a1\n- [ ] a2\n- [ ] a3\n")
+    repo_b = _make_repo(tmp_path, "b", "- [ ] b1\n- [ ] b2\n")
+    cfg = Config(worktree_parallel_max_semaphore=2, usage=[])
+    cfg_a = Config(worktree_parallel_max_semaphore=1, pr_urls=[], usage=[], budget_usage=cfg.usage)
+    cfg_b = Config(worktree_parallel_max_semaphore=2, pr_urls=[], usage=[], budget_usage=cfg.usage)
+    runs = [
+        (repo, parse_todo_markdown((repo / "TODO.md").read_text(encoding="utf-8")), repo_cfg)
+        for repo, repo_cfg in ((repo_a, cfg_a), (repo_b, cfg_b))
+    ]
+
+    assert asyncio.run(engine.run_repos(runs, cfg)) == []
+
+    assert len(cfg_a.pr_urls) == 3 and len(cfg_b.pr_urls) == 2
+    assert len(cfg.usage) == 5
+    for repo in (repo_a, repo_b):
+        assert "- [ ]" not in (repo / "TODO.md").read_text(encoding="utf-8")
+
+    events = [json.loads(x) for x in (tmp_path / "claude.log").read_text().splitlines()]
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0, "all": 0}
+    for ev in sorted(events, key=lambda e: e["t"]):
+        repo = "a" if Path(ev["cwd"]).is_relative_to(repo_a) else "b"
+        active[repo] += 1 if ev["event"] == "start" else -1
+        peak[repo] = max(peak[repo], active[repo])
+        peak["all"] = max(peak["all"], sum(active.values()))
+    # Repo a never exceeds its own cap, and both together never exceed the global one
+    assert peak["a"] == 1 and peak["all"] == 2
+    # gh is probed once for the whole run
+    gh_calls = [json.loads(x) for x in (tmp_path / "gh.log").read_text().splitlines()]
+    assert sum(c[:1] == ["--version"] for c in gh_calls) == 1
+
+
+def test_run_manifest_reports_every_repo(tmp_path: Path, fake_bin: Path, monkeypatch):
+    from claude_code_manager import cli
+    from typer.testing import CliRunner
+
+    _make_repo(tmp_path, "a", "- [ ] a1\n")
+    _make_repo(tmp_path, "b", "- [x] done\n")
+    (tmp_path / "repos.toml").write_text(
+        '[[repo]]\npath = "a"\n\n[[repo]]\npath = "b"\n', encoding="utf-8"
+    )
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(
+        cli.APP, ["run", "--manifest", "repos.toml", "-s", "2", "--summary-json", "s.json"]
+    )
+    assert result.exit_code == 0, result.output
+    assert f"--- {tmp_path / 'a'} ---" in result.output
+    summary = json.loads((tmp_path / "s.json").read_text(encoding="utf-8"))
+    assert list(summary["repos"]) == [str(tmp_path / "a")]
+    assert len(summary["repos"][str(tmp_path / "a")]["pr_urls"]) == 1
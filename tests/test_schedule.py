@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+import typer
+from claude_code_manager import engine
+from claude_code_manager.cli import Config, parse_todo_markdown
+from claude_code_manager.history import DurationHistory
+from claude_code_manager.schedule import (
+    DependencyCycle,
+    resolve_dependencies,
+    schedule_order,
+    topological_order,
+)
+
+
+def test_resolve_dependencies_by_title_and_id():
+    items = parse_todo_markdown(
+        "- [ ] Add schema (id: schema)\n"
+        "- [ ] Add API (after: schema)\n"
+        "- [ ] Add UI (after: Add API, schema)\n"
+        "- [ ] Docs (after: Released earlier)\n"
+    )
+    assert items[0].name == "Add schema" and items[0].item_id == "schema"
+    deps, unknown = resolve_dependencies(items)
+    assert deps == [[], [0], [1, 0], []]
+    # Prerequisites that are not open items count as done
+    assert unknown == ["Released earlier"]
+    assert topological_order(items, deps) == [0, 1, 2, 3]
+
+
+def test_topological_order_keeps_file_order_otherwise():
+    items = parse_todo_markdown("- [ ] b (after: a)\n- [ ] c\n- [ ] a\n")
+    deps, _ = resolve_dependencies(items)
+    assert [items[i].name for i in topological_order(items, deps)] == ["c", "a", "b"]
+
+
+def test_dependency_cycle_is_reported():
+    items = parse_todo_markdown("- [ ] a (after: c)\n- [ ] b (after: a)\n- [ ] c (after: b)\n")
+    with pytest.raises(DependencyCycle) as exc:
+        resolve_dependencies(items)
+    assert exc.value.titles == ["a", "c", "b", "a"]
+
+
+def _claude_start_times(log: Path) -> dict[str, float]:
+    """Start time of each fake claude run, keyed by the item title in its prompt."""
+    starts: dict[str, float] = {}
+    for ev in (json.loads(x) for x in log.read_text(encoding="utf-8").splitlines()):
+        if ev["event"] == "start":
+            prompt = ev["argv"][ev["argv"].index("-p") + 1]
+            starts[prompt.split("Title: ")[1].split("\n")[0]] = ev["t"]
+    return starts
+
+
+def test_parallel_dependents_wait_and_stack(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DELAY", "0.4")
+    (git_repo / "TODO.md").write_text(
+        "- [ ] base work (id: base)\n- [ ] follow up (after: base)\n- [ ] independent\n",
+        encoding="utf-8",
+    )
+    items = parse_todo_markdown((git_repo / "TODO.md").read_text(encoding="utf-8"))
+    cfg = Config(worktree_parallel_max_semaphore=3, stack_dependents=True, pr_urls=[])
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+    assert len(cfg.pr_urls) == 3 and all(cfg.pr_urls)
+
+    starts = _claude_start_times(fake_bin.parent / "claude.log")
+    # The independent item ran alongside the prerequisite; the dependent waited for it
+    assert abs(starts["independent"] - starts["base work"]) < 0.4
+    assert starts["follow up"] - starts["base work"] >= 0.4
+
+    gh_calls = [json.loads(x) for x in (fake_bin.parent / "gh.log").read_text().splitlines()]
+    creates = {
+        c[c.index("--title") + 1]: c
+        for c in gh_calls
+        if c[:2] == ["pr", "create"] and "--help" not in c
+    }
+    base_branch = creates["feat: base work"][creates["feat: base work"].index("--head") + 1]
+    follow = creates["feat: follow up"]
+    # Stacked: the dependent's PR targets the prerequisite's branch and contains its work
+    assert follow[follow.index("--base") + 1] == base_branch
+    assert creates["feat: independent"][creates["feat: independent"].index("--base") + 1] == "main"
+    follow_head = follow[follow.index("--head") + 1]
+    files = subprocess.check_output(
+        ["git", "ls-tree", "--name-only", f"origin/{follow_head}"], cwd=git_repo, text=True
+    ).split()
+    assert sum(f.startswith("claude-") for f in files) == 2
+
+
+def test_sequential_dependent_of_timed_out_item_is_blocked(
+    git_repo: Path, fake_bin: Path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_CLAUDE_HANG_ON", "Title: slow")
+    (git_repo / "TODO.md").write_text(
+        "- [ ] after slow (after: slow)\n- [ ] slow\n- [ ] other\n", encoding="utf-8"
+    )
+    items = parse_todo_markdown((git_repo / "TODO.md").read_text(encoding="utf-8"))
+    cfg = Config(claude_stall_timeout=0.5, pr_urls=[], timed_out=[], blocked=[])
+    asyncio.run(engine.run_sequential(git_repo, items, cfg))
+    assert cfg.timed_out == ["slow"]
+    assert cfg.blocked == ["after slow"]
+    assert len(cfg.pr_urls) == 1
+
+
+def test_estimates_use_similar_titles_then_item_shape(tmp_path: Path):
+    history = DurationHistory(tmp_path / "durations.jsonl")
+    history.record("Add user API endpoint", 0, 200, 600)
+    history.record("Fix typo", 0, 200, 12)
+    reloaded = DurationHistory(tmp_path / "durations.jsonl")
+    assert len(reloaded.records) == 2
+    # A similar title takes that item's time; an unrelated one falls back to its size
+    assert reloaded.estimate("Add order API endpoint", 0, 200) == pytest.approx(600, rel=0.01)
+    # Median seconds per unit is (500 + 10) / 2; 200 prompt chars is 1.2 units
+    assert reloaded.estimate("Rename module", 0, 200) == pytest.approx(1.2 * 255)
+    assert reloaded.estimate("Rename module", 4, 200) == pytest.approx(3.2 * 255)
+
+
+def test_longest_first_follows_the_critical_path():
+    items = parse_todo_markdown(
+        "- [ ] small\n- [ ] medium\n- [ ] setup (id: s)\n- [ ] big after setup (after: s)\n"
+    )
+    deps, _ = resolve_dependencies(items)
+    estimates = [1.0, 5.0, 2.0, 10.0]
+    # setup is short but gates the longest chain, so it starts first
+    assert schedule_order(items, deps, "longest-first", estimates) == [2, 3, 1, 0]
+    assert schedule_order(items, deps, "shortest-first", estimates) == [0, 2, 1, 3]
+    assert schedule_order(items, deps, "file", estimates) == [0, 1, 2, 3]
+
+
+def test_parallel_longest_first_starts_big_items_and_records_durations(
+    git_repo: Path, fake_bin: Path
+):
+    (git_repo / "TODO.md").write_text(
+        "- [ ] tiny\n- [ ] huge\n  - [ ] part a\n  - [ ] part b\n  - [ ] part c\n- [ ] mid\n"
+        "  - [ ] part\n",
+        encoding="utf-8",
+    )
+    items = parse_todo_markdown((git_repo / "TODO.md").read_text(encoding="utf-8"))
+    cfg = Config(worktree_parallel_max_semaphore=1, schedule="longest-first", pr_urls=[])
+    asyncio.run(engine.run_worktree_parallel(git_repo, items, cfg))
+    starts = _claude_start_times(fake_bin.parent / "claude.log")
+    assert sorted(starts, key=starts.__getitem__) == ["huge", "mid", "tiny"]
+    history = DurationHistory(git_repo / cfg.history_path)
+    assert sorted(r.title for r in history.records) == ["huge", "mid", "tiny"]
+    assert all(r.seconds > 0 for r in history.records)
+
+
+def test_unknown_schedule_is_rejected(git_repo: Path):
+    items = parse_todo_markdown("- [ ] a\n")
+    with pytest.raises(typer.Exit):
+        asyncio.run(engine.run_sequential(git_repo, items, Config(schedule="random")))
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+from claude_code_manager import __version__
+
+
+def _python(code: str) -> str:
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, timeout=60
+    )
+    return proc.stdout.strip()
+
+
+def _loaded(prelude: str, modules: list[str]) -> list[str]:
+    code = f"{prelude}\nimport sys\nprint('loaded:', *(m for m in {modules!r} if m in sys.modules))"
+    return _python(code).splitlines()[-1].split()[1:]
+
+
+def test_version_fast_path_imports_nothing_heavy():
+    prelude = (
+        "import sys\nsys.argv = ['claude-manager', '--version']\n"
+        "from claude_code_manager.__main__ import main\nmain()"
+    )
+    assert _python(prelude).splitlines()[0] == __version__
+    assert _loaded(prelude, ["typer", "asyncio", "claude_code_manager.cli"]) == []
+
+
+def test_cli_import_does_not_load_the_engine():
+    assert (
+        _loaded("import claude_code_manager.cli", ["asyncio", "claude_code_manager.engine"]) == []
+    )
+
+
+def test_core_is_free_of_typer_and_asyncio():
+    assert _loaded("import claude_code_manager.core", ["typer", "asyncio"]) == []
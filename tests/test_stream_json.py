@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from claude_code_manager.stream_json import StreamDecoder, decode_line
+
+
+def test_decode_line_extracts_top_level_fields():
+    big = {"type": "tool_result", "content": 'x\\"{[' * 1000, "nested": [{"a": [1, {}]}]}
+    line = json.dumps(
+        {
+            "type": "result",
+            "subtype": "success",
+            "message": big,
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+            "total_cost_usd": 0.25,
+            "is_error": False,
+            "session_id": "abc",
+        }
+    )
+    ev = decode_line(line)
+    assert ev.is_json
+    assert (ev.type, ev.subtype, ev.session_id) == ("result", "success", "abc")
+    assert ev.usage == {"input_tokens": 10, "output_tokens": 5}
+    assert ev.fields == {"total_cost_usd": 0.25, "is_error": False}
+    assert ev.json()["message"] == big
+
+
+@pytest.mark.parametrize("line", ["plain text", '{"type": "a"', '{"type" "a"}', "[1, 2]"])
+def test_decode_line_non_json(line: str):
+    ev = decode_line(line)
+    assert not ev.is_json and ev.type is None
+
+
+def test_bulk_events_skip_scan_unless_requested():
+    line = json.dumps({"type": "assistant", "message": {}, "session_id": "s9"})
+    assert decode_line(line).type == "assistant"
+    assert decode_line(line).session_id is None
+    assert decode_line(line, full_scan=True).session_id == "s9"
+
+
+def test_done_token_ignored_in_tool_results():
+    tool = json.dumps({"type": "user", "message": {"content": "DONE"}})
+    said = json.dumps({"type": "assistant", "message": {"content": "DONE"}})
+    assert not decode_line(tool, "DONE").done
+    assert decode_line(said, "DONE").done
+    assert decode_line("all good DONE", "DONE").done
+
+
+def test_stream_decoder_feed_handles_split_lines():
+    dec = StreamDecoder("DONE")
+    payload = (
+        json.dumps({"type": "system", "subtype": "init", "session_id": "s1"})
+        + "\n"
+        + json.dumps({"type": "assistant", "message": {"content": "DONE"}})
+        + "\n"
+    )
+    events = []
+    for i in range(0, len(payload), 7):
+        events += dec.feed(payload[i : i + 7])
+    events += dec.close()
+    assert [e.type for e in events] == ["system", "assistant"]
+    assert dec.session_id == "s1" and dec.done_seen
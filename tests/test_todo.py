@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from claude_code_manager.core import TodoItem, parse_todo_markdown, split_todo_options
+
+
+def test_split_todo_options_known_keys_only():
+    assert split_todo_options("Add API (sparse: pkg/api, libs)") == (
+        "Add API",
+        {"sparse": "pkg/api, libs"},
+    )
+    # Unknown keys stay part of the title
+    assert split_todo_options("Fix bug (note: urgent)") == ("Fix bug (note: urgent)", {})
+
+
+def test_todo_item_sparse_paths():
+    items = parse_todo_markdown("- [ ] Add API (sparse: pkg/api libs)\n- [ ] Other\n")
+    assert items[0].title == "Add API (sparse: pkg/api libs)"
+    assert items[0].name == "Add API"
+    assert items[0].sparse_paths == ["pkg/api", "libs"]
+    assert TodoItem(title="Other", children=[]).sparse_paths is None
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+from claude_code_manager.cli import TodoItem, parse_todo_markdown, update_todo_with_pr
+from claude_code_manager.todo_doc import TodoDocument, TodoWriter
+
+
+def _item(title: str) -> TodoItem:
+    return TodoItem(title=title, children=[])
+
+
+def test_completions_are_applied_in_memory_and_replaced_atomically(tmp_path: Path):
+    todo = tmp_path / "TODO.md"
+    todo.write_bytes(b"# Plan\r\n- [ ] one\r\n  - [ ] child\r\n- [ ] two  \r\n")
+    doc = TodoDocument(todo)
+    inode = todo.stat().st_ino
+    assert doc.complete(_item("one"), "https://github.com/o/r/pull/7")
+    assert doc.complete(_item("two"), "https://example.com/x")
+    assert not doc.complete(_item("three"), None)
+    # Nothing is written until the flush
+    assert b"[x]" not in todo.read_bytes()
+    assert doc.flush()
+    assert todo.read_bytes() == (
+        b"# Plan\r\n- [x] one [#7](https://github.com/o/r/pull/7)\r\n  - [ ] child\r\n"
+        b"- [x] two (https://example.com/x)\r\n"
+    )
+    assert todo.stat().st_ino != inode
+    assert not doc.flush()
+    assert list(tmp_path.iterdir()) == [todo]
+
+
+def test_edits_made_on_disk_before_the_flush_are_kept(tmp_path: Path):
+    todo = tmp_path / "TODO.md"
+    todo.write_text("- [ ] one\n- [ ] two\n", encoding="utf-8")
+    doc = TodoDocument(todo)
+    doc.complete(_item("one"), None)
+    doc.complete(_item("two"), None)
+    # Someone else adds an item and ticks "two" themselves meanwhile
+    todo.write_text("- [ ] zero\n- [ ] one\n- [x] two by hand\n", encoding="utf-8")
+    doc.flush()
+    assert todo.read_text(encoding="utf-8") == "- [ ] zero\n- [x] one\n- [x] two by hand\n"
+
+
+def test_writer_coalesces_bursts_into_one_write(tmp_path: Path):
+    todo = tmp_path / "TODO.md"
+    todo.write_text("".join(f"- [ ] item {i}\n" for i in range(5)), encoding="utf-8")
+    writer = TodoWriter(TodoDocument(todo), delay=0.05)
+
+    async def _burst() -> None:
+        for i in range(4):
+            await writer.complete(_item(f"item {i}"), None)
+        await asyncio.sleep(0.2)
+        await writer.complete(_item("item 4"), None)
+        await writer.close()
+
+    asyncio.run(_burst())
+    assert writer.writes == 2
+    assert parse_todo_markdown(todo.read_text(encoding="utf-8")) == []
+
+
+def test_processes_ticking_the_same_file_do_not_clobber_each_other(tmp_path: Path):
+    todo = tmp_path / "TODO.md"
+    titles = [f"{p}-{i}" for p in "ab" for i in range(25)]
+    todo.write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    script = (
+        "import sys; from pathlib import Path\n"
+        "from claude_code_manager.cli import TodoItem, update_todo_with_pr\n"
+        "for i in range(25):\n"
+        "    t = f'{sys.argv[2]}-{i}'\n"
+        "    assert update_todo_with_pr(Path(sys.argv[1]), TodoItem(t, []), None), t\n"
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", script, str(todo), p], cwd=Path(__file__).resolve().parents[1]
+        )
+        for p in "ab"
+    ]
+    assert [p.wait(timeout=60) for p in procs] == [0, 0]
+    assert parse_todo_markdown(todo.read_text(encoding="utf-8")) == []
+    assert not update_todo_with_pr(todo, _item("a-0"), None)
+
+
+def test_duplicate_titles_are_ticked_by_id(tmp_path: Path):
+    todo = tmp_path / "TODO.md"
+    todo.write_text("- [ ] Fix flaky test\n* [ ] Fix flaky test\n", encoding="utf-8")
+    second = parse_todo_markdown(todo.read_text(encoding="utf-8"))[1]
+    doc = TodoDocument(todo)
+    # Another process ticks the first one meanwhile
+    assert update_todo_with_pr(todo, _item("Fix flaky test"), "https://github.com/o/r/pull/1")
+    assert doc.complete(second, "https://github.com/o/r/pull/2")
+    doc.flush()
+    assert todo.read_text(encoding="utf-8") == (
+        "- [x] Fix flaky test [#1](https://github.com/o/r/pull/1)\n"
+        "* [x] Fix flaky test [#2](https://github.com/o/r/pull/2)\n"
+    )
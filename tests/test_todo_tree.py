@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import random
+
+from claude_code_manager.cli import parse_todo_markdown
+from claude_code_manager.todo_tree import TodoTree
+
+MD = """\
+# Plan
+- [ ] Add API (id: api)
+  * [x] schema
+  * [ ] handlers
+    + [ ] list
+    + [ ] detail
+
+    ```
+    - [ ] not an item
+    ```
+- [x] Done [#3](https://github.com/o/r/pull/3)
+- [ ] Add API
+
+Notes
+"""
+
+
+def _shape(tree: TodoTree) -> list[tuple]:
+    return [
+        (n.title, n.checked, n.indent, n.start, n.end, n.id, n.parent and n.parent.id)
+        for n in tree.walk()
+    ]
+
+
+def test_tree_has_depth_spans_and_skips_code_blocks():
+    tree = TodoTree.parse(MD)
+    api, done, dup = tree.roots
+    assert api.id == "api" and (api.start, api.end) == (1, 10)
+    assert [c.title for c in api.children] == ["schema", "handlers"]
+    assert api.children[0].checked and api.children[0].bullet == "*"
+    handlers = api.children[1]
+    assert [c.title for c in handlers.children] == ["list", "detail"]
+    assert (handlers.start, handlers.end) == (3, 10)
+    assert done.checked and (dup.start, dup.end) == (11, 12)
+    assert "not an item" not in [n.title for n in tree.walk()]
+
+    items = parse_todo_markdown(MD)
+    assert [i.title for i in items] == ["Add API (id: api)", "Add API"]
+    assert items[0].children == ["handlers", "list", "detail"]
+
+
+def test_ids_are_stable_across_edits_and_ticks():
+    tree = TodoTree.parse("- [ ] same\n- [ ] same\n  - [ ] child\n")
+    first, second = tree.roots
+    assert first.id != second.id
+    ids = [n.id for n in tree.walk()]
+    edited = TodoTree.parse(
+        "intro\n- [ ] other\n- [x] same [#4](https://github.com/o/r/pull/4)\n"
+        "- [ ] same\n  - [ ] child\n"
+    )
+    assert [n.id for n in edited.walk()][1:] == ids
+
+
+def test_reparse_only_touches_the_changed_item():
+    tree = TodoTree.parse(MD)
+    api, done, dup = tree.roots
+    lines = list(tree.lines)
+    lines.insert(12, "  - [ ] follow-up\n")
+    new = tree.reparse(lines)
+    assert _shape(new) == _shape(TodoTree.parse(lines))
+    # Items before the edit are reused as they are
+    assert new.roots[0] is api and new.roots[1] is done
+    assert [c.title for c in new.roots[2].children] == ["follow-up"]
+
+
+def test_reparse_matches_a_full_parse_for_random_edits():
+    rng = random.Random(7)
+    pool = [
+        "- [ ] a\n",
+        "- [x] b\n",
+        "  - [ ] c\n",
+        "    * [ ] d\n",
+        "+ [ ] a\n",
+        "text\n",
+        "  more\n",
+        "\n",
+        "```\n",
+        "    ```\n",
+        "\t- [ ] t\n",
+    ]
+    for _ in range(2000):
+        tree = TodoTree.parse([rng.choice(pool) for _ in range(rng.randint(0, 12))])
+        for _ in range(4):
+            lines = list(tree.lines)
+            i = rng.randint(0, len(lines))
+            if rng.random() < 0.5 or not lines:
+                lines.insert(i, rng.choice(pool))
+            else:
+                lines[min(i, len(lines) - 1)] = rng.choice(pool)
+            tree = tree.reparse(lines)
+            assert _shape(tree) == _shape(TodoTree.parse(lines)), lines
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from claude_code_manager import engine, tracing
+from claude_code_manager.cli import Config, TodoItem
+
+
+def test_span_is_a_noop_without_a_tracer():
+    assert not tracing.enabled()
+    with tracing.span("x", a=1) as sp:
+        sp["b"] = 2
+    assert tracing.stop() is None
+
+
+def test_parallel_run_trace_has_one_track_per_worker(git_repo: Path, fake_bin: Path):
+    titles = ["one", "two", "three"]
+    (git_repo / "TODO.md").write_text("".join(f"- [ ] {t}\n" for t in titles), encoding="utf-8")
+    cfg = Config(worktree_parallel_max_semaphore=2, pr_urls=[])
+    tracer = tracing.start()
+    try:
+        asyncio.run(engine.run_worktree_parallel(git_repo, [TodoItem(t, []) for t in titles], cfg))
+    finally:
+        tracing.stop()
+
+    out = git_repo / "trace.json"
+    tracer.write(out)
+    events = json.loads(out.read_text(encoding="utf-8"))["traceEvents"]
+    lanes = {e["tid"]: e["args"]["name"] for e in events if e["name"] == "thread_name"}
+    assert lanes == {0: "main", 1: "worker 1", 2: "worker 2"}
+
+    spans = [e for e in events if e["ph"] == "X"]
+    items = [e for e in spans if e["name"] == "item"]
+    assert sorted(e["args"]["title"] for e in items) == sorted(titles)
+    assert {e["tid"] for e in items} == {1, 2}
+    for name in ("worktree", "claude", "git commit", "git push", "create_pr", "todo update (root)"):
+        assert sum(e["name"] == name for e in spans) == 3, name
+    # Every phase span lies inside an item span on the same track
+    for e in spans:
+        if e["name"] in ("item", "git fetch"):
+            continue
+        assert any(
+            i["tid"] == e["tid"] and i["ts"] <= e["ts"] and e["ts"] + e["dur"] <= i["ts"] + i["dur"]
+            for i in items
+        ), e
+    claude = [e for e in spans if e["name"] == "claude"]
+    assert all(e["args"] == {"attempt": 1, "returncode": 0, "done": True} for e in claude)
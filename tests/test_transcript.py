@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import time
+from pathlib import Path
+
+import pytest
+from claude_code_manager import engine
+from claude_code_manager.cli import Config, TodoItem
+from claude_code_manager.transcript import TranscriptStore, open_run_store, resolve_codec
+
+
+def _index(directory: Path) -> list[dict]:
+    return [json.loads(x) for x in (directory / "index.jsonl").read_text().splitlines() if x]
+
+
+def test_store_writes_compressed_attempts_and_index(tmp_path: Path):
+    store = TranscriptStore(tmp_path / "run", root=tmp_path)
+    first = store.open("Add x", "todo/add-x-abc123", 1)
+    first.write(b'{"type": "system"}\n')
+    first.write(b'{"type": "result"}\n')
+    first.close(returncode=0, done=False)
+    second = store.open("Add x", "todo/add-x-abc123", 2)
+    second.close(returncode=0, done=True)
+    store.close()
+
+    assert gzip.decompress(first.path.read_bytes()) == b'{"type": "system"}\n{"type": "result"}\n'
+    assert gzip.decompress(second.path.read_bytes()) == b""
+    recs = _index(tmp_path / "run")
+    assert [(r["attempt"], r["lines"], r["done"]) for r in recs] == [(1, 2, False), (2, 0, True)]
+    assert recs[0]["path"] == "todo-add-x-abc123/attempt-1.jsonl.gz"
+    assert store.summary("todo/add-x-abc123") == (
+        "Claude transcript: 2 attempts, 2 lines, saved locally in `run/todo-add-x-abc123`"
+    )
+
+
+def _json_lines(t) -> list[dict]:
+    return [json.loads(x) for x in gzip.decompress(t.path.read_bytes()).splitlines()]
+
+
+def test_full_buffer_drops_lines_instead_of_blocking(tmp_path: Path):
+    store = TranscriptStore(tmp_path / "run", max_buffer_bytes=100)
+    t = store.open("big", "todo/big", 1)
+    line = b'{"n": "' + b"x" * 30 + b'"}\n'
+    with store._cond:
+        # Hold the writer thread off so everything stays buffered
+        for _ in range(10):
+            t.write(line)
+        assert store.buffered <= 100
+    t.close()
+    store.close()
+    assert (t.lines, t.dropped_lines, t.dropped_bytes) == (2, 8, 8 * len(line))
+    assert _index(tmp_path / "run")[0]["dropped_lines"] == 8
+    recs = _json_lines(t)
+    assert recs[-1] == {
+        "type": "claude_manager_dropped",
+        "dropped_bytes": 8 * len(line),
+        "dropped_lines": 8,
+    }
+    assert len(recs) == 3
+
+
+def test_dropping_keeps_lines_whole_across_chunk_boundaries(tmp_path: Path):
+    store = TranscriptStore(tmp_path / "run", max_buffer_bytes=60)
+    t = store.open("split", "todo/split", 1)
+    data = b"".join(json.dumps({"i": i, "pad": "p" * 20}).encode() + b"\n" for i in range(8))
+    # 13-byte chunks start and end mid-line
+    chunks = [data[i : i + 13] for i in range(0, len(data), 13)]
+    with store._cond:
+        for chunk in chunks[: len(chunks) // 2]:
+            t.write(chunk)
+    # Once drained, output is accepted again from the next whole line
+    for chunk in chunks[len(chunks) // 2 :]:
+        deadline = time.monotonic() + 5
+        while store.buffered and time.monotonic() < deadline:
+            time.sleep(0.01)
+        t.write(chunk)
+    t.close()
+    store.close()
+
+    recs = _json_lines(t)
+    kept = [r["i"] for r in recs if "i" in r]
+    gaps = [i for i, r in enumerate(recs) if r.get("type") == "claude_manager_dropped"]
+    assert kept == sorted(kept) and kept[-1] == 7 and len(kept) + t.dropped_lines == 8
+    assert gaps and gaps[-1] < len(recs) - 1
+    assert sum(recs[i]["dropped_lines"] for i in gaps) == t.dropped_lines
+
+
+def test_run_store_prunes_old_runs_and_unknown_codec(tmp_path: Path):
+    for name in ("20200101-000000", "20200102-000000", "20200103-000000"):
+        (tmp_path / name).mkdir()
+    store = open_run_store(tmp_path, keep=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["20200103-000000", store.directory.name]
+    store.close()
+    assert not store.directory.exists()
+    with pytest.raises(ValueError):
+        resolve_codec("brotli")
+
+
+def test_run_store_prunes_by_start_order_not_name(tmp_path: Path):
+    # Runs started in the same second: "-10" is newer than "-2"
+    for name in ("20200101-000000", "20200101-000000-2", "20200101-000000-10", "notes"):
+        (tmp_path / name).mkdir()
+    store = open_run_store(tmp_path, keep=2)
+    # Directories that are not runs are never pruned
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "20200101-000000-10",
+        store.directory.name,
+        "notes",
+    ]
+    store.close()
+
+
+def test_run_keeps_transcripts_and_summarizes_them_in_the_pr(
+    git_repo: Path, fake_bin: Path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_CLAUDE_DONE", "0")
+    (git_repo / "TODO.md").write_text("- [ ] keep going\n", encoding="utf-8")
+    cfg = Config(
+        max_keep_asking=1,
+        pr_urls=[],
+        github_pr_body_template="{todo_item}\n\n{transcript}",
+    )
+    item = TodoItem(title="keep going", children=[])
+    asyncio.run(engine.run_sequential(git_repo, [item], cfg))
+
+    (run_dir,) = (git_repo / ".claude-manager" / "transcripts").iterdir()
+    recs = _index(run_dir)
+    assert [r["attempt"] for r in recs] == [1, 2]
+    assert all(r["returncode"] == 0 and r["lines"] == 3 for r in recs)
+    lines = gzip.decompress((run_dir / recs[0]["path"]).read_bytes()).splitlines()
+    assert json.loads(lines[-1])["type"] == "result"
+
+    gh = [json.loads(x) for x in (fake_bin.parent / "gh.log").read_text().splitlines()]
+    (create,) = [a for a in gh if a[:2] == ["pr", "create"] and "--body" in a]
+    body = create[create.index("--body") + 1]
+    assert "Claude transcript: 2 attempts, 6 lines" in body
+    assert str(run_dir.relative_to(git_repo)) in body
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from claude_code_manager import cli, engine
+from claude_code_manager.cli import Config, TodoItem
+from claude_code_manager.stream_json import decode_line
+from claude_code_manager.usage import Usage, run_total
+
+
+def test_usage_from_result_event():
+    line = json.dumps(
+        {
+            "type": "result",
+            "subtype": "success",
+            "total_cost_usd": 0.125,
+            "duration_ms": 4000,
+            "duration_api_ms": 3500,
+            "num_turns": 3,
+            "usage": {"input_tokens": 10, "output_tokens": 7, "cache_creation_input_tokens": 2},
+        }
+    )
+    u = Usage.from_event(decode_line(line))
+    assert (u.input_tokens, u.output_tokens, u.cache_creation_input_tokens) == (10, 7, 2)
+    assert (u.cost_usd, u.duration_api_ms, u.num_turns) == (0.125, 3500, 3)
+    assert u.total_tokens == 19
+    u.add(u)
+    assert u.output_tokens == 14 and u.cost_usd == 0.25
+
+
+def test_usage_per_attempt_and_budget_cap(git_repo: Path, fake_bin: Path, monkeypatch):
+    # Never print the done token, so each item runs the first attempt plus one bounce
+    monkeypatch.setenv("FAKE_CLAUDE_DONE", "0")
+    (git_repo / "TODO.md").write_text("- [ ] first\n- [ ] second\n", encoding="utf-8")
+    cfg = Config(
+        max_keep_asking=1,
+        max_cost_usd=0.015,
+        summary_path="out/summary.json",
+        pr_urls=[],
+        usage=[],
+        budget_skipped=[],
+    )
+    items = [TodoItem("first", []), TodoItem("second", [])]
+    asyncio.run(engine.run_sequential(git_repo, items, cfg))
+
+    assert [u.title for u in cfg.usage] == ["first"]
+    assert len(cfg.usage[0].attempts) == 2
+    total = run_total(cfg.usage)
+    assert (total.input_tokens, total.output_tokens, total.cost_usd) == (200, 40, 0.02)
+    assert cfg.budget_skipped == ["second"]
+
+    cli._write_summary(git_repo, cfg)
+    data = json.loads((git_repo / "out" / "summary.json").read_text(encoding="utf-8"))
+    assert data["items"][0]["total"]["duration_api_ms"] == 2400
+    assert data["total"]["cost_usd"] == 0.02
+    assert data["budget_skipped"] == ["second"]
+    assert len(data["pr_urls"]) == 1
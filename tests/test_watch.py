@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+import typer
+from claude_code_manager import cli
+from claude_code_manager.cli import Config
+from claude_code_manager.watch import TodoWatcher
+
+
+async def _until(cond, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+def test_watch_dispatches_items_added_while_others_run(git_repo: Path, fake_bin: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_CLAUDE_DELAY", "1.0")
+    todo = git_repo / "TODO.md"
+    todo.write_text("- [ ] first\n", encoding="utf-8")
+    cfg = Config(worktree_parallel_max_semaphore=2, pr_urls=[])
+    claude_log = fake_bin.parent / "claude.log"
+
+    def _events() -> list[dict]:
+        if not claude_log.exists():
+            return []
+        return [json.loads(x) for x in claude_log.read_text(encoding="utf-8").splitlines()]
+
+    async def _session() -> None:
+        stop = asyncio.Event()
+        watcher = TodoWatcher(git_repo, cfg, interval=0.05)
+        session = asyncio.create_task(watcher.run(stop))
+        await _until(lambda: any(e["event"] == "start" for e in _events()))
+        # Saved while "first" is still running
+        with open(todo, "a", encoding="utf-8") as f:
+            f.write("- [ ] second\n")
+        await _until(lambda: len(cfg.pr_urls) == 2)
+        # Unrelated edits start nothing new
+        await _until(lambda: todo.read_text(encoding="utf-8").count("[x]") == 2)
+        todo.write_text("# Notes\n\n" + todo.read_text(encoding="utf-8"), encoding="utf-8")
+        await asyncio.sleep(0.3)
+        stop.set()
+        await session
+
+    asyncio.run(_session())
+
+    events = _events()
+    starts = [e["t"] for e in events if e["event"] == "start"]
+    ends = [e["t"] for e in events if e["event"] == "end"]
+    assert len(starts) == 2
+    # The new item started before the running one finished
+    assert starts[1] < ends[0]
+    text = todo.read_text(encoding="utf-8")
+    assert "- [x] first [#" in text and "- [x] second [#" in text
+    # One warm session: gh was probed once and worktree slots came from the pool
+    gh_calls = [json.loads(x) for x in (fake_bin.parent / "gh.log").read_text().splitlines()]
+    assert sum(c[:1] == ["--version"] for c in gh_calls) == 1
+    assert {p.name for p in cli.CREATED_WORKTREES} <= {"slot-1", "slot-2"}
+    cli._cleanup_created_worktrees(git_repo)
+
+
+def test_watch_command_shares_run_options():
+    command = typer.main.get_command(cli.APP)
+    run, watch = command.commands["run"], command.commands["watch"]
+    assert [p.name for p in watch.params] == [p.name for p in run.params]
+    assert "watch_interval" in {p.name for p in watch.params}
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["watch", "--manifest", "repos.toml"],
+        ["watch", "--doctor"],
+        ["watch", "-D"],
+        ["watch", "--worktree-parallel"],
+        ["watch", "-w"],
+        ["run", "--watch-interval", "5"],
+    ],
+)
+def test_commands_reject_options_they_ignore(tmp_path: Path, monkeypatch, args: list[str]):
+    from typer.testing import CliRunner
+
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(cli.APP, args)
+    assert result.exit_code == 2, result.output
+    assert "not supported by " + args[0] in result.output
+
+
+def test_run_only_options_cover_every_watch_exception():
+    command = typer.main.get_command(cli.APP)
+    names = {p.name for p in command.commands["watch"].params}
+    assert set(cli._RUN_ONLY_OPTIONS) | set(cli._WATCH_ONLY_OPTIONS) <= names